@@ -0,0 +1,251 @@
+import math
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+
+import requests
+
+STEPS = ("login", "exam", "submit", "results")
+
+
+def percentile(timings, fraction):
+    """Nearest-rank percentile."""
+    ordered = sorted(timings)
+    return ordered[max(0, math.ceil(len(ordered) * fraction) - 1)]
+
+
+class Recorder:
+    """Collects latencies and failures per step from many threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timings = defaultdict(list)
+        self.errors = defaultdict(Counter)
+        self.journeys = 0
+
+    def record(self, step, elapsed, error=None):
+        with self.lock:
+            self.timings[step].append(elapsed * 1000)
+            if error is not None:
+                self.errors[step][error] += 1
+
+    def fail(self, step, error):
+        """Count an error raised outside a request, such as a malformed body."""
+        with self.lock:
+            self.errors[step][error] += 1
+
+    def finish_journey(self):
+        with self.lock:
+            self.journeys += 1
+
+    def report(self, elapsed):
+        with self.lock:
+            all_timings = {
+                step: list(timings) for step, timings in self.timings.items()
+            }
+            all_errors = {step: Counter(errors) for step, errors in self.errors.items()}
+            journeys = self.journeys
+        steps = {}
+        for step in STEPS:
+            timings = all_timings.get(step)
+            if not timings:
+                continue
+            step_errors = all_errors.get(step, Counter())
+            errors = sum(step_errors.values())
+            steps[step] = {
+                "requests": len(timings),
+                "errors": errors,
+                "error_rate": round(errors / len(timings), 4),
+                "errors_by_status": dict(step_errors),
+                "throughput": round(len(timings) / elapsed, 2),
+                **{
+                    f"p{int(fraction * 100)}_ms": round(
+                        percentile(timings, fraction), 2
+                    )
+                    for fraction in (0.5, 0.9, 0.95, 0.99)
+                },
+                "max_ms": round(max(timings), 2),
+            }
+        return {
+            "elapsed": round(elapsed, 2),
+            "journeys": journeys,
+            "journeys_per_second": round(journeys / elapsed, 2),
+            "steps": steps,
+        }
+
+
+class AccountPool:
+    """
+    Hands out each account once: submitting an answer sheet can admit the
+    student, who may then no longer submit or fetch the paper.
+    """
+
+    def __init__(self, accounts):
+        self.lock = threading.Lock()
+        self.accounts = iter(accounts)
+        self.exhausted = False
+
+    def take(self):
+        with self.lock:
+            account = next(self.accounts, None)
+            if account is None:
+                self.exhausted = True
+            return account
+
+
+class StudentJourney:
+    """
+    One virtual student: log in, fetch the MCQ paper, submit an answer sheet
+    and poll the results, over a session of its own.
+    """
+
+    def __init__(self, base_url, password, recorder, options, rng):
+        self.base_url = base_url.rstrip("/")
+        self.password = password
+        self.recorder = recorder
+        self.options = options
+        self.rng = rng
+        self.session = requests.Session()
+        self.step = None
+
+    def request(self, step, method, path, **kwargs):
+        """Send a request and record it; returns the JSON body or None."""
+        self.step = step
+        start = time.perf_counter()
+        try:
+            response = self.session.request(
+                method,
+                self.base_url + path,
+                timeout=self.options["timeout"],
+                **kwargs,
+            )
+        except requests.RequestException as error:
+            self.recorder.record(
+                step, time.perf_counter() - start, type(error).__name__
+            )
+            return None
+        elapsed = time.perf_counter() - start
+        if response.status_code >= 400:
+            self.recorder.record(step, elapsed, str(response.status_code))
+            return None
+        self.recorder.record(step, elapsed)
+        return response.json()
+
+    def think(self):
+        if self.options["think_time"]:
+            time.sleep(self.rng.uniform(0, 2 * self.options["think_time"]))
+
+    def run(self, email, college_id):
+        """Replay the journey as ``email``; unexpected errors count against the step."""
+        self.step = None
+        try:
+            self.replay(email, college_id)
+        except Exception as error:
+            self.recorder.fail(self.step or STEPS[0], type(error).__name__)
+
+    def replay(self, email, college_id):
+        self.session.headers.pop("Authorization", None)
+        tokens = self.request(
+            "login",
+            "post",
+            "/user/login/",
+            json={"email": email, "password": self.password},
+        )
+        if tokens is None:
+            return
+        self.session.headers["Authorization"] = f"JWT {tokens['access']}"
+        self.think()
+
+        if self.options["bundle"]:
+            bundle = self.request(
+                "exam", "get", f"/api/v1/colleges/{college_id}/exam-bundle/"
+            )
+            questions = bundle and bundle["mcq"]
+        else:
+            page = self.request(
+                "exam",
+                "get",
+                f"/api/v1/colleges/{college_id}/mcq/",
+                params={"page_size": 500},
+            )
+            questions = page and page["results"]
+        if not questions:
+            return
+        self.think()
+
+        answers = [
+            {
+                "question": question["id"],
+                "answer": self.rng.choice(
+                    [
+                        question[option]
+                        for option in ("option1", "option2", "option3")
+                        if question.get(option)
+                    ]
+                ),
+            }
+            for question in questions
+        ]
+        self.request(
+            "submit", "post", "/api/v1/students/mcq/bulk/", json={"answers": answers}
+        )
+
+        for poll in range(self.options["polls"]):
+            if poll:
+                time.sleep(self.options["poll_interval"])
+            self.request("results", "get", "/api/v1/students/results/")
+        self.recorder.finish_journey()
+
+
+def run_load(base_url, accounts, password, options, progress=None):
+    """
+    Ramp up ``options["users"]`` virtual students over ``ramp_up`` seconds,
+    each repeating the journey until ``duration`` seconds after the ramp, or
+    for ``iterations`` journeys when given. Every journey logs in with an
+    (email, college id) account of its own and the run stops early once
+    ``accounts`` are used up. Returns the report of the recorder.
+    """
+    recorder = Recorder()
+    pool = AccountPool(accounts)
+    users = options["users"]
+    started = time.monotonic()
+    deadline = started + options["ramp_up"] + options["duration"]
+
+    def virtual_user(index):
+        time.sleep(options["ramp_up"] * index / users)
+        journey = StudentJourney(
+            base_url,
+            password,
+            recorder,
+            options,
+            random.Random(options["seed"] * users + index),
+        )
+        done = 0
+        while time.monotonic() < deadline:
+            account = pool.take()
+            if account is None:
+                break
+            journey.run(*account)
+            done += 1
+            if options["iterations"] and done >= options["iterations"]:
+                break
+
+    threads = [
+        threading.Thread(target=virtual_user, args=(index,), daemon=True)
+        for index in range(users)
+    ]
+    for thread in threads:
+        thread.start()
+    reported = started
+    while True:
+        alive = [thread for thread in threads if thread.is_alive()]
+        if not alive:
+            break
+        alive[0].join(timeout=1.0)
+        if progress and time.monotonic() - reported >= options["report_interval"]:
+            reported = time.monotonic()
+            progress(recorder.report(reported - started))
+    report = recorder.report(time.monotonic() - started)
+    report["accounts_exhausted"] = pool.exhausted
+    return report
@@ -0,0 +1,132 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.loadtest import STEPS, run_load
+from students.cohort import DEFAULT_PASSWORD
+from students.models import Student
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay the exam-day student journey (login, MCQ paper, answer sheet, "
+        "results) against a running server with ramped virtual students. Each "
+        "journey logs in as a different cohort student under review and submits "
+        "their sheet, which grades and may admit them: the run changes the data, "
+        "so use a disposable database and regenerate the cohort between runs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "base_url", nargs="?", default="http://127.0.0.1:8000", help="Server URL."
+        )
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument(
+            "--ramp-up",
+            type=float,
+            default=30.0,
+            help="Seconds over which the virtual students start.",
+        )
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=60.0,
+            help="Seconds to keep running after the ramp-up.",
+        )
+        parser.add_argument(
+            "--iterations", type=int, help="Stop each student after this many journeys."
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Log in as students of the cohort generated with this seed.",
+        )
+        parser.add_argument("--password", default=DEFAULT_PASSWORD)
+        parser.add_argument(
+            "--bundle",
+            action="store_true",
+            help="Fetch the exam bundle instead of the MCQ list.",
+        )
+        parser.add_argument(
+            "--polls", type=int, default=3, help="Result polls per journey."
+        )
+        parser.add_argument("--poll-interval", type=float, default=2.0)
+        parser.add_argument(
+            "--think-time",
+            type=float,
+            default=0.0,
+            help="Mean pause between steps, in seconds.",
+        )
+        parser.add_argument("--timeout", type=float, default=30.0)
+        parser.add_argument("--report-interval", type=float, default=10.0)
+        parser.add_argument(
+            "--json", metavar="FILE", help="Also write the report here."
+        )
+
+    def handle(self, *args, **options):
+        if options["users"] < 1:
+            raise CommandError("--users must be at least 1.")
+        # Only students under review may submit answers, and each one only
+        # until a submission admits them.
+        accounts = list(
+            Student.objects.filter(
+                user__status="student_review",
+                user__email__startswith=f"cohort{options['seed']}-",
+            )
+            .order_by("pk")
+            .values_list("user__email", "college_id")
+        )
+        if not accounts:
+            raise CommandError(
+                f"No cohort {options['seed']} students to log in as; "
+                "run generate_cohort first."
+            )
+
+        def progress(report):
+            if options["verbosity"] > 0:
+                self.stdout.write(
+                    f"{report['elapsed']:.0f}s: {report['journeys']} journeys, "
+                    f"{sum(s['errors'] for s in report['steps'].values())} errors"
+                )
+
+        report = run_load(
+            options["base_url"], accounts, options["password"], options, progress
+        )
+        self.write_report(report)
+        if report["accounts_exhausted"]:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Stopped early: all {len(accounts)} students under review "
+                    "were used; generate a larger cohort for longer runs."
+                )
+            )
+        if options["json"]:
+            with open(options["json"], "w") as report_file:
+                json.dump(report, report_file, indent=2)
+
+    def write_report(self, report):
+        self.stdout.write(
+            f"{report['journeys']} journeys in {report['elapsed']}s "
+            f"({report['journeys_per_second']}/s)"
+        )
+        self.stdout.write(
+            f"{'step':<8} {'requests':>8} {'req/s':>8} {'errors':>7} "
+            f"{'p50 ms':>8} {'p90 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+        )
+        for step in STEPS:
+            stats = report["steps"].get(step)
+            if stats is None:
+                continue
+            self.stdout.write(
+                f"{step:<8} {stats['requests']:>8} {stats['throughput']:>8.2f} "
+                f"{stats['error_rate']:>7.1%} {stats['p50_ms']:>8.1f} "
+                f"{stats['p90_ms']:>8.1f} {stats['p95_ms']:>8.1f} "
+                f"{stats['p99_ms']:>8.1f} {stats['max_ms']:>8.1f}"
+            )
+            if stats["errors_by_status"]:
+                errors = ", ".join(
+                    f"{status}: {count}"
+                    for status, count in sorted(stats["errors_by_status"].items())
+                )
+                self.stdout.write(self.style.WARNING(f"         errors: {errors}"))
@@ -0,0 +1,84 @@
+from types import SimpleNamespace
+
+from notifications.models import Notification
+
+from colleges.models import CollegeDepartment
+from exams.models import (
+    DigitalDrawingExam,
+    HandDrawingExam,
+    MCQExam,
+    PracticeDrawingExam,
+)
+from notification.fanout import create_notifications, user_notification
+from notification.models import NotificationCounter
+from settings.models import About
+from students.cohort import DEFAULT_PASSWORD, generate_cohort
+from students.models import (
+    DigitalDrawingAnswer,
+    HandDrawingAnswer,
+    McqAnswer,
+    PracticeDrawingAnswer,
+    Student,
+)
+
+PASSWORD = DEFAULT_PASSWORD
+COLLEGES = 3
+NOTIFICATIONS = 5
+BATCH_SIZE = 500
+
+
+def seed_dataset(students):
+    """
+    Create an exam-day dataset: a generated cohort of ``students`` students
+    over a few colleges, plus the site settings and some notifications for
+    everyone. Returns the objects the benchmarks request.
+    """
+    About.objects.create(
+        title="Artech", description="Art exams", logo="images/logo.png", email="a@b.c"
+    )
+    generate_cohort(COLLEGES, students, images=4)
+
+    user_ids = list(Student.objects.values_list("user_id", flat=True))
+    NotificationCounter.objects.bulk_create(
+        [NotificationCounter(user_id=user_id) for user_id in user_ids],
+        batch_size=BATCH_SIZE,
+    )
+    create_notifications(
+        [
+            user_notification(user_id, f"Notice {index}")
+            for user_id in user_ids
+            for index in range(NOTIFICATIONS)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+    # Answer submission is only open to students under review.
+    student = (
+        Student.objects.select_related("user", "college")
+        .filter(user__status="student_review")
+        .earliest("pk")
+    )
+    college = student.college
+    return SimpleNamespace(
+        about=About.objects.get(),
+        college=college,
+        department=CollegeDepartment.objects.filter(colleges=college).first(),
+        exams=SimpleNamespace(
+            **{
+                name: list(model.objects.filter(college=college).order_by("pk"))
+                for name, model in (
+                    ("mcq", MCQExam),
+                    ("hand", HandDrawingExam),
+                    ("digital", DigitalDrawingExam),
+                    ("practice", PracticeDrawingExam),
+                )
+            }
+        ),
+        student=student,
+        user=student.user,
+        mcq_answer=McqAnswer.objects.filter(student=student).first(),
+        hand_answer=HandDrawingAnswer.objects.filter(student=student).first(),
+        digital_answer=DigitalDrawingAnswer.objects.filter(student=student).first(),
+        practice_answer=PracticeDrawingAnswer.objects.filter(student=student).first(),
+        notification=Notification.objects.filter(recipient=student.user).first(),
+    )
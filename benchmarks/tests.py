@@ -0,0 +1,302 @@
+import json
+import os
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import LiveServerTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, get_resolver
+from rest_framework.test import APIClient
+
+from students.cohort import generate_cohort
+
+from .loadtest import percentile
+from .seed import PASSWORD, seed_dataset
+
+User = get_user_model()
+
+# GET handlers that change data; driving them would corrupt later rounds.
+UNSAFE_ACTIONS = {
+    "delete",
+    "delete_all",
+    "make_all_as_read",
+    "make_all_as_unread",
+    "mark_as_read",
+    "mark_as_unread",
+}
+# Routes that are not plain GETs (one-time links, the login POST) and the
+# staff-only profiling report.
+SKIPPED_ROUTES = {
+    "activate-account",
+    "reset-password",
+    "token_obtain_pair",
+    "profile-list",
+}
+
+# URL arguments for every route that takes some, by route name.
+ROUTE_KWARGS = {
+    "user-detail": lambda data: {"id": data.user.pk},
+    "notification-detail": lambda data: {"pk": data.notification.pk},
+    "colleges-detail": lambda data: {"pk": data.college.pk},
+    "colleges-departments-list": lambda data: {"colleges_pk": data.college.pk},
+    "colleges-departments-detail": lambda data: {
+        "colleges_pk": data.college.pk,
+        "pk": data.department.pk,
+    },
+    "college-mcq-list": lambda data: {"colleges_pk": data.college.pk},
+    "college-mcq-detail": lambda data: {
+        "colleges_pk": data.college.pk,
+        "pk": data.exams.mcq[0].pk,
+    },
+    "digital-exam-list": lambda data: {"colleges_pk": data.college.pk},
+    "digital-exam-detail": lambda data: {
+        "colleges_pk": data.college.pk,
+        "pk": data.exams.digital[0].pk,
+    },
+    "hand-exam-list": lambda data: {"colleges_pk": data.college.pk},
+    "hand-exam-detail": lambda data: {
+        "colleges_pk": data.college.pk,
+        "pk": data.exams.hand[0].pk,
+    },
+    "practic-exam-list": lambda data: {"colleges_pk": data.college.pk},
+    "practic-exam-detail": lambda data: {
+        "colleges_pk": data.college.pk,
+        "pk": data.exams.practice[0].pk,
+    },
+    "exam-bundle-list": lambda data: {"colleges_pk": data.college.pk},
+    "about-detail": lambda data: {"pk": data.about.pk},
+    "students-detail": lambda data: {"pk": data.student.pk},
+    "mcqAnswer-detail": lambda data: {"pk": data.mcq_answer.pk},
+    "hand-drawingAnswer-detail": lambda data: {"pk": data.hand_answer.pk},
+    "digital-drawingAnswer-detail": lambda data: {"pk": data.digital_answer.pk},
+    "practice-drawingAnswer-detail": lambda data: {"pk": data.practice_answer.pk},
+    "results-detail": lambda data: {"pk": data.student.pk},
+}
+
+
+def route_template(pattern):
+    """``api/v1/students/^mcq/(?P<pk>[^/.]+)/$`` -> ``api/v1/students/mcq/<pk>/``"""
+    template = re.sub(r"\(\?P<(\w+)>[^)]*\)", r"<\1>", pattern)
+    return template.replace("^", "").replace("$", "")
+
+
+def get_routes(patterns=None, prefix=""):
+    """
+    Yield ``(template, name)`` for every GET route of the project, leaving
+    out the admin, format-suffix duplicates and handlers that change data.
+    """
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.app_name != "admin":
+                yield from get_routes(
+                    pattern.url_patterns, prefix + str(pattern.pattern)
+                )
+            continue
+        if "format" in pattern.pattern.regex.groupindex:
+            continue
+        if pattern.name in SKIPPED_ROUTES:
+            continue
+        actions = getattr(pattern.callback, "actions", None)
+        if actions is not None and (
+            "get" not in actions or actions["get"] in UNSAFE_ACTIONS
+        ):
+            continue
+        yield route_template(prefix + str(pattern.pattern)), pattern.name
+
+
+@skipUnless(settings.RUN_BENCHMARKS, "set RUN_BENCHMARKS=1 to run the benchmarks")
+# The documentation pages need collected static files with the manifest storage.
+@override_settings(
+    STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage"
+)
+class EndpointBenchmark(TestCase):
+    """
+    Requests every GET route as a seeded student and compares the query
+    count and p95 latency with benchmarks/budgets.json. Run with
+    BENCHMARK_UPDATE_BUDGETS=1 to record new budgets instead.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        # The cohort writes its generated drawings to storage.
+        media_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_settings = override_settings(MEDIA_ROOT=media_root)
+        media_settings.enable()
+        cls.addClassCleanup(media_settings.disable)
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = seed_dataset(settings.BENCHMARK_STUDENTS)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        response = self.client.post(
+            "/user/login/", {"email": self.data.user.email, "password": PASSWORD}
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"JWT {response.data['access']}")
+
+    def url(self, template, name):
+        kwargs = ROUTE_KWARGS[name](self.data) if name in ROUTE_KWARGS else {}
+        url = "/" + template
+        for key, value in kwargs.items():
+            url = url.replace(f"<{key}>", str(value))
+        self.assertNotIn("<", url, f"no URL arguments for {template} ({name})")
+        return url
+
+    def measure(self, url):
+        """The first (cold) request's queries and warm p50/p95 in ms."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        query_count = len(queries)
+        self.assertLess(response.status_code, 400, f"{url}: {response.status_code}")
+        timings = []
+        for _ in range(settings.BENCHMARK_ROUNDS):
+            start = time.perf_counter()
+            self.client.get(url)
+            timings.append((time.perf_counter() - start) * 1000)
+        return {
+            "queries": query_count,
+            "p50_ms": round(statistics.median(timings), 2),
+            "p95_ms": round(percentile(timings, 0.95), 2),
+        }
+
+    def test_endpoints_stay_within_budget(self):
+        results = {}
+        for template, name in get_routes():
+            # Nested routers repeat their parent's root URL; the first wins.
+            if template not in results:
+                results[template] = self.measure(self.url(template, name))
+        self.report(results)
+        if settings.BENCHMARK_UPDATE_BUDGETS:
+            self.save_budgets(results)
+            return
+        with open(settings.BENCHMARK_BUDGETS) as budgets_file:
+            budgets = json.load(budgets_file)
+        failures = []
+        for template, result in results.items():
+            budget = budgets.get(template)
+            if budget is None:
+                failures.append(f"{template}: no budget")
+                continue
+            if result["queries"] > budget["queries"]:
+                failures.append(
+                    f"{template}: {result['queries']} queries, "
+                    f"budget {budget['queries']}"
+                )
+            allowed = budget["p95_ms"] * settings.BENCHMARK_LATENCY_FACTOR
+            if result["p95_ms"] > allowed:
+                failures.append(
+                    f"{template}: p95 {result['p95_ms']}ms, budget {allowed:.2f}ms"
+                )
+        if failures:
+            self.fail("\n".join(["over budget:"] + failures))
+
+    def report(self, results):
+        width = max(len(template) for template in results)
+        lines = [f"{'route':<{width}}  queries   p50 ms   p95 ms"]
+        for template, result in sorted(results.items()):
+            lines.append(
+                f"{template:<{width}}  {result['queries']:>7}  "
+                f"{result['p50_ms']:>7.2f}  {result['p95_ms']:>7.2f}"
+            )
+        sys.stderr.write("\n" + "\n".join(lines) + "\n")
+
+    def save_budgets(self, results):
+        """
+        Query budgets are exact; latency budgets leave room for slower
+        machines and noise.
+        """
+        budgets = {
+            template: {
+                "queries": result["queries"],
+                "p95_ms": round(max(result["p95_ms"] * 3, 25), 1),
+            }
+            for template, result in sorted(results.items())
+        }
+        with open(settings.BENCHMARK_BUDGETS, "w") as budgets_file:
+            json.dump(budgets, budgets_file, indent=2)
+            budgets_file.write("\n")
+
+
+class LoadTestCommandTest(LiveServerTestCase):
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_settings = override_settings(MEDIA_ROOT=media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        generate_cohort(1, 4, seed=7, questions=3, images=1)
+        self.report_path = os.path.join(media_root, "report.json")
+
+    # The live server shares the in-memory SQLite connection between its
+    # threads, so a single virtual student keeps requests sequential.
+    def run_loadtest(self, *args):
+        out = StringIO()
+        call_command(
+            "loadtest",
+            self.live_server_url,
+            "--users=1",
+            "--ramp-up=0",
+            "--iterations=2",
+            "--polls=2",
+            "--poll-interval=0",
+            "--seed=7",
+            f"--json={self.report_path}",
+            *args,
+            stdout=out,
+        )
+        with open(self.report_path) as report_file:
+            return out.getvalue(), json.load(report_file)
+
+    def test_journey_is_replayed(self):
+        output, report = self.run_loadtest()
+
+        self.assertEqual(report["journeys"], 2)
+        self.assertEqual(
+            {step: stats["requests"] for step, stats in report["steps"].items()},
+            {"login": 2, "exam": 2, "submit": 2, "results": 4},
+        )
+        self.assertFalse(any(stats["errors"] for stats in report["steps"].values()))
+        self.assertIn("2 journeys", output)
+
+    def test_errors_are_reported(self):
+        output, report = self.run_loadtest("--password=wrong")
+
+        self.assertEqual(report["journeys"], 0)
+        self.assertEqual(report["steps"]["login"]["errors_by_status"], {"401": 2})
+        self.assertIn("errors: 401: 2", output)
+
+    def test_each_journey_uses_a_fresh_account(self):
+        under_review = User.objects.filter(status="student_review").count()
+        output, report = self.run_loadtest("--iterations=10")
+
+        self.assertEqual(report["journeys"], under_review)
+        self.assertTrue(report["accounts_exhausted"])
+        self.assertFalse(any(stats["errors"] for stats in report["steps"].values()))
+        self.assertIn(f"Stopped early: all {under_review} students", output)
+
+    def test_unexpected_errors_count_against_the_step(self):
+        with mock.patch(
+            "benchmarks.loadtest.StudentJourney.think", side_effect=KeyError("think")
+        ):
+            _, report = self.run_loadtest()
+
+        self.assertEqual(report["journeys"], 0)
+        self.assertEqual(report["steps"]["login"]["errors_by_status"], {"KeyError": 2})
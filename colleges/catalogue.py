@@ -0,0 +1,24 @@
+import hashlib
+from urllib.parse import urlencode
+
+from project.caching import bump_version, get_version
+
+NAMESPACE = "college-catalogue"
+
+# The query parameters that change a catalogue page; any others are ignored,
+# so made-up query strings cannot add cache entries.
+PAGE_PARAMS = ("cursor", "page_size")
+
+
+def catalogue_cache_key(request):
+    # Image fields render as absolute URLs, so the host is part of the key.
+    version = get_version(NAMESPACE, "all")
+    params = urlencode(
+        [(name, request.GET[name]) for name in PAGE_PARAMS if name in request.GET]
+    )
+    location = f"{request.scheme}://{request.get_host()}{request.path}?{params}"
+    return f"{NAMESPACE}:{version}:{hashlib.sha256(location.encode()).hexdigest()}"
+
+
+def invalidate_catalogue():
+    bump_version(NAMESPACE, "all")
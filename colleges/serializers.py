@@ -11,7 +11,9 @@ class CollegeDepartmentSerializer(serializers.ModelSerializer):
         fields = ["id", "name", "subtitle", "image", "college_name"]
 
     def get_college_name(self, obj):
-        return obj.colleges.first().name if obj.colleges.exists() else None
+        # Reads the prefetched colleges; the first one by pk names the department.
+        colleges = obj.colleges.all()
+        return min(colleges, key=lambda college: college.pk).name if colleges else None
 
 
 class CollegeSerializer(serializers.ModelSerializer):
@@ -0,0 +1,20 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from colleges.catalogue import invalidate_catalogue
+from colleges.models import College, CollegeDepartment
+
+
+@receiver(post_save, sender=College, dispatch_uid="college_catalogue")
+@receiver(post_delete, sender=College, dispatch_uid="college_catalogue_delete")
+@receiver(post_save, sender=CollegeDepartment, dispatch_uid="department_catalogue")
+@receiver(
+    post_delete, sender=CollegeDepartment, dispatch_uid="department_catalogue_delete"
+)
+@receiver(
+    m2m_changed,
+    sender=CollegeDepartment.colleges.through,
+    dispatch_uid="department_colleges_catalogue",
+)
+def college_catalogue(sender, **kwargs):
+    invalidate_catalogue()
@@ -1,4 +1,7 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
 
 from .models import College, CollegeDepartment
 
@@ -31,3 +34,65 @@ class CollegeDepartmentModelTest(TestCase):
         )
         department.colleges.add(college)
         self.assertEqual(list(department.colleges.all()), [college])
+
+
+class CollegeCatalogueTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="catalogue@example.com", name="Test User", password="testpass"
+            )
+        )
+        for index in range(3):
+            college = College.objects.create(name=f"College {index}", logo="logo.png")
+            for number in range(3):
+                department = CollegeDepartment.objects.create(
+                    name=f"Department {index}.{number}",
+                    subtitle="subtitle",
+                    image="image.jpg",
+                )
+                department.colleges.add(college)
+        self.college = college
+
+    def test_catalogue_queries_do_not_grow_with_departments(self):
+        with self.assertNumQueries(3):
+            response = self.client.get("/api/v1/colleges/")
+        self.assertEqual(response.status_code, 200)
+        departments = response.json()["results"][0]["departments"]
+        self.assertEqual(len(departments), 3)
+        self.assertEqual(departments[0]["college_name"], "College 0")
+
+    def test_catalogue_is_cached(self):
+        etag = self.client.get("/api/v1/colleges/")["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/v1/colleges/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_unknown_query_parameters_share_the_entry(self):
+        etag = self.client.get("/api/v1/colleges/")["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/v1/colleges/?made-up=1")
+        self.assertEqual(response["ETag"], etag)
+        self.assertNotEqual(
+            self.client.get("/api/v1/colleges/?page_size=1")["ETag"], etag
+        )
+
+    def test_catalogue_invalidated_on_changes(self):
+        url = f"/api/v1/colleges/{self.college.pk}/departments/"
+        self.assertEqual(len(self.client.get(url).json()["results"]), 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            department = CollegeDepartment.objects.create(
+                name="New", subtitle="subtitle", image="image.jpg"
+            )
+        self.assertEqual(len(self.client.get(url).json()["results"]), 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            department.colleges.add(self.college)
+        self.assertEqual(len(self.client.get(url).json()["results"]), 4)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.college.name = "Renamed"
+            self.college.save()
+        self.assertEqual(
+            self.client.get(url).json()["results"][0]["college_name"], "Renamed"
+        )
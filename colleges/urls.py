@@ -2,6 +2,7 @@ from rest_framework_nested.routers import DefaultRouter, NestedDefaultRouter
 
 from exams.views import (
     DigitalDrawingViewSet,
+    ExamBundleViewSet,
     HandDrawingViewSet,
     McqViewSet,
     PracticeDrawingViewSet,
@@ -25,4 +26,5 @@ college_router.register("hand-drawing", HandDrawingViewSet, basename="hand-exam"
 college_router.register(
     "practice-drawing", PracticeDrawingViewSet, basename="practic-exam"
 )
+college_router.register("exam-bundle", ExamBundleViewSet, basename="exam-bundle")
 urlpatterns = router.urls + college_router.urls
@@ -1,16 +1,71 @@
-from rest_framework import viewsets
+from django.conf import settings
+from django.db.models import Prefetch
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
 
+from notification.fanout import notify_college
+from notification.serializers import AnnouncementSerializer
+from project.caching import cached_json_response
+
+from .catalogue import catalogue_cache_key
 from .models import College, CollegeDepartment
 from .serializers import CollegeDepartmentSerializer, CollegeSerializer
 
 
-class CollegeViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = College.objects.all()
+class CachedCatalogueMixin:
+    """
+    Serve list and detail responses from the rendered catalogue cache, which
+    is dropped whenever a college, department or their links change.
+    """
+
+    def list(self, request, *args, **kwargs):
+        render = super().list
+        return cached_json_response(
+            request,
+            catalogue_cache_key(request),
+            lambda: render(request, *args, **kwargs).data,
+            settings.CATALOGUE_CACHE_TIMEOUT,
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        render = super().retrieve
+        return cached_json_response(
+            request,
+            catalogue_cache_key(request),
+            lambda: render(request, *args, **kwargs).data,
+            settings.CATALOGUE_CACHE_TIMEOUT,
+        )
+
+
+class CollegeViewSet(CachedCatalogueMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = College.objects.prefetch_related(
+        Prefetch(
+            "departments",
+            queryset=CollegeDepartment.objects.prefetch_related("colleges"),
+        )
+    )
     serializer_class = CollegeSerializer
 
+    @action(
+        detail=True,
+        methods=["post"],
+        permission_classes=[IsAdminUser],
+        serializer_class=AnnouncementSerializer,
+    )
+    def announce(self, request, pk=None):
+        college = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        sent = notify_college(college, **serializer.validated_data)
+        return Response({"sent": sent}, status=status.HTTP_201_CREATED)
+
 
-class CollegeDepartmentViewSet(viewsets.ReadOnlyModelViewSet):
+class CollegeDepartmentViewSet(CachedCatalogueMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = CollegeDepartmentSerializer
 
     def get_queryset(self):
-        return CollegeDepartment.objects.filter(colleges=self.kwargs["colleges_pk"])
+        return CollegeDepartment.objects.filter(
+            colleges=self.kwargs["colleges_pk"]
+        ).prefetch_related("colleges")
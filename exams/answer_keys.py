@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from project.caching import bump_version, get_version
+
+from .models import MCQExam
+
+NAMESPACE = "mcq-answer-key"
+
+# college id -> (version, {question id: answer}) for this process.
+_answer_keys = {}
+
+
+def get_answer_key(college_id):
+    """
+    Return ``{question id: correct answer}`` for every MCQ of a college.
+
+    The map is kept in process memory and in the shared cache, and is
+    reloaded only after an MCQExam of the college changes.
+    """
+    version = get_version(NAMESPACE, college_id)
+    local = _answer_keys.get(college_id)
+    if local is not None and local[0] == version:
+        return local[1]
+    cache_key = f"{NAMESPACE}:{college_id}:{version}"
+    answer_key = cache.get(cache_key)
+    if answer_key is None:
+        answer_key = dict(
+            MCQExam.objects.filter(college_id=college_id).values_list("pk", "answer")
+        )
+        cache.set(cache_key, answer_key, settings.ANSWER_KEY_CACHE_TIMEOUT)
+    _answer_keys[college_id] = (version, answer_key)
+    return answer_key
+
+
+def invalidate_answer_key(college_id):
+    bump_version(NAMESPACE, college_id)
+    transaction.on_commit(lambda: _answer_keys.pop(college_id, None))
@@ -0,0 +1,37 @@
+from django.core.cache import cache
+
+from project.caching import bump_version, drop_version, get_version, version_key
+
+from .models import DigitalDrawingExam, HandDrawingExam, MCQExam, PracticeDrawingExam
+from .serializers import ExamBundleSerializer
+
+NAMESPACE = "exam-bundle"
+
+
+def bundle_cache_key(college_id):
+    return f"{NAMESPACE}:{college_id}:{get_version(NAMESPACE, college_id)}"
+
+
+def has_bundle_version(college_id):
+    return cache.get(version_key(NAMESPACE, college_id)) is not None
+
+
+def build_bundle(college_id):
+    return ExamBundleSerializer(
+        {
+            "mcq": MCQExam.objects.filter(college_id=college_id),
+            "digital_drawing": DigitalDrawingExam.objects.filter(college_id=college_id),
+            "hand_drawing": HandDrawingExam.objects.filter(college_id=college_id),
+            "practice_drawing": PracticeDrawingExam.objects.filter(
+                college_id=college_id
+            ),
+        }
+    ).data
+
+
+def invalidate_bundle(college_id):
+    bump_version(NAMESPACE, college_id)
+
+
+def forget_bundle(college_id):
+    drop_version(NAMESPACE, college_id)
@@ -0,0 +1,44 @@
+import random
+
+from django.conf import settings
+
+from project.caching import bump_version, get_version
+
+from .models import MCQExam
+
+NAMESPACE = "mcq-form"
+
+
+def form_cache_key(college_id, student_id):
+    version = get_version(NAMESPACE, college_id)
+    return f"{NAMESPACE}:{college_id}:{version}:{student_id}"
+
+
+def build_mcq_form(college_id, student_id):
+    """
+    Return the college's MCQ questions without their answers, with question
+    and option order shuffled deterministically for the student.
+    """
+    rng = random.Random(f"{student_id}:{settings.MCQ_FORM_SEED}")
+    questions = list(
+        MCQExam.objects.filter(college_id=college_id)
+        .order_by("pk")
+        .values("id", "question", "option1", "option2", "option3")
+    )
+    rng.shuffle(questions)
+    form = []
+    for question in questions:
+        options = [
+            question[field]
+            for field in ("option1", "option2", "option3")
+            if question[field]
+        ]
+        rng.shuffle(options)
+        form.append(
+            {"id": question["id"], "question": question["question"], "options": options}
+        )
+    return form
+
+
+def invalidate_mcq_forms(college_id):
+    bump_version(NAMESPACE, college_id)
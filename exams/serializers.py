@@ -8,7 +8,7 @@ from .models import DigitalDrawingExam, HandDrawingExam, MCQExam, PracticeDrawin
 class McqExamSerializer(serializers.ModelSerializer):
     class Meta:
         model = MCQExam
-        fields = "__all__"
+        exclude = ["answer"]
 
 
 class DigitalDrawingExamSerializer(serializers.ModelSerializer):
@@ -33,3 +33,10 @@ class CollegeSerializer(serializers.ModelSerializer):
     class Meta:
         model = College
         fields = ["id", "name"]
+
+
+class ExamBundleSerializer(serializers.Serializer):
+    mcq = McqExamSerializer(many=True)
+    digital_drawing = DigitalDrawingExamSerializer(many=True)
+    hand_drawing = HandDrawingExamSerializer(many=True)
+    practice_drawing = PracticeDrawingExamSerializer(many=True)
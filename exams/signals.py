@@ -0,0 +1,63 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from colleges.models import College
+from exams.answer_keys import invalidate_answer_key
+from exams.bundles import forget_bundle, invalidate_bundle
+from exams.models import (
+    DigitalDrawingExam,
+    HandDrawingExam,
+    MCQExam,
+    PracticeDrawingExam,
+)
+from exams.papers import invalidate_mcq_forms
+
+EXAM_MODELS = (MCQExam, DigitalDrawingExam, HandDrawingExam, PracticeDrawingExam)
+
+
+def affected_colleges(instance):
+    # A question moved to another college must leave the old college's caches.
+    previous = getattr(instance, "_previous_college_id", None)
+    if previous and previous != instance.college_id:
+        return [instance.college_id, previous]
+    return [instance.college_id]
+
+
+def exam_previous_college(sender, instance, **kwargs):
+    instance._previous_college_id = (
+        sender.objects.filter(pk=instance.pk)
+        .values_list("college_id", flat=True)
+        .first()
+        if instance.pk
+        else None
+    )
+
+
+def exam_bundle(sender, instance, **kwargs):
+    for college_id in affected_colleges(instance):
+        invalidate_bundle(college_id)
+
+
+for model in EXAM_MODELS:
+    label = model._meta.model_name
+    pre_save.connect(
+        exam_previous_college, sender=model, dispatch_uid=f"{label}_previous_college"
+    )
+    post_save.connect(exam_bundle, sender=model, dispatch_uid=f"{label}_bundle")
+    post_delete.connect(
+        exam_bundle, sender=model, dispatch_uid=f"{label}_bundle_delete"
+    )
+
+
+@receiver(post_save, sender=MCQExam, dispatch_uid="mcq_answer_key")
+@receiver(post_delete, sender=MCQExam, dispatch_uid="mcq_answer_key_delete")
+def mcq_answer_key_and_forms(sender, instance, **kwargs):
+    for college_id in affected_colleges(instance):
+        invalidate_answer_key(college_id)
+        invalidate_mcq_forms(college_id)
+
+
+@receiver(post_delete, sender=College, dispatch_uid="college_bundle_delete")
+def college_bundle_delete(sender, instance, **kwargs):
+    # Deleted colleges answer 404 again instead of an empty bundle.
+    forget_bundle(instance.pk)
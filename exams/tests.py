@@ -1,12 +1,19 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
 
 from colleges.models import College
+from exams.answer_keys import _answer_keys, get_answer_key
+from exams.bundles import NAMESPACE
 from exams.models import (
     DigitalDrawingExam,
     HandDrawingExam,
     MCQExam,
     PracticeDrawingExam,
 )
+from project.caching import require_shared_cache, version_key
 
 
 class ExamModelTestCase(TestCase):
@@ -49,3 +56,163 @@ class ExamModelTestCase(TestCase):
             college=self.college,
         )
         self.assertEqual(str(exam), "Draw a circle")
+
+
+class AnswerKeyCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.college = College.objects.create(
+            name="Test College", logo="test_logo.png", payment_code="test123"
+        )
+        self.other = College.objects.create(
+            name="Other College", logo="test_logo.png", payment_code="test456"
+        )
+        self.exam = MCQExam.objects.create(
+            question="What is 2+2?",
+            option1="1",
+            option2="2",
+            option3="4",
+            answer="4",
+            college=self.college,
+        )
+
+    def test_answer_key_is_cached(self):
+        self.assertEqual(get_answer_key(self.college.pk), {self.exam.pk: "4"})
+        with self.assertNumQueries(0):
+            self.assertEqual(get_answer_key(self.college.pk), {self.exam.pk: "4"})
+
+    def test_answer_key_shared_cache(self):
+        get_answer_key(self.college.pk)
+        _answer_keys.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_answer_key(self.college.pk), {self.exam.pk: "4"})
+
+    def test_answer_key_invalidated_on_save(self):
+        get_answer_key(self.college.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.exam.answer = "2"
+            self.exam.save()
+        self.assertEqual(get_answer_key(self.college.pk), {self.exam.pk: "2"})
+
+    def test_answer_key_kept_until_commit(self):
+        get_answer_key(self.college.pk)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.exam.answer = "2"
+            self.exam.save()
+            # A concurrent reader would still see the committed "4" here, so
+            # the version must not move yet.
+            self.assertEqual(get_answer_key(self.college.pk), {self.exam.pk: "4"})
+        for callback in callbacks:
+            callback()
+        self.assertEqual(get_answer_key(self.college.pk), {self.exam.pk: "2"})
+
+    def test_answer_key_invalidated_on_delete(self):
+        get_answer_key(self.college.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.exam.delete()
+        self.assertEqual(get_answer_key(self.college.pk), {})
+
+    def test_answer_key_invalidated_on_move(self):
+        get_answer_key(self.college.pk)
+        get_answer_key(self.other.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.exam.college = self.other
+            self.exam.save()
+        self.assertEqual(get_answer_key(self.college.pk), {})
+        self.assertEqual(get_answer_key(self.other.pk), {self.exam.pk: "4"})
+
+
+class SharedCacheTestCase(TestCase):
+    def test_process_local_cache_is_refused(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, "LocMemCache"):
+            require_shared_cache("several workers")
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": "/tmp/artech-cache",
+            }
+        }
+    )
+    def test_shared_cache_is_accepted(self):
+        require_shared_cache("several workers")
+
+
+class ExamBundleTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.college = College.objects.create(
+            name="Test College", logo="test_logo.png", payment_code="test123"
+        )
+        self.mcq = MCQExam.objects.create(
+            question="What is 2+2?", option1="4", answer="4", college=self.college
+        )
+        self.drawing = DigitalDrawingExam.objects.create(
+            question="Draw a cat", task_description="A cat", college=self.college
+        )
+        self.user = get_user_model().objects.create_user(
+            email="bundle@example.com", name="Test User", password="testpass"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f"/api/v1/colleges/{self.college.pk}/exam-bundle/"
+
+    def test_bundle_contains_all_sections(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        bundle = response.json()
+        self.assertEqual([item["id"] for item in bundle["mcq"]], [self.mcq.pk])
+        self.assertEqual(
+            [item["id"] for item in bundle["digital_drawing"]], [self.drawing.pk]
+        )
+        self.assertEqual(bundle["hand_drawing"], [])
+        self.assertEqual(bundle["practice_drawing"], [])
+
+    def test_bundle_is_served_from_cache(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_unknown_college_is_not_found(self):
+        cache.clear()
+        response = self.client.get("/api/v1/colleges/999999/exam-bundle/")
+        self.assertEqual(response.status_code, 404)
+        self.assertIsNone(cache.get(version_key(NAMESPACE, 999999)))
+
+    def test_college_id_spellings_share_the_bundle(self):
+        self.client.get(f"/api/v1/colleges/0{self.college.pk}/exam-bundle/")
+        with self.captureOnCommitCallbacks(execute=True):
+            HandDrawingExam.objects.create(
+                question="Draw a hand", task_description="A hand", college=self.college
+            )
+        response = self.client.get(f"/api/v1/colleges/0{self.college.pk}/exam-bundle/")
+        self.assertEqual(len(response.json()["hand_drawing"]), 1)
+
+    def test_non_numeric_college_is_not_found(self):
+        response = self.client.get("/api/v1/colleges/abc/exam-bundle/")
+        self.assertEqual(response.status_code, 404)
+
+    def test_deleted_college_is_not_found(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.college.delete()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_bundle_not_modified(self):
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_bundle_rebuilt_on_exam_change(self):
+        etag = self.client.get(self.url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            HandDrawingExam.objects.create(
+                question="Draw a hand", task_description="A hand", college=self.college
+            )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(len(response.json()["hand_drawing"]), 1)
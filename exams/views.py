@@ -1,11 +1,17 @@
+from django.conf import settings
+from django.http import Http404
+from django.shortcuts import get_object_or_404
 from rest_framework import viewsets
 
 from colleges.models import College
 from colleges.serializers import CollegeSerializer
+from project.caching import cached_json_response
 
+from .bundles import build_bundle, bundle_cache_key, has_bundle_version
 from .models import DigitalDrawingExam, HandDrawingExam, MCQExam, PracticeDrawingExam
 from .serializers import (
     DigitalDrawingExamSerializer,
+    ExamBundleSerializer,
     HandDrawingExamSerializer,
     McqExamSerializer,
     PracticeDrawingExamSerializer,
@@ -44,6 +50,32 @@ class PracticeDrawingViewSet(viewsets.ReadOnlyModelViewSet):
         return PracticeDrawingExam.objects.filter(college_id=college_id)
 
 
+class ExamBundleViewSet(viewsets.GenericViewSet):
+    """
+    All four exam sections of a college in one response, served from a
+    pre-rendered cache entry with a strong ETag.
+    """
+
+    serializer_class = ExamBundleSerializer
+
+    def list(self, request, colleges_pk=None):
+        # One cache key per college whatever the spelling of the id ("01").
+        try:
+            colleges_pk = int(colleges_pk)
+        except (TypeError, ValueError):
+            raise Http404
+        # Only colleges found to exist get a bundle version, so this lookup
+        # runs once per college and unknown ids leave nothing in the cache.
+        if not has_bundle_version(colleges_pk):
+            get_object_or_404(College.objects.only("pk"), pk=colleges_pk)
+        return cached_json_response(
+            request,
+            bundle_cache_key(colleges_pk),
+            lambda: build_bundle(colleges_pk),
+            settings.EXAM_BUNDLE_CACHE_TIMEOUT,
+        )
+
+
 class CollegeViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = CollegeSerializer
 
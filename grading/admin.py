@@ -0,0 +1,15 @@
+from django.contrib import admin
+
+from .models import GradingJob, GradingResult
+
+
+@admin.register(GradingJob)
+class GradingJobAdmin(admin.ModelAdmin):
+    list_display = ("kind", "answer_id", "status", "attempts", "available_at")
+    list_filter = ("kind", "status")
+
+
+@admin.register(GradingResult)
+class GradingResultAdmin(admin.ModelAdmin):
+    list_display = ("content_hash", "model_version", "score", "created_at")
+    list_filter = ("model_version",)
@@ -0,0 +1,105 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from functools import lru_cache
+
+from django.conf import settings
+
+from .engine import GradingEngine, get_model
+from .kinds import kind_for
+from .models import GradingJob
+
+
+class MicroBatcher:
+    """
+    Collects images submitted by concurrent callers for up to ``max_wait_ms``
+    or ``max_batch_size`` images and runs them through ``predict`` as one
+    batch, handing each caller its own score.
+
+    ``predict`` has the model signature, so a batcher can stand in for the
+    model anywhere, including ``GradingEngine(model=...)``.
+    """
+
+    def __init__(self, predict, max_batch_size, max_wait_ms, timeout=None):
+        self._predict = predict
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.timeout = timeout
+        self.requests = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def submit(self, image):
+        self.start()
+        future = Future()
+        self.requests.put((image, future))
+        return future
+
+    def predict(self, images):
+        futures = [self.submit(image) for image in images]
+        return [future.result(self.timeout) for future in futures]
+
+    def start(self):
+        # Started lazily so that no thread exists before gunicorn forks.
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(
+                    target=self.run, name="grading-batcher", daemon=True
+                )
+                self.thread.start()
+
+    def run(self):
+        while True:
+            batch = [self.requests.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self.run_batch(batch)
+
+    def run_batch(self, batch):
+        batch = [
+            (image, future)
+            for image, future in batch
+            if future.set_running_or_notify_cancel()
+        ]
+        if not batch:
+            return
+        try:
+            scores = self._predict([image for image, _ in batch])
+        except Exception as exc:
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+        for (_, future), score in zip(batch, scores):
+            future.set_result(score)
+
+
+@lru_cache(maxsize=None)
+def get_batcher():
+    return MicroBatcher(
+        get_model().predict,
+        settings.GRADING_MICROBATCH_SIZE,
+        settings.GRADING_MICROBATCH_WAIT_MS,
+        timeout=settings.GRADING_MICROBATCH_TIMEOUT,
+    )
+
+
+def grade_now(answer):
+    """
+    Grade a single answer inside the request, sharing forward passes with
+    every other request being graded at the same moment.
+    """
+    kind = kind_for(answer)
+    graded, _ = GradingEngine(model=get_batcher()).grade(kind, [answer])
+    if graded:
+        GradingJob.objects.filter(
+            kind=kind.name, answer_id=answer.pk, status="pending"
+        ).update(status="done")
+    return bool(graded)
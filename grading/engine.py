@@ -0,0 +1,230 @@
+import hashlib
+import logging
+from collections import defaultdict
+from functools import lru_cache
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from notification.fanout import create_notifications, user_notification
+from students.admission import refresh_admission
+from students.models import Student, StudentResults
+
+from .kinds import ANSWER_KINDS
+from .models import GradingResult
+
+logger = logging.getLogger(__name__)
+
+
+class TorchScriptModel:
+    """
+    CPU wrapper around a TorchScript export of the grading network.
+
+    The network takes a float batch of shape (N, 3, size, size) scaled to
+    [0, 1] and returns one score per image.
+    """
+
+    def __init__(self, path, image_size, threads=0):
+        import numpy
+        import torch
+
+        if threads:
+            torch.set_num_threads(threads)
+        self.numpy = numpy
+        self.torch = torch
+        self.image_size = image_size
+        self.module = torch.jit.load(path, map_location="cpu").eval()
+
+    def preprocess(self, image):
+        image = image.convert("RGB").resize((self.image_size, self.image_size))
+        array = self.numpy.asarray(image, dtype=self.numpy.float32) / 255.0
+        return array.transpose(2, 0, 1)
+
+    def predict(self, images):
+        batch = self.torch.from_numpy(
+            self.numpy.stack([self.preprocess(image) for image in images])
+        )
+        with self.torch.inference_mode():
+            output = self.module(batch)
+        return output.reshape(len(images), -1)[:, 0].tolist()
+
+
+@lru_cache(maxsize=None)
+def get_model():
+    if not settings.GRADING_MODEL_PATH:
+        raise ImproperlyConfigured("GRADING_MODEL_PATH must point to the model.")
+    return TorchScriptModel(
+        settings.GRADING_MODEL_PATH,
+        settings.GRADING_IMAGE_SIZE,
+        settings.GRADING_TORCH_THREADS,
+    )
+
+
+class GradingEngine:
+    """
+    Scores drawing answers in batches: one forward pass per batch and one
+    bulk update per batch, never a save() per answer.
+    """
+
+    def __init__(self, model=None, batch_size=None, model_version=None):
+        self.model = model or get_model()
+        self.batch_size = batch_size or settings.GRADING_BATCH_SIZE
+        self.model_version = model_version or settings.GRADING_MODEL_VERSION
+
+    def grade_pending(self, limit=None):
+        graded = 0
+        for kind in ANSWER_KINDS.values():
+            pending = kind.model.objects.filter(graded_at__isnull=True).order_by("pk")
+            last_pk = 0
+            while limit is None or graded < limit:
+                size = self.batch_size
+                if limit is not None:
+                    size = min(size, limit - graded)
+                answers = list(pending.filter(pk__gt=last_pk)[:size])
+                if not answers:
+                    break
+                last_pk = answers[-1].pk
+                done, _ = self.grade(kind, answers)
+                graded += len(done)
+        return graded
+
+    def grade(self, kind, answers):
+        """
+        Grade ``answers`` (rows of ``kind.model``) and return the graded rows
+        together with a ``{pk: error}`` mapping of the ones that failed.
+
+        Scores are cached per (model version, image hash), so duplicate and
+        resubmitted images are only run through the model once.
+        """
+        graded, failed = [], {}
+        for start in range(0, len(answers), self.batch_size):
+            chunk = answers[start : start + self.batch_size]
+            loaded = {
+                answer.pk: (answer.answer.name, answer.content_hash) for answer in chunk
+            }
+            scores = self.cached_scores(
+                {answer.content_hash for answer in chunk if answer.content_hash}
+            )
+            batch, images = [], {}
+            for answer in chunk:
+                if answer.content_hash not in scores:
+                    try:
+                        image, answer.content_hash = self.load_image(answer.answer)
+                    except (OSError, ValueError) as exc:
+                        logger.warning("Cannot read answer %s: %s", answer.answer, exc)
+                        failed[answer.pk] = str(exc)
+                        continue
+                    images.setdefault(answer.content_hash, image)
+                batch.append(answer)
+            # Rows stored before hashing existed are only hashed on load.
+            scores.update(self.cached_scores(images.keys() - scores.keys()))
+            scores.update(
+                self.infer({h: image for h, image in images.items() if h not in scores})
+            )
+            if not batch:
+                continue
+            graded_at = timezone.now()
+            for answer in batch:
+                answer.score = scores[answer.content_hash]
+                answer.graded_at = graded_at
+            graded.extend(self.save(kind, batch, loaded))
+        return graded, failed
+
+    def cached_scores(self, hashes):
+        return dict(
+            GradingResult.objects.filter(
+                model_version=self.model_version, content_hash__in=hashes
+            ).values_list("content_hash", "score")
+        )
+
+    def infer(self, images):
+        """Run ``{hash: image}`` through the model and cache the scores."""
+        hashes = list(images)
+        if not hashes:
+            return {}
+        predictions = self.model.predict([images[h] for h in hashes])
+        scores = {h: self.clamp(score) for h, score in zip(hashes, predictions)}
+        GradingResult.objects.bulk_create(
+            [
+                GradingResult(
+                    model_version=self.model_version, content_hash=h, score=score
+                )
+                for h, score in scores.items()
+            ],
+            ignore_conflicts=True,
+        )
+        return scores
+
+    def load_image(self, field_file):
+        with field_file.open("rb") as image_file:
+            data = image_file.read()
+        image = Image.open(BytesIO(data))
+        image.load()
+        return image, hashlib.sha256(data).hexdigest()
+
+    def clamp(self, score):
+        return max(0, min(settings.GRADING_MAX_SCORE, round(score)))
+
+    def save(self, kind, answers, loaded):
+        """
+        Store the scores of ``answers`` and return the rows saved. Rows whose
+        file or hash no longer match ``loaded``, the values they were graded
+        from, were resubmitted meanwhile and are left to their new job.
+        """
+        deltas = defaultdict(int)
+        with transaction.atomic():
+            # Differences against the locked rows, not the scores loaded for
+            # grading, so answers graded twice at once are counted once.
+            stored = kind.model.locked_scores(
+                [answer.pk for answer in answers], "answer", "content_hash"
+            )
+            answers = [
+                answer
+                for answer in answers
+                if answer.pk in stored
+                and (stored[answer.pk]["answer"], stored[answer.pk]["content_hash"])
+                == loaded[answer.pk]
+            ]
+            for answer in answers:
+                deltas[answer.student_id] += answer.score - stored[answer.pk]["score"]
+            kind.model.objects.bulk_update(
+                answers, ["score", "graded_at", "content_hash"]
+            )
+            StudentResults.objects.increment_many(kind.result_field, deltas)
+            refresh_admission([sid for sid, delta in deltas.items() if delta])
+            self.announce(kind, answers)
+        for answer in answers:
+            answer._saved_score = answer.score
+        return answers
+
+    def announce(self, kind, answers):
+        """
+        Notify each student that their drawing was graded; the notification
+        stream relays these to connected clients.
+        """
+        users = dict(
+            Student.objects.filter(
+                pk__in={answer.student_id for answer in answers}
+            ).values_list("pk", "user_id")
+        )
+        create_notifications(
+            [
+                user_notification(
+                    users[answer.student_id],
+                    verb="تم تصحيح إجابتك",
+                    description=f"درجتك {answer.score}",
+                    level="success",
+                    data={
+                        "event": "graded",
+                        "kind": kind.name,
+                        "answer": answer.pk,
+                        "score": answer.score,
+                    },
+                )
+                for answer in answers
+            ]
+        )
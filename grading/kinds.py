@@ -0,0 +1,22 @@
+from collections import namedtuple
+
+from students.models import (
+    DigitalDrawingAnswer,
+    HandDrawingAnswer,
+    PracticeDrawingAnswer,
+)
+
+AnswerKind = namedtuple("AnswerKind", ["name", "model", "result_field"])
+
+ANSWER_KINDS = {
+    "hand": AnswerKind("hand", HandDrawingAnswer, "hand_drawing_result"),
+    "digital": AnswerKind("digital", DigitalDrawingAnswer, "digital_art_result"),
+    "practice": AnswerKind("practice", PracticeDrawingAnswer, "trial_result"),
+}
+
+
+def kind_for(answer):
+    for kind in ANSWER_KINDS.values():
+        if isinstance(answer, kind.model):
+            return kind
+    raise ValueError(f"{type(answer).__name__} is not a drawing answer")
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from grading.engine import GradingEngine
+
+
+class Command(BaseCommand):
+    help = "Grade every drawing answer that has not been graded yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.GRADING_BATCH_SIZE
+        )
+        parser.add_argument("--limit", type=int, default=None)
+
+    def handle(self, *args, **options):
+        engine = GradingEngine(batch_size=options["batch_size"])
+        graded = engine.grade_pending(limit=options["limit"])
+        self.stdout.write(self.style.SUCCESS(f"Graded {graded} answers."))
@@ -0,0 +1,49 @@
+import multiprocessing
+import signal
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from grading.worker import run_worker
+from project.caching import require_shared_cache
+
+
+class Command(BaseCommand):
+    help = "Run a pool of worker processes that grade queued drawing answers."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes", type=int, default=settings.GRADING_WORKER_PROCESSES
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.GRADING_BATCH_SIZE
+        )
+        parser.add_argument("--poll-interval", type=float, default=1.0)
+
+    def handle(self, *args, **options):
+        if not settings.GRADING_MODEL_PATH:
+            raise CommandError("GRADING_MODEL_PATH must point to the model.")
+        # Grades move students between statuses; the web processes only stop
+        # trusting the old JWT claims if they see the invalidation.
+        try:
+            require_shared_cache("grade_worker invalidates cached user claims")
+        except ImproperlyConfigured as exc:
+            raise CommandError(exc)
+        stop = multiprocessing.Event()
+        workers = [
+            multiprocessing.Process(
+                target=run_worker,
+                args=(stop, options["batch_size"], options["poll_interval"]),
+                daemon=True,
+            )
+            for _ in range(options["processes"])
+        ]
+        for worker in workers:
+            worker.start()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+        signal.signal(signal.SIGINT, lambda signum, frame: stop.set())
+        self.stdout.write(f"Started {len(workers)} grading workers.")
+        for worker in workers:
+            worker.join()
+        self.stdout.write(self.style.SUCCESS("Grading workers stopped."))
@@ -0,0 +1,75 @@
+# Generated by Django 3.2 on 2026-10-18 07:30
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="GradingJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("hand", "Hand"),
+                            ("digital", "Digital"),
+                            ("practice", "Practice"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("answer_id", models.BigIntegerField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("running", "Running"),
+                            ("done", "Done"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                    ),
+                ),
+                ("attempts", models.IntegerField(default=0)),
+                (
+                    "available_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("locked_by", models.CharField(blank=True, max_length=100)),
+                ("locked_at", models.DateTimeField(blank=True, null=True)),
+                ("last_error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name_plural": "Grading Jobs",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="gradingjob",
+            index=models.Index(
+                fields=["status", "available_at"], name="grading_gra_status_811103_idx"
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="gradingjob",
+            unique_together={("kind", "answer_id")},
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 3.2 on 2026-10-18 07:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grading', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GradingResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_version', models.CharField(max_length=50)),
+                ('content_hash', models.CharField(max_length=64)),
+                ('score', models.IntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Grading Results',
+                'unique_together': {('model_version', 'content_hash')},
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+from django.db import models
+from django.utils import timezone
+
+from .kinds import ANSWER_KINDS
+
+
+class GradingJob(models.Model):
+    STATUS_CHOICES = (
+        ("pending", "Pending"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    )
+    KIND_CHOICES = tuple((name, name.title()) for name in ANSWER_KINDS)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    answer_id = models.BigIntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    attempts = models.IntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Grading Jobs"
+        unique_together = ("kind", "answer_id")
+        indexes = [models.Index(fields=["status", "available_at"])]
+
+    def __str__(self):
+        return f"{self.kind} answer {self.answer_id} ({self.status})"
+
+
+class GradingResult(models.Model):
+    model_version = models.CharField(max_length=50)
+    content_hash = models.CharField(max_length=64)
+    score = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = "Grading Results"
+        unique_together = ("model_version", "content_hash")
+
+    def __str__(self):
+        return f"{self.content_hash} ({self.model_version}): {self.score}"
@@ -0,0 +1,72 @@
+import logging
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils import timezone
+
+from project import leases
+
+from .kinds import ANSWER_KINDS, kind_for
+from .models import GradingJob
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(answer):
+    GradingJob.objects.update_or_create(
+        kind=kind_for(answer).name,
+        answer_id=answer.pk,
+        defaults={
+            "status": "pending",
+            "attempts": 0,
+            "available_at": timezone.now(),
+            "locked_by": "",
+            "locked_at": None,
+            "last_error": "",
+        },
+    )
+
+
+def claim(worker_id, batch_size):
+    """Lock up to ``batch_size`` ready jobs for ``worker_id``."""
+    return leases.claim(
+        GradingJob, worker_id, batch_size, "running", settings.GRADING_JOB_LEASE
+    )
+
+
+def process(jobs, engine):
+    by_kind = defaultdict(list)
+    for job in jobs:
+        by_kind[job.kind].append(job)
+    for name, kind_jobs in by_kind.items():
+        kind = ANSWER_KINDS[name]
+        answers = kind.model.objects.in_bulk([job.answer_id for job in kind_jobs])
+        try:
+            _, failed = engine.grade(kind, list(answers.values()))
+        except Exception as exc:
+            logger.exception("Grading batch of %s answers failed", name)
+            failed = {answer_id: repr(exc) for answer_id in answers}
+        done = [job for job in kind_jobs if job.answer_id not in failed]
+        retry = [job for job in kind_jobs if job.answer_id in failed]
+        finish(done)
+        reschedule(retry, failed)
+
+
+def finish(jobs):
+    # A job re-enqueued by a resubmission while it ran is pending again and
+    # keeps its new run.
+    GradingJob.objects.filter(
+        pk__in=[job.pk for job in jobs],
+        status="running",
+        locked_by__in={job.locked_by for job in jobs},
+    ).update(status="done", locked_by="", locked_at=None, last_error="")
+
+
+def reschedule(jobs, errors):
+    leases.reschedule(
+        GradingJob,
+        jobs,
+        {job.pk: errors[job.answer_id] for job in jobs},
+        settings.GRADING_MAX_ATTEMPTS,
+        settings.GRADING_RETRY_DELAY,
+    )
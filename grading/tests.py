@@ -0,0 +1,389 @@
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import BytesIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from notifications.models import Notification
+from PIL import Image
+from rest_framework.test import APIClient
+
+from colleges.models import College
+from exams.models import HandDrawingExam
+from notification.models import NotificationCounter
+from students.models import HandDrawingAnswer, Student, StudentResults
+
+from .batcher import MicroBatcher
+from .engine import GradingEngine
+from .kinds import ANSWER_KINDS
+from .models import GradingJob, GradingResult
+from .queue import claim, enqueue, process
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_image(name="answer.png", colour=(255, 255, 255)):
+    buffer = BytesIO()
+    Image.new("RGB", (8, 8), colour).save(buffer, format="PNG")
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+
+class FakeModel:
+    def __init__(self, score=42):
+        self.score = score
+        self.batches = []
+
+    def predict(self, images):
+        self.batches.append(len(images))
+        return [self.score] * len(images)
+
+
+class SlowModel(FakeModel):
+    def predict(self, images):
+        time.sleep(0.2)
+        return super().predict(images)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class GradingTestCase(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.college = College.objects.create(name="Test College", payment_code="1")
+        self.exam = HandDrawingExam.objects.create(
+            question="Draw a face", task_description="Pencil", college=self.college
+        )
+        self.students = []
+        for index in range(3):
+            user = User.objects.create_user(
+                email=f"student{index}@example.com", name="Student", password="pass"
+            )
+            self.students.append(
+                Student.objects.create(
+                    user=user,
+                    full_name=f"Student {index}",
+                    student_photo=f"student/{index}.jpg",
+                    national_id=f"{index:014d}",
+                    seat_number=index,
+                    total=90,
+                    division="1",
+                    phone_number=f"0100{index}",
+                    college=self.college,
+                )
+            )
+
+    def create_answer(self, student, image=None):
+        return HandDrawingAnswer.objects.create(
+            student=student, hand_draw=self.exam, answer=image or make_image()
+        )
+
+
+class GradingEngineTestCase(GradingTestCase):
+    def test_grade_pending_scores_in_batches(self):
+        for index, student in enumerate(self.students):
+            self.create_answer(student, make_image(colour=(index, 0, 0)))
+        model = FakeModel(score=42.4)
+
+        graded = GradingEngine(model=model, batch_size=2).grade_pending()
+
+        self.assertEqual(graded, 3)
+        self.assertEqual(model.batches, [2, 1])
+        self.assertFalse(HandDrawingAnswer.objects.filter(graded_at=None).exists())
+        self.assertEqual(
+            set(HandDrawingAnswer.objects.values_list("score", flat=True)), {42}
+        )
+        self.assertEqual(
+            StudentResults.objects.get(user=self.students[0]).hand_drawing_result, 42
+        )
+
+    def test_graded_students_are_notified(self):
+        answer = self.create_answer(self.students[0])
+
+        GradingEngine(model=FakeModel(score=7)).grade_pending()
+
+        notification = Notification.objects.get(
+            recipient=self.students[0].user, verb="تم تصحيح إجابتك"
+        )
+        self.assertEqual(
+            notification.data,
+            {"event": "graded", "kind": "hand", "answer": answer.pk, "score": 7},
+        )
+        counter = NotificationCounter.objects.get(user=self.students[0].user)
+        self.assertEqual(
+            counter.total,
+            Notification.objects.filter(recipient=self.students[0].user).count(),
+        )
+
+    def test_grade_skips_unreadable_images(self):
+        good = self.create_answer(self.students[0])
+        bad = self.create_answer(
+            self.students[1], SimpleUploadedFile("broken.png", b"not an image")
+        )
+
+        with self.assertLogs("grading.engine", "WARNING"):
+            graded, failed = GradingEngine(model=FakeModel()).grade(
+                ANSWER_KINDS["hand"], [good, bad]
+            )
+
+        self.assertEqual(graded, [good])
+        self.assertIn(bad.pk, failed)
+        bad.refresh_from_db()
+        self.assertIsNone(bad.graded_at)
+
+    def test_answer_graded_twice_at_once_is_counted_once(self):
+        answer = self.create_answer(self.students[0])
+        first = HandDrawingAnswer.objects.get(pk=answer.pk)
+        second = HandDrawingAnswer.objects.get(pk=answer.pk)
+        engine = GradingEngine(model=FakeModel(score=30))
+
+        engine.grade(ANSWER_KINDS["hand"], [first])
+        engine.grade(ANSWER_KINDS["hand"], [second])
+
+        self.assertEqual(
+            StudentResults.objects.get(user=self.students[0]).hand_drawing_result, 30
+        )
+
+    def test_identical_images_are_inferred_once(self):
+        for student in self.students:
+            self.create_answer(student)
+        model = FakeModel(score=9)
+
+        GradingEngine(model=model).grade_pending()
+
+        self.assertEqual(model.batches, [1])
+        self.assertEqual(GradingResult.objects.get().score, 9)
+        self.assertEqual(
+            set(HandDrawingAnswer.objects.values_list("score", flat=True)), {9}
+        )
+
+    def test_cached_results_skip_the_model(self):
+        answer = self.create_answer(self.students[0])
+        self.assertEqual(len(answer.content_hash), 64)
+        GradingResult.objects.create(
+            model_version="1", content_hash=answer.content_hash, score=33
+        )
+        model = FakeModel()
+
+        GradingEngine(model=model, model_version="1").grade_pending()
+
+        self.assertEqual(model.batches, [])
+        self.assertEqual(HandDrawingAnswer.objects.get().score, 33)
+
+    def test_cache_is_per_model_version(self):
+        answer = self.create_answer(self.students[0])
+        GradingResult.objects.create(
+            model_version="1", content_hash=answer.content_hash, score=33
+        )
+        model = FakeModel(score=5)
+
+        GradingEngine(model=model, model_version="2").grade_pending()
+
+        self.assertEqual(model.batches, [1])
+        self.assertEqual(HandDrawingAnswer.objects.get().score, 5)
+
+    def test_scores_are_clamped(self):
+        self.create_answer(self.students[0])
+        with self.settings(GRADING_MAX_SCORE=10):
+            GradingEngine(model=FakeModel(score=250)).grade_pending()
+        self.assertEqual(HandDrawingAnswer.objects.get().score, 10)
+
+    def test_grade_pending_respects_limit(self):
+        for student in self.students:
+            self.create_answer(student)
+        graded = GradingEngine(model=FakeModel(), batch_size=2).grade_pending(limit=1)
+        self.assertEqual(graded, 1)
+        self.assertEqual(HandDrawingAnswer.objects.filter(graded_at=None).count(), 2)
+
+
+class FailingModel:
+    def predict(self, images):
+        raise RuntimeError("model crashed")
+
+
+class GradingQueueTestCase(GradingTestCase):
+    def test_upload_enqueues_job_without_grading(self):
+        user = self.students[0].user
+        user.status = "student_review"
+        user.save()
+        client = APIClient()
+        client.force_authenticate(user)
+
+        response = client.post(
+            "/api/v1/students/hand-drawing/",
+            {"hand_draw": self.exam.pk, "answer": make_image()},
+            format="multipart",
+        )
+
+        self.assertEqual(response.status_code, 201)
+        answer = HandDrawingAnswer.objects.get()
+        self.assertIsNone(answer.graded_at)
+        job = GradingJob.objects.get()
+        self.assertEqual((job.kind, job.answer_id), ("hand", answer.pk))
+        self.assertEqual(job.status, "pending")
+
+    def test_enqueue_resets_existing_job(self):
+        answer = self.create_answer(self.students[0])
+        enqueue(answer)
+        GradingJob.objects.update(status="done", attempts=3)
+
+        enqueue(answer)
+
+        job = GradingJob.objects.get()
+        self.assertEqual((job.status, job.attempts), ("pending", 0))
+
+    def test_claim_is_exclusive(self):
+        for student in self.students:
+            enqueue(self.create_answer(student))
+
+        first = claim("worker-1", 2)
+        second = claim("worker-2", 5)
+
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 1)
+        self.assertTrue(all(job.status == "running" for job in first + second))
+        self.assertEqual(claim("worker-3", 5), [])
+
+    def test_expired_lease_is_reclaimed(self):
+        enqueue(self.create_answer(self.students[0]))
+        claim("worker-1", 1)
+        GradingJob.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+
+        jobs = claim("worker-2", 1)
+
+        self.assertEqual([job.locked_by for job in jobs], ["worker-2"])
+
+    def test_process_grades_and_finishes_jobs(self):
+        for student in self.students:
+            enqueue(self.create_answer(student))
+
+        process(claim("worker", 10), GradingEngine(model=FakeModel(score=7)))
+
+        self.assertEqual(GradingJob.objects.filter(status="done").count(), 3)
+        self.assertEqual(
+            set(HandDrawingAnswer.objects.values_list("score", flat=True)), {7}
+        )
+
+    def test_resubmission_during_grading_is_kept(self):
+        answer = self.create_answer(self.students[0])
+        enqueue(answer)
+        jobs = claim("worker", 1)
+
+        class ResubmittingModel(FakeModel):
+            def predict(model, images):
+                resubmitted = HandDrawingAnswer.objects.get(pk=answer.pk)
+                resubmitted.answer = make_image(colour=(0, 0, 255))
+                resubmitted.save()
+                enqueue(resubmitted)
+                return super().predict(images)
+
+        process(jobs, GradingEngine(model=ResubmittingModel(score=7)))
+
+        stored = HandDrawingAnswer.objects.get()
+        self.assertNotEqual(stored.answer.name, answer.answer.name)
+        self.assertNotEqual(stored.content_hash, answer.content_hash)
+        self.assertEqual((stored.score, stored.graded_at), (0, None))
+        self.assertEqual(GradingJob.objects.get().status, "pending")
+        self.assertEqual(
+            StudentResults.objects.get(user=self.students[0]).hand_drawing_result, 0
+        )
+
+    @override_settings(GRADING_MAX_ATTEMPTS=2, GRADING_RETRY_DELAY=10)
+    def test_failures_are_retried_with_backoff(self):
+        enqueue(self.create_answer(self.students[0]))
+        engine = GradingEngine(model=FailingModel())
+
+        with self.assertLogs("grading.queue", "ERROR"):
+            process(claim("worker", 1), engine)
+        job = GradingJob.objects.get()
+        self.assertEqual(job.status, "pending")
+        self.assertIn("model crashed", job.last_error)
+        self.assertGreater(job.available_at, timezone.now())
+
+        GradingJob.objects.update(available_at=timezone.now())
+        with self.assertLogs("grading.queue", "ERROR"):
+            process(claim("worker", 1), engine)
+        self.assertEqual(GradingJob.objects.get().status, "failed")
+
+
+class GradeWorkerCommandTestCase(TestCase):
+    @override_settings(GRADING_MODEL_PATH="/models/drawing.pt")
+    def test_process_local_cache_is_refused(self):
+        with self.assertRaisesMessage(CommandError, "LocMemCache"):
+            call_command("grade_worker", processes=0)
+
+
+class MicroBatcherTestCase(TestCase):
+    def test_concurrent_requests_share_one_batch(self):
+        model = FakeModel(score=3)
+        batcher = MicroBatcher(model.predict, max_batch_size=8, max_wait_ms=200)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.extend(batcher.predict(["image"])))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, [3, 3, 3, 3])
+        self.assertEqual(model.batches, [4])
+
+    def test_batches_are_capped(self):
+        model = FakeModel()
+        batcher = MicroBatcher(model.predict, max_batch_size=2, max_wait_ms=200)
+        self.assertEqual(len(batcher.predict(["image"] * 5)), 5)
+        self.assertEqual(model.batches, [2, 2, 1])
+
+    def test_errors_reach_every_caller(self):
+        batcher = MicroBatcher(FailingModel().predict, max_batch_size=4, max_wait_ms=1)
+        with self.assertRaises(RuntimeError):
+            batcher.predict(["image", "image"])
+
+
+class GradeOnDemandTestCase(GradingTestCase):
+    @override_settings(GRADING_MODEL_PATH="model.pt")
+    def test_grade_action_grades_pending_answer(self):
+        answer = self.create_answer(self.students[0])
+        enqueue(answer)
+        client = APIClient()
+        client.force_authenticate(self.students[0].user)
+        batcher = MicroBatcher(FakeModel(score=12).predict, 4, 1)
+
+        with mock.patch("grading.batcher.get_batcher", return_value=batcher):
+            response = client.post(f"/api/v1/students/hand-drawing/{answer.pk}/grade/")
+
+        self.assertEqual(response.json(), {"score": 12, "graded": True})
+        self.assertEqual(GradingJob.objects.get().status, "done")
+
+    @override_settings(GRADING_MODEL_PATH="model.pt")
+    def test_busy_batcher_answers_503(self):
+        answer = self.create_answer(self.students[0])
+        enqueue(answer)
+        client = APIClient()
+        client.force_authenticate(self.students[0].user)
+        batcher = MicroBatcher(SlowModel().predict, 4, 1, timeout=0.01)
+
+        with mock.patch("grading.batcher.get_batcher", return_value=batcher):
+            response = client.post(f"/api/v1/students/hand-drawing/{answer.pk}/grade/")
+
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("Retry-After", response)
+        self.assertEqual(GradingJob.objects.get().status, "pending")
+        self.assertEqual(
+            client.get(f"/api/v1/students/hand-drawing/{answer.pk}/grade/").status_code,
+            405,
+        )
@@ -0,0 +1,33 @@
+import logging
+import os
+import signal
+import socket
+
+from django.db import connections
+
+from .engine import GradingEngine
+from .queue import claim, process
+
+logger = logging.getLogger(__name__)
+
+
+def run_worker(stop, batch_size, poll_interval):
+    """
+    Worker process loop: claim a batch of jobs, grade it, repeat until
+    ``stop`` (a multiprocessing.Event) is set.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    # Connections inherited from the parent must not be shared across forks.
+    connections.close_all()
+    engine = GradingEngine(batch_size=batch_size)
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    logger.info("Grading worker %s started", worker_id)
+    while not stop.is_set():
+        jobs = claim(worker_id, batch_size)
+        if not jobs:
+            stop.wait(poll_interval)
+            continue
+        process(jobs, engine)
+    connections.close_all()
+    logger.info("Grading worker %s stopped", worker_id)
@@ -0,0 +1,17 @@
+import os
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "project.settings")
+
+# Threaded workers, so concurrent on-demand grading requests of one process
+# share a MicroBatcher batch instead of each waiting out the batch window.
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
+
+
+def on_starting(server):
+    # Answer keys and other versioned entries are invalidated through the
+    # cache; separate workers only see each other's changes in a shared one.
+    if server.cfg.workers > 1:
+        from project.caching import require_shared_cache
+
+        require_shared_cache(f"gunicorn runs {server.cfg.workers} workers")
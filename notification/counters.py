@@ -0,0 +1,73 @@
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.db.models import Count, F, Q
+from notifications.models import Notification
+
+from .models import NotificationCounter
+
+_local = threading.local()
+
+
+@contextmanager
+def counted_by_caller():
+    """
+    Skip the per-row counter updates of notifications deleted in the block;
+    the caller adjusts the counters once from the deleted row counts.
+    """
+    _local.counted_by_caller = True
+    try:
+        yield
+    finally:
+        _local.counted_by_caller = False
+
+
+def is_counted_by_caller():
+    return getattr(_local, "counted_by_caller", False)
+
+
+def recount(user_id):
+    counts = Notification.objects.filter(recipient_id=user_id).aggregate(
+        total=Count("id"), unread=Count("id", filter=Q(unread=True))
+    )
+    counter, _ = NotificationCounter.objects.update_or_create(
+        user_id=user_id, defaults=counts
+    )
+    return counter
+
+
+def adjust(user_id, unread=0, total=0, create=True):
+    """
+    Apply a change to a user's counters. A missing row is rebuilt from the
+    inbox, which already includes the change, unless ``create`` is False.
+    """
+    updated = NotificationCounter.objects.filter(user_id=user_id).update(
+        unread=F("unread") + unread, total=F("total") + total
+    )
+    if not updated and create:
+        recount(user_id)
+
+
+def adjust_many(changes):
+    """
+    Apply ``{user_id: (unread, total)}`` with one UPDATE per distinct change,
+    rebuilding any counter rows that do not exist yet.
+    """
+    groups = defaultdict(list)
+    for user_id, change in changes.items():
+        groups[change].append(user_id)
+    for (unread, total), user_ids in groups.items():
+        counters = NotificationCounter.objects.filter(user_id__in=user_ids)
+        updated = counters.update(unread=F("unread") + unread, total=F("total") + total)
+        if updated < len(user_ids):
+            present = set(counters.values_list("user_id", flat=True))
+            for user_id in set(user_ids) - present:
+                recount(user_id)
+
+
+def get_counter(user_id):
+    try:
+        return NotificationCounter.objects.get(user_id=user_id)
+    except NotificationCounter.DoesNotExist:
+        return recount(user_id)
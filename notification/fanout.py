@@ -0,0 +1,92 @@
+from collections import Counter
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from notifications.models import Notification
+
+from students.models import Student
+
+from .counters import adjust_many
+
+
+def build_notification(
+    recipient_id, actor_type, actor_id, verb, description="", level="info", data=None
+):
+    return Notification(
+        recipient_id=recipient_id,
+        actor_content_type=actor_type,
+        actor_object_id=str(actor_id),
+        verb=verb,
+        description=description,
+        level=level,
+        data=data,
+    )
+
+
+def user_notification(user_id, verb, **kwargs):
+    """
+    An unsaved notification sent by the recipient to itself, like the ones
+    the signal handlers send.
+    """
+    user_type = ContentType.objects.get_for_model(get_user_model())
+    return build_notification(user_id, user_type, user_id, verb, **kwargs)
+
+
+def create_notifications(notifications, batch_size=None):
+    """
+    Insert notifications in bulk and update the recipients' counters, which
+    the post_save handler cannot do for bulk inserts.
+    """
+    Notification.objects.bulk_create(notifications, batch_size=batch_size)
+    totals = Counter(notification.recipient_id for notification in notifications)
+    unread = Counter(
+        notification.recipient_id
+        for notification in notifications
+        if notification.unread
+    )
+    adjust_many(
+        {user_id: (unread[user_id], total) for user_id, total in totals.items()}
+    )
+
+
+def notify_users(user_ids, actor, verb, chunk_size=None, **kwargs):
+    """
+    Send the same notification from ``actor`` to every user id, inserting
+    one chunk per transaction. Returns the number of notifications sent.
+    """
+    chunk_size = chunk_size or settings.NOTIFICATION_FANOUT_CHUNK_SIZE
+    actor_type = ContentType.objects.get_for_model(actor)
+    user_ids = iter(user_ids)
+    sent = 0
+    while True:
+        chunk = list(islice(user_ids, chunk_size))
+        if not chunk:
+            return sent
+        with transaction.atomic():
+            create_notifications(
+                [
+                    build_notification(user_id, actor_type, actor.pk, verb, **kwargs)
+                    for user_id in chunk
+                ]
+            )
+        sent += len(chunk)
+
+
+def notify_college(college, verb, status=None, chunk_size=None, **kwargs):
+    """
+    Announce to every student of a college, optionally only to users with
+    the given account status.
+    """
+    chunk_size = chunk_size or settings.NOTIFICATION_FANOUT_CHUNK_SIZE
+    students = Student.objects.filter(college=college)
+    if status:
+        students = students.filter(user__status=status)
+    user_ids = (
+        students.order_by("pk")
+        .values_list("user_id", flat=True)
+        .iterator(chunk_size=chunk_size)
+    )
+    return notify_users(user_ids, college, verb, chunk_size=chunk_size, **kwargs)
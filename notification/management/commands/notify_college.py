@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from notifications.models import Notification
+
+from colleges.models import College
+from notification.fanout import notify_college
+
+
+class Command(BaseCommand):
+    help = "Send one notification to every student of a college."
+
+    def add_arguments(self, parser):
+        parser.add_argument("college", type=int, help="College id.")
+        parser.add_argument("verb", help="Notification title.")
+        parser.add_argument("--description", default="")
+        parser.add_argument(
+            "--level",
+            choices=[level for level, _ in Notification.LEVELS],
+            default="info",
+        )
+        parser.add_argument(
+            "--status", help="Only notify users with this account status."
+        )
+        parser.add_argument("--chunk-size", type=int)
+
+    def handle(self, *args, **options):
+        try:
+            college = College.objects.get(pk=options["college"])
+        except College.DoesNotExist:
+            raise CommandError(f"College {options['college']} does not exist.")
+        sent = notify_college(
+            college,
+            options["verb"],
+            status=options["status"],
+            chunk_size=options["chunk_size"],
+            description=options["description"],
+            level=options["level"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Sent {sent} notifications."))
@@ -0,0 +1,30 @@
+# Generated by Django 3.2 on 2026-10-18 07:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('user', '0003_alter_useraccount_status'),
+        ('notifications', '0009_alter_notification_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_counter', serialize=False, to='user.useraccount')),
+                ('unread', models.IntegerField(default=0)),
+                ('total', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS notification_inbox_idx '
+            'ON notifications_notification (recipient_id, unread, timestamp)',
+            'DROP INDEX IF EXISTS notification_inbox_idx',
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 3.2 on 2026-10-18 08:36
+
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Count, Q
+
+
+def backfill_counters(apps, schema_editor):
+    # Without a row, the first notification of a user recounts the inbox.
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    Notification = apps.get_model("notifications", "Notification")
+    NotificationCounter = apps.get_model("notification", "NotificationCounter")
+    counts = {
+        row["recipient_id"]: row
+        for row in Notification.objects.order_by()
+        .values("recipient_id")
+        .annotate(total=Count("id"), unread=Count("id", filter=Q(unread=True)))
+    }
+    user_ids = User.objects.values_list("pk", flat=True).iterator()
+    batch = []
+    for user_id in user_ids:
+        row = counts.get(user_id, {})
+        batch.append(
+            NotificationCounter(
+                user_id=user_id,
+                unread=row.get("unread", 0),
+                total=row.get("total", 0),
+            )
+        )
+        if len(batch) >= 1000:
+            NotificationCounter.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    NotificationCounter.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notification', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
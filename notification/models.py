@@ -1,3 +1,21 @@
-# from django.db import models
+from django.conf import settings
+from django.db import models
 
-# Create your models here.
+
+class NotificationCounter(models.Model):
+    """
+    Per-user notification counts, kept in step with the inbox so the unread
+    badge is a single row read.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="notification_counter",
+    )
+    unread = models.IntegerField(default=0)
+    total = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user}: {self.unread}/{self.total}"
@@ -6,3 +6,10 @@ class NotificationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Notification
         fields = ["id", "level", "unread", "verb", "recipient", "description"]
+
+
+class AnnouncementSerializer(serializers.Serializer):
+    verb = serializers.CharField(max_length=255)
+    description = serializers.CharField(required=False, allow_blank=True, default="")
+    level = serializers.ChoiceField(Notification.LEVELS, default="info")
+    status = serializers.CharField(required=False)
@@ -1,10 +1,13 @@
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from notifications.models import Notification
 from notifications.signals import notify
 
 from students.models import Student
 
+from .counters import adjust, is_counted_by_caller
+
 User = get_user_model()
 
 
@@ -18,3 +21,17 @@ def send_welcome_notification(sender, instance, created, **kwargs):
             description="مرحبا بك في منصنتنا الجديدة",
             level="success",
         )
+
+
+@receiver(post_save, sender=Notification, dispatch_uid="notification_counter")
+def notification_counter(sender, instance, created, **kwargs):
+    if created:
+        adjust(instance.recipient_id, unread=int(instance.unread), total=1)
+
+
+@receiver(post_delete, sender=Notification, dispatch_uid="notification_counter_delete")
+def notification_counter_delete(sender, instance, **kwargs):
+    if is_counted_by_caller():
+        return
+    # Cascades from a deleted user must not recreate the user's counter.
+    adjust(instance.recipient_id, unread=-int(instance.unread), total=-1, create=False)
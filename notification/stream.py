@@ -0,0 +1,170 @@
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from notifications.models import Notification
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from user.authentication import StatelessJWTAuthentication
+
+from .pubsub import hub, notification_events
+
+STREAM_PATH = "/api/v1/notifications/stream/"
+POLL_PATH = "/api/v1/notifications/poll/"
+
+
+@sync_to_async
+def authenticate(scope, query):
+    """
+    Return the id of the active user whose access token is in the
+    Authorization header or the ``token`` query parameter (EventSource cannot
+    send headers), checked like any API request.
+    """
+    authentication = StatelessJWTAuthentication()
+    header = dict(scope["headers"]).get(b"authorization")
+    close_old_connections()
+    try:
+        token = authentication.get_raw_token(header) if header else None
+        if token is None and query.get("token"):
+            token = query["token"][0]
+        if not token:
+            return None
+        user = authentication.get_user(authentication.get_validated_token(token))
+    except (AuthenticationFailed, InvalidToken):
+        return None
+    return user.pk if user.is_active else None
+
+
+@sync_to_async
+def missed_events(user_id, after):
+    return notification_events(
+        Notification.objects.filter(recipient_id=user_id, id__gt=after)
+    )
+
+
+def encode_event(event):
+    return (
+        f"id: {event['id']}\nevent: {event['event']}\n"
+        f"data: {json.dumps(event, default=str)}\n\n"
+    ).encode()
+
+
+async def send_json(send, status, body):
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"cache-control", b"no-cache"),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": json.dumps(body).encode()})
+
+
+async def wait_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def stream(user_id, after, receive, send):
+    queue = hub.subscribe(user_id)
+    disconnected = asyncio.ensure_future(wait_disconnect(receive))
+    try:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/event-stream"),
+                    (b"cache-control", b"no-cache"),
+                    (b"x-accel-buffering", b"no"),
+                ],
+            }
+        )
+        events = await missed_events(user_id, after) if after is not None else []
+        while not disconnected.done():
+            for event in events:
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": encode_event(event),
+                        "more_body": True,
+                    }
+                )
+            getter = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait(
+                [getter, disconnected],
+                timeout=settings.NOTIFICATION_STREAM_HEARTBEAT,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if getter in done:
+                events = [getter.result()]
+            else:
+                getter.cancel()
+                events = []
+                if not disconnected.done():
+                    await send(
+                        {
+                            "type": "http.response.body",
+                            "body": b": ping\n\n",
+                            "more_body": True,
+                        }
+                    )
+    finally:
+        disconnected.cancel()
+        hub.unsubscribe(user_id, queue)
+
+
+async def long_poll(user_id, after, send):
+    queue = hub.subscribe(user_id)
+    try:
+        events = await missed_events(user_id, after) if after is not None else []
+        if not events:
+            try:
+                events = [
+                    await asyncio.wait_for(
+                        queue.get(), settings.NOTIFICATION_LONGPOLL_TIMEOUT
+                    )
+                ]
+            except asyncio.TimeoutError:
+                pass
+        while not queue.empty():
+            events.append(queue.get_nowait())
+    finally:
+        hub.unsubscribe(user_id, queue)
+    await send_json(send, 200, events)
+
+
+class NotificationStreamApplication:
+    """
+    ASGI application that serves only the notification stream and long-poll
+    paths, without going through Django's request cycle. The rest of the API
+    runs on the WSGI application; any other path answers 404.
+    """
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        if scope["path"] not in (STREAM_PATH, POLL_PATH):
+            return await send_json(send, 404, {"detail": "Not found."})
+        query = parse_qs(scope.get("query_string", b"").decode())
+        user_id = await authenticate(scope, query)
+        if user_id is None:
+            return await send_json(
+                send, 401, {"detail": "Authentication credentials were not provided."}
+            )
+        last_event_id = dict(scope["headers"]).get(b"last-event-id")
+        after = query.get("after", [last_event_id.decode() if last_event_id else None])[
+            0
+        ]
+        after = int(after) if after and after.isdigit() else None
+        if scope["path"] == STREAM_PATH:
+            await stream(user_id, after, receive, send)
+        else:
+            await long_poll(user_id, after, send)
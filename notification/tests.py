@@ -1,3 +1,325 @@
-# from django.test import TestCase
+import asyncio
+import importlib
+import json
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from notifications.models import Notification
+from notifications.signals import notify
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from colleges.models import College
+from students.models import Student
+
+from .fanout import notify_college
+from .models import NotificationCounter
+from .pubsub import Hub
+from .stream import POLL_PATH, STREAM_PATH, NotificationStreamApplication
+from .views import NotificationViewSet
+
+User = get_user_model()
+
+
+class NotificationInboxTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="inbox@example.com", name="Test User", password="testpass"
+        )
+        for index in range(4):
+            notify.send(sender=self.user, recipient=self.user, verb=f"Message {index}")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def count(self, name):
+        return self.client.get(f"/api/v1/notifications/index/{name}/").json()["count"]
+
+    def test_counter_follows_notifications(self):
+        counter = NotificationCounter.objects.get(user=self.user)
+        self.assertEqual((counter.unread, counter.total), (5, 5))
+        with self.assertNumQueries(1):
+            self.assertEqual(self.count("unread_count"), 5)
+        self.assertEqual(self.count("read_count"), 0)
+
+    def test_counter_follows_read_state(self):
+        notification = Notification.objects.filter(recipient=self.user).first()
+        url = f"/api/v1/notifications/index/{notification.pk}/"
+        self.client.post(url + "mark_as_read/")
+        self.client.post(url + "mark_as_read/")
+        self.assertEqual(self.count("unread_count"), 4)
+        self.client.post("/api/v1/notifications/index/make_all_as_read/")
+        self.assertEqual(self.count("unread_count"), 0)
+        self.client.post(url + "mark_as_unread/")
+        self.assertEqual(self.count("read_count"), 4)
+        self.client.delete(url + "delete/")
+        self.assertEqual((self.count("unread_count"), self.count("read_count")), (0, 4))
+        self.client.delete("/api/v1/notifications/index/delete_all/")
+        self.assertEqual(self.count("read_count"), 0)
+
+    def test_concurrent_read_state_changes_count_once(self):
+        notification = Notification.objects.filter(recipient=self.user).first()
+        url = f"/api/v1/notifications/index/{notification.pk}/"
+        # Another request marks the row read after this one loaded it.
+        self.client.post(url + "mark_as_read/")
+        with mock.patch.object(
+            NotificationViewSet, "get_object", return_value=notification
+        ):
+            self.client.post(url + "mark_as_read/")
+        self.assertEqual(self.count("unread_count"), 4)
+
+    def test_delete_all_adjusts_the_counter_once(self):
+        self.client.post("/api/v1/notifications/index/make_all_as_read/")
+        notify.send(sender=self.user, recipient=self.user, verb="Unread")
+
+        # Two deletes that each collect their rows for post_delete, and one
+        # counter update, inside a savepoint.
+        with self.assertNumQueries(7):
+            self.client.delete("/api/v1/notifications/index/delete_all/")
+
+        counter = NotificationCounter.objects.get(user=self.user)
+        self.assertEqual((counter.unread, counter.total), (0, 0))
+        self.assertFalse(Notification.objects.filter(recipient=self.user).exists())
+
+    def test_counters_are_backfilled(self):
+        NotificationCounter.objects.all().delete()
+        other = User.objects.create_user(
+            email="other@example.com", name="Test User", password="testpass"
+        )
+        NotificationCounter.objects.all().delete()
+        Notification.objects.filter(recipient=other).delete()
+        migration = importlib.import_module(
+            "notification.migrations.0002_auto_20261018_0836"
+        )
+
+        migration.backfill_counters(apps, None)
+
+        self.assertEqual(
+            set(NotificationCounter.objects.values_list("user", "unread", "total")),
+            {(self.user.pk, 5, 5), (other.pk, 0, 0)},
+        )
+
+    def test_missing_counter_is_rebuilt(self):
+        NotificationCounter.objects.all().delete()
+        self.assertEqual(self.count("unread_count"), 5)
+        notify.send(sender=self.user, recipient=self.user, verb="Again")
+        self.assertEqual(NotificationCounter.objects.get(user=self.user).total, 6)
+
+    def test_deleting_user_removes_counter(self):
+        self.user.delete()
+        self.assertFalse(NotificationCounter.objects.exists())
+
+    def test_inbox_is_paginated_newest_first(self):
+        response = self.client.get("/api/v1/notifications/index/?page_size=2")
+        page = response.json()
+        self.assertEqual(
+            [item["verb"] for item in page["results"]], ["Message 3", "Message 2"]
+        )
+        self.assertIsNotNone(page["next"])
+        unread = self.client.get("/api/v1/notifications/index/?unread=false").json()
+        self.assertEqual(unread["results"], [])
+
+
+class NotificationStreamTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="stream@example.com", name="Test User", password="testpass"
+        )
+        self.token = str(AccessToken.for_user(self.user))
+        self.app = NotificationStreamApplication()
+
+    def request(self, path, query="", headers=()):
+        sent = []
+
+        async def receive():
+            await asyncio.sleep(60)
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            "type": "http",
+            "path": path,
+            "query_string": query.encode(),
+            "headers": list(headers),
+        }
+        async_to_sync(self.app)(scope, receive, send)
+        return sent[0]["status"], json.loads(sent[1]["body"])
+
+    def test_requires_token(self):
+        status, _ = self.request(POLL_PATH)
+        self.assertEqual(status, 401)
+
+    def test_inactive_user_is_rejected(self):
+        self.user.is_active = False
+        self.user.save()
+        status, _ = self.request(POLL_PATH, f"token={self.token}")
+        self.assertEqual(status, 401)
+
+    def test_only_stream_paths_are_served(self):
+        status, _ = self.request("/api/v1/colleges/", f"token={self.token}")
+        self.assertEqual(status, 404)
+
+    def test_stream_sends_missed_notifications(self):
+        first = Notification.objects.get(recipient=self.user)
+        missed = Notification.objects.create(
+            actor=self.user, recipient=self.user, verb="Missed"
+        )
+        sent = []
+
+        async def receive():
+            await asyncio.sleep(0.01)
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            "type": "http",
+            "path": STREAM_PATH,
+            "query_string": f"token={self.token}".encode(),
+            "headers": [(b"last-event-id", str(first.pk).encode())],
+        }
+        async_to_sync(self.app)(scope, receive, send)
+
+        self.assertEqual(sent[0]["status"], 200)
+        self.assertIn((b"content-type", b"text/event-stream"), sent[0]["headers"])
+        lines = sent[1]["body"].decode().splitlines()
+        self.assertEqual(lines[:2], [f"id: {missed.pk}", "event: notification"])
+        self.assertEqual(json.loads(lines[2][len("data: ") :])["verb"], "Missed")
+
+    @override_settings(NOTIFICATION_LONGPOLL_TIMEOUT=0)
+    def test_poll_returns_missed_notifications(self):
+        first = Notification.objects.get(recipient=self.user)
+        notify.send(sender=self.user, recipient=self.user, verb="Missed")
+        status, events = self.request(
+            POLL_PATH,
+            f"after={first.pk}",
+            [(b"authorization", f"JWT {self.token}".encode())],
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual([event["verb"] for event in events], ["Missed"])
+
+    @override_settings(NOTIFICATION_LONGPOLL_TIMEOUT=0)
+    def test_poll_times_out_empty(self):
+        status, events = self.request(POLL_PATH, f"token={self.token}")
+        self.assertEqual((status, events), (200, []))
+
+    def test_relay_publishes_new_rows(self):
+        hub = Hub(interval=60)
+
+        async def scenario():
+            queue = hub.subscribe(self.user.pk)
+            hub.relay_task.cancel()
+            await hub.fetch([self.user.pk])
+            await sync_to_async(notify.send)(
+                sender=self.user, recipient=self.user, verb="Live"
+            )
+            await hub.relay_once()
+            return queue.get_nowait()
+
+        self.assertEqual(async_to_sync(scenario)()["verb"], "Live")
+
+    def test_rows_committed_out_of_order_are_published_once(self):
+        late = Notification.objects.create(
+            actor=self.user, recipient=self.user, verb="Late"
+        )
+        Notification.objects.create(actor=self.user, recipient=self.user, verb="Next")
+        fields = {
+            field.attname: getattr(late, field.attname)
+            for field in Notification._meta.concrete_fields
+        }
+        late.delete()
+        hub = Hub(interval=60)
+
+        users = [self.user.pk]
+
+        async def scenario():
+            self.assertEqual(await hub.fetch(users), [])
+            # The lower id commits only after the hub has seen a higher one.
+            await sync_to_async(Notification.objects.create)(**fields)
+            return await hub.fetch(users), await hub.fetch(users)
+
+        published, again = async_to_sync(scenario)()
+        self.assertEqual([event["verb"] for event in published], ["Late"])
+        self.assertEqual(again, [])
+
+    def test_only_subscribers_rows_are_loaded(self):
+        other = User.objects.create_user(
+            email="other@example.com", name="Other User", password="testpass"
+        )
+        fetch = async_to_sync(Hub(interval=60).fetch)
+        users = [self.user.pk]
+
+        fetch(users)
+        notify.send(sender=self.user, recipient=other, verb="Elsewhere")
+        notify.send(sender=self.user, recipient=self.user, verb="Mine")
+        first = fetch(users)
+        # The window is re-read by id only; nothing new loads no rows.
+        with self.assertNumQueries(2):
+            again = fetch(users)
+
+        self.assertEqual([event["verb"] for event in first], ["Mine"])
+        self.assertEqual(again, [])
+
+
+class CollegeFanoutTest(TestCase):
+    def setUp(self):
+        self.college = College.objects.create(name="Test College", payment_code="1")
+        self.users = []
+        for index in range(5):
+            user = User.objects.create_user(
+                email=f"fanout{index}@example.com", name="Test User", password="p"
+            )
+            Student.objects.create(
+                user=user,
+                full_name="Test Student",
+                student_photo=f"student/fanout{index}.jpg",
+                national_id=f"1234567890123{index}",
+                seat_number=index,
+                total=80.0,
+                division="1",
+                phone_number=f"12345678{index}",
+                college=self.college,
+            )
+            self.users.append(user)
+        self.staff = User.objects.create_superuser(
+            email="staff@example.com", name="Staff", password="p"
+        )
+
+    def test_notify_college_in_chunks(self):
+        with self.assertNumQueries(13):
+            sent = notify_college(self.college, "Results are out", chunk_size=2)
+
+        self.assertEqual(sent, 5)
+        notifications = Notification.objects.filter(verb="Results are out")
+        self.assertEqual(
+            set(notifications.values_list("recipient_id", flat=True)),
+            {user.pk for user in self.users},
+        )
+        self.assertEqual(notifications.first().actor, self.college)
+        for user in self.users:
+            counter = NotificationCounter.objects.get(user=user)
+            self.assertEqual(
+                counter.unread,
+                Notification.objects.filter(recipient=user, unread=True).count(),
+            )
+
+    def test_announce_requires_staff(self):
+        client = APIClient()
+        url = f"/api/v1/colleges/{self.college.pk}/announce/"
+        client.force_authenticate(self.users[0])
+        self.assertEqual(client.post(url, {"verb": "Hi"}).status_code, 403)
+        client.force_authenticate(self.staff)
+        response = client.post(url, {"verb": "Exam on Sunday", "level": "warning"})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), {"sent": 5})
+
+    def test_notify_college_command(self):
+        out = StringIO()
+        call_command("notify_college", self.college.pk, "Schedule", stdout=out)
+        self.assertIn("Sent 5 notifications.", out.getvalue())
@@ -1,9 +1,13 @@
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from notifications.models import Notification
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from project.pagination import NewestFirstCursorPagination
+
+from .counters import adjust, counted_by_caller, get_counter
 from .serializers import NotificationSerializer
 
 User = get_user_model()
@@ -12,12 +16,18 @@ User = get_user_model()
 class NotificationViewSet(viewsets.ModelViewSet):
     queryset = Notification.objects.all()
     serializer_class = NotificationSerializer
+    pagination_class = NewestFirstCursorPagination
 
     @action(detail=True, methods=["post", "get"])
     def mark_as_read(self, request, pk=None):
         notification = self.get_object()
         if notification.recipient == request.user:
-            notification.mark_as_read()
+            # Only the request that actually flips the row moves the counter.
+            changed = Notification.objects.filter(
+                pk=notification.pk, unread=True
+            ).update(unread=False)
+            if changed:
+                adjust(request.user.id, unread=-1)
             data = {"success": True}
         else:
             data = {
@@ -28,7 +38,8 @@ class NotificationViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=["post", "get"])
     def make_all_as_read(self, request):
-        Notification.objects.filter(recipient=request.user).mark_all_as_read()
+        changed = Notification.objects.filter(recipient=request.user).mark_all_as_read()
+        adjust(request.user.id, unread=-changed)
         data = {"success": True}
         return Response(data)
 
@@ -36,7 +47,11 @@ class NotificationViewSet(viewsets.ModelViewSet):
     def mark_as_unread(self, request, pk=None):
         notification = self.get_object()
         if notification.recipient == request.user:
-            notification.mark_as_unread()
+            changed = Notification.objects.filter(
+                pk=notification.pk, unread=False
+            ).update(unread=True)
+            if changed:
+                adjust(request.user.id, unread=1)
             data = {"success": True}
         else:
             data = {
@@ -47,7 +62,10 @@ class NotificationViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=["post", "get"])
     def make_all_as_unread(self, request):
-        Notification.objects.filter(recipient=request.user).mark_all_as_unread()
+        changed = Notification.objects.filter(
+            recipient=request.user
+        ).mark_all_as_unread()
+        adjust(request.user.id, unread=changed)
         data = {"success": True}
         return Response(data)
 
@@ -66,22 +84,25 @@ class NotificationViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=["delete", "get"])
     def delete_all(self, request):
-        Notification.objects.filter(recipient=request.user).delete()
+        inbox = Notification.objects.filter(recipient=request.user)
+        # The counters move once by the rows actually deleted instead of
+        # once per row from post_delete.
+        with transaction.atomic(), counted_by_caller():
+            unread, _ = inbox.filter(unread=True).delete()
+            read, _ = inbox.filter(unread=False).delete()
+            adjust(request.user.id, unread=-unread, total=-(unread + read))
         data = {"success": True}
         return Response(data)
 
     @action(detail=False, methods=["get"])
     def unread_count(self, request):
-        count = Notification.objects.filter(recipient=request.user, unread=True).count()
-        data = {"count": count}
+        data = {"count": get_counter(request.user.id).unread}
         return Response(data)
 
     @action(detail=False, methods=["get"])
     def read_count(self, request):
-        count = Notification.objects.filter(
-            recipient=request.user, unread=False
-        ).count()
-        data = {"count": count}
+        counter = get_counter(request.user.id)
+        data = {"count": counter.total - counter.unread}
         return Response(data)
 
     def get_queryset(self):
@@ -89,5 +110,10 @@ class NotificationViewSet(viewsets.ModelViewSet):
 
     def list(self, request):
         queryset = Notification.objects.filter(recipient=self.request.user)
-        serializer = NotificationSerializer(queryset, many=True)
-        return Response(serializer.data)
+        if "unread" in request.query_params:
+            queryset = queryset.filter(
+                unread=request.query_params["unread"].lower() in ("1", "true")
+            )
+        page = self.paginate_queryset(queryset)
+        serializer = NotificationSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
@@ -0,0 +1,65 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from profiling.store import ORDERINGS, delete_profiles, load_profiles, worst_routes
+
+
+class Command(BaseCommand):
+    help = "Show the routes with the worst sampled request profiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=10)
+        parser.add_argument("--order", choices=ORDERINGS, default="total_ms")
+        parser.add_argument(
+            "--top", type=int, default=5, help="Statements and functions per route."
+        )
+        parser.add_argument("--json", action="store_true", help="Print raw JSON.")
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Delete the collected profiles after dumping them.",
+        )
+
+    def handle(self, *args, **options):
+        report = worst_routes(
+            load_profiles(),
+            limit=options["limit"],
+            order=options["order"],
+            top=options["top"],
+        )
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+        elif not report:
+            self.stdout.write("No profiles collected.")
+        else:
+            for route in report:
+                self.write_route(route)
+        if options["reset"]:
+            delete_profiles()
+            self.stdout.write(self.style.SUCCESS("Deleted the collected profiles."))
+
+    def write_route(self, route):
+        self.stdout.write(
+            self.style.MIGRATE_HEADING(
+                f"{route['route']}: {route['requests']} requests, "
+                f"mean {route['mean_ms']}ms, max {route['max_ms']}ms, "
+                f"{route['queries_per_request']} queries/request "
+                f"({route['sql_ms']}ms SQL)"
+            )
+        )
+        for stats in route["sql"]:
+            self.stdout.write(
+                f"  {stats['total_ms']:>9.1f}ms {stats['count']:>6}x  "
+                f"{stats['sql'][:160]}"
+            )
+        for stats in route["functions"]:
+            self.stdout.write(
+                f"  {stats['tottime_ms']:>9.1f}ms own {stats['calls']:>7} calls  "
+                f"{stats['function']}"
+            )
+        for stats in route["cumulative"]:
+            self.stdout.write(
+                f"  {stats['cumtime_ms']:>9.1f}ms cum {stats['calls']:>7} calls  "
+                f"{stats['function']}"
+            )
@@ -0,0 +1,77 @@
+import cProfile
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .store import profiles
+
+logger = logging.getLogger(__name__)
+
+
+class QueryRecorder:
+    """Database execute wrapper that keeps every statement with its duration."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - start))
+
+
+def record_profile(route, elapsed, queries, profiler):
+    try:
+        profiles.record(route, elapsed, queries, profiler)
+    except Exception:
+        logger.exception("Recording the profile of %s failed", route)
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a PROFILING_SAMPLE_RATE fraction of requests with cProfile and
+    records their SQL, aggregated by route name. Only loaded when
+    PROFILING_ENABLED is set.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return self.get_response(request)
+        recorder = QueryRecorder()
+        profiler = cProfile.Profile()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            start = time.perf_counter()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+            elapsed = time.perf_counter() - start
+        match = request.resolver_match
+        route = match.view_name if match else "unresolved"
+        # Aggregating the profile waits until the server closes the response,
+        # once it has been sent.
+        close = response.close
+
+        def close_and_record():
+            try:
+                close()
+            finally:
+                record_profile(route, elapsed, recorder.queries, profiler)
+
+        response.close = close_and_record
+        return response
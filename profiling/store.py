@@ -0,0 +1,226 @@
+import atexit
+import json
+import os
+import pstats
+import re
+import socket
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+
+# Placeholder lists of IN (...) clauses vary with the number of values.
+IN_LIST = re.compile(r"\((?:%s,\s*)+%s\)")
+
+
+def normalize_sql(sql):
+    return IN_LIST.sub("(...)", sql)
+
+
+def empty_route():
+    return {
+        "requests": 0,
+        "total_ms": 0.0,
+        "max_ms": 0.0,
+        "queries": 0,
+        "sql_ms": 0.0,
+        "sql": {},
+        "functions": {},
+    }
+
+
+def merge_route(into, route):
+    """Add the totals of one route aggregate to another."""
+    for field in ("requests", "total_ms", "queries", "sql_ms"):
+        into[field] += route[field]
+    into["max_ms"] = max(into["max_ms"], route["max_ms"])
+    for sql, stats in route["sql"].items():
+        totals = into["sql"].setdefault(
+            sql, {"count": 0, "total_ms": 0.0, "max_ms": 0.0}
+        )
+        totals["count"] += stats["count"]
+        totals["total_ms"] += stats["total_ms"]
+        totals["max_ms"] = max(totals["max_ms"], stats["max_ms"])
+    for function, stats in route["functions"].items():
+        totals = into["functions"].setdefault(
+            function, {"calls": 0, "tottime_ms": 0.0, "cumtime_ms": 0.0}
+        )
+        for field in ("calls", "tottime_ms", "cumtime_ms"):
+            totals[field] += stats[field]
+    trim(into)
+
+
+def trim(route):
+    """Keep the functions and statements that rank high on any measure."""
+    limit = settings.PROFILING_MAX_ENTRIES
+    for key, fields in (
+        ("functions", ("tottime_ms", "cumtime_ms")),
+        ("sql", ("total_ms", "count")),
+    ):
+        entries = route[key]
+        if len(entries) <= limit:
+            continue
+        keep = set()
+        for field in fields:
+            ranked = sorted(
+                entries, key=lambda name: entries[name][field], reverse=True
+            )
+            keep.update(ranked[:limit])
+        route[key] = {name: entries[name] for name in keep}
+
+
+class ProfileStore:
+    """
+    Per-process aggregate of sampled requests by route name, written to
+    PROFILING_DIR as one JSON file per process.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = {}
+        self.flushed_at = time.monotonic()
+        self.written = False
+
+    def record(self, route, elapsed, queries, profiler):
+        """Add one profiled request: its time, (sql, seconds) pairs and cProfile."""
+        sample = empty_route()
+        sample["requests"] = 1
+        sample["total_ms"] = sample["max_ms"] = elapsed * 1000
+        sample["queries"] = len(queries)
+        for sql, duration in queries:
+            stats = sample["sql"].setdefault(
+                normalize_sql(sql), {"count": 0, "total_ms": 0.0, "max_ms": 0.0}
+            )
+            stats["count"] += 1
+            stats["total_ms"] += duration * 1000
+            stats["max_ms"] = max(stats["max_ms"], duration * 1000)
+            sample["sql_ms"] += duration * 1000
+        for (filename, line, name), (_, calls, tottime, cumtime, _) in pstats.Stats(
+            profiler
+        ).stats.items():
+            sample["functions"][f"{filename}:{line}({name})"] = {
+                "calls": calls,
+                "tottime_ms": tottime * 1000,
+                "cumtime_ms": cumtime * 1000,
+            }
+        with self.lock:
+            merge_route(self.routes.setdefault(route, empty_route()), sample)
+            due = (
+                time.monotonic() - self.flushed_at >= settings.PROFILING_FLUSH_INTERVAL
+            )
+        if due:
+            self.flush()
+
+    def path(self):
+        return os.path.join(
+            settings.PROFILING_DIR, f"{socket.gethostname()}-{os.getpid()}.json"
+        )
+
+    def flush(self):
+        """
+        Write this process's aggregate, replacing its previous file. A file
+        deleted since the last write means the profiles were reset, so the
+        aggregate starts over instead.
+        """
+        path = self.path()
+        with self.lock:
+            self.flushed_at = time.monotonic()
+            if self.written and not os.path.exists(path):
+                self.routes = {}
+                self.written = False
+            if not self.routes:
+                return
+            data = json.dumps({"pid": os.getpid(), "routes": self.routes})
+            self.written = True
+        os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=settings.PROFILING_DIR, suffix=".tmp")
+        with os.fdopen(fd, "w") as temp_file:
+            temp_file.write(data)
+        os.replace(temp_path, path)
+
+    def clear(self):
+        with self.lock:
+            self.routes = {}
+            self.written = False
+
+
+profiles = ProfileStore()
+atexit.register(profiles.flush)
+
+
+def load_profiles():
+    """Merge the files of every process into one aggregate by route."""
+    routes = {}
+    if not os.path.isdir(settings.PROFILING_DIR):
+        return routes
+    for entry in os.scandir(settings.PROFILING_DIR):
+        if not entry.name.endswith(".json"):
+            continue
+        with open(entry.path) as profile_file:
+            try:
+                data = json.load(profile_file)
+            except ValueError:
+                continue
+        for route, stats in data["routes"].items():
+            merge_route(routes.setdefault(route, empty_route()), stats)
+    return routes
+
+
+def delete_profiles():
+    profiles.clear()
+    if not os.path.isdir(settings.PROFILING_DIR):
+        return
+    for entry in os.scandir(settings.PROFILING_DIR):
+        if entry.name.endswith(".json"):
+            os.unlink(entry.path)
+
+
+ORDERINGS = ("total_ms", "mean_ms", "max_ms", "queries_per_request", "sql_ms")
+
+
+def worst_routes(routes, limit=10, order="total_ms", top=5):
+    """
+    The ``limit`` routes ranking worst by ``order``, each with its slowest
+    statements and the functions with the most own and cumulative time.
+    """
+    report = []
+    for route, stats in routes.items():
+        requests = stats["requests"] or 1
+        report.append(
+            {
+                "route": route,
+                "requests": stats["requests"],
+                "total_ms": round(stats["total_ms"], 2),
+                "mean_ms": round(stats["total_ms"] / requests, 2),
+                "max_ms": round(stats["max_ms"], 2),
+                "queries_per_request": round(stats["queries"] / requests, 2),
+                "sql_ms": round(stats["sql_ms"], 2),
+                "sql": [
+                    {"sql": sql, **sql_stats}
+                    for sql, sql_stats in sorted(
+                        stats["sql"].items(),
+                        key=lambda item: item[1]["total_ms"],
+                        reverse=True,
+                    )[:top]
+                ],
+                "functions": [
+                    {"function": function, **function_stats}
+                    for function, function_stats in sorted(
+                        stats["functions"].items(),
+                        key=lambda item: item[1]["tottime_ms"],
+                        reverse=True,
+                    )[:top]
+                ],
+                "cumulative": [
+                    {"function": function, **function_stats}
+                    for function, function_stats in sorted(
+                        stats["functions"].items(),
+                        key=lambda item: item[1]["cumtime_ms"],
+                        reverse=True,
+                    )[:top]
+                ],
+            }
+        )
+    report.sort(key=lambda item: item[order], reverse=True)
+    return report[:limit]
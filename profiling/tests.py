@@ -0,0 +1,126 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from colleges.models import College
+from students.models import Student
+
+from .middleware import ProfilingMiddleware
+from .store import load_profiles, normalize_sql, profiles
+
+User = get_user_model()
+
+
+class ProfilingMiddlewareTest(TestCase):
+    def setUp(self):
+        profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, profile_dir, ignore_errors=True)
+        enabled = override_settings(
+            PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=1.0, PROFILING_DIR=profile_dir
+        )
+        enabled.enable()
+        self.addCleanup(enabled.disable)
+        self.addCleanup(profiles.clear)
+        profiles.clear()
+        self.profile_dir = profile_dir
+
+        college = College.objects.create(name="Test College", payment_code="1")
+        self.user = User.objects.create_user(
+            email="profiled@example.com", name="Test User", password="testpass"
+        )
+        Student.objects.create(
+            user=self.user,
+            full_name="Test Student",
+            student_photo="student/profiled.jpg",
+            national_id="12345678901234",
+            seat_number=1,
+            total=80,
+            division="1",
+            phone_number="0100000000",
+            college=college,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.staff = APIClient()
+        self.staff.force_authenticate(
+            User.objects.create_superuser("staff@example.com", "Staff", "testpass")
+        )
+
+    def test_requests_are_aggregated_by_route(self):
+        for _ in range(3):
+            self.client.get("/api/v1/students/list/")
+
+        profiles.flush()
+        route = load_profiles()["students-list"]
+        self.assertEqual(route["requests"], 3)
+        self.assertGreater(route["queries"], 0)
+        self.assertTrue(
+            any("students_student" in sql for sql in route["sql"]), route["sql"]
+        )
+        self.assertTrue(
+            any("to_representation" in function for function in route["functions"])
+        )
+        self.assertEqual(
+            os.listdir(self.profile_dir), [os.path.basename(profiles.path())]
+        )
+
+    def test_profile_is_recorded_once_the_response_is_closed(self):
+        middleware = ProfilingMiddleware(lambda request: HttpResponse())
+
+        response = middleware(RequestFactory().get("/"))
+        self.assertEqual(profiles.routes, {})
+        response.close()
+        self.assertEqual(profiles.routes["unresolved"]["requests"], 1)
+
+    def test_unsampled_requests_are_not_recorded(self):
+        with override_settings(PROFILING_SAMPLE_RATE=0):
+            self.client.get("/api/v1/students/list/")
+        self.assertEqual(profiles.routes, {})
+
+    def test_report_is_staff_only(self):
+        self.client.get("/api/v1/students/list/")
+
+        self.assertEqual(self.client.get("/api/v1/profiling/routes/").status_code, 403)
+        response = self.staff.get("/api/v1/profiling/routes/?order=queries_per_request")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]["route"], "students-list")
+        self.assertEqual(
+            self.staff.get("/api/v1/profiling/routes/?order=name").status_code, 400
+        )
+
+    def test_dump_command(self):
+        self.client.get("/api/v1/students/list/")
+        profiles.flush()
+
+        out = StringIO()
+        call_command("profiling_dump", "--json", stdout=out)
+        self.assertEqual(json.loads(out.getvalue())[0]["route"], "students-list")
+
+        out = StringIO()
+        call_command("profiling_dump", "--reset", stdout=out)
+        self.assertIn("students-list: 1 requests", out.getvalue())
+        self.assertEqual(load_profiles(), {})
+
+    def test_reset_from_another_process_restarts_the_aggregate(self):
+        self.client.get("/api/v1/students/list/")
+        profiles.flush()
+        os.unlink(profiles.path())
+
+        profiles.flush()
+        self.client.get("/api/v1/students/list/")
+        profiles.flush()
+        self.assertEqual(load_profiles()["students-list"]["requests"], 1)
+
+    def test_in_lists_are_normalized(self):
+        self.assertEqual(
+            normalize_sql('SELECT 1 FROM "t" WHERE "id" IN (%s, %s, %s)'),
+            'SELECT 1 FROM "t" WHERE "id" IN (...)',
+        )
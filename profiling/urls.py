@@ -0,0 +1,7 @@
+from rest_framework.routers import DefaultRouter
+
+from .views import ProfileViewSet
+
+router = DefaultRouter()
+router.register(r"routes", ProfileViewSet, basename="profile")
+urlpatterns = router.urls
@@ -0,0 +1,24 @@
+from rest_framework import viewsets
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from .store import ORDERINGS, load_profiles, profiles, worst_routes
+
+
+class ProfileViewSet(viewsets.ViewSet):
+    """The routes with the worst sampled profiles, across all processes."""
+
+    permission_classes = [IsAdminUser]
+
+    def list(self, request):
+        order = request.query_params.get("order", "total_ms")
+        if order not in ORDERINGS:
+            raise ValidationError({"order": f"Choose one of {', '.join(ORDERINGS)}."})
+        try:
+            limit = int(request.query_params.get("limit", 10))
+        except ValueError:
+            raise ValidationError({"limit": "A number is required."})
+        # Include what this process has not written yet.
+        profiles.flush()
+        return Response(worst_routes(load_profiles(), limit=limit, order=order))
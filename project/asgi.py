@@ -2,6 +2,8 @@
 ASGI config for project project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Only the notification stream and long-poll paths are served here; the rest of
+the API runs on the WSGI application in ``project.wsgi``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
@@ -9,8 +11,17 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "project.settings")
 
-application = get_asgi_application()
+django.setup(set_prefix=False)
+
+from notification.stream import NotificationStreamApplication  # noqa: E402
+from project.caching import require_shared_cache  # noqa: E402
+
+# Stream tokens are checked against claims the web and grading processes
+# invalidate through the cache.
+require_shared_cache("the notification stream runs in its own process")
+
+application = NotificationStreamApplication()
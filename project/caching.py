@@ -0,0 +1,85 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from rest_framework.renderers import JSONRenderer
+
+# Backends whose entries only the current process sees.
+PROCESS_LOCAL_CACHES = {"django.core.cache.backends.locmem.LocMemCache"}
+
+
+def require_shared_cache(reason):
+    """
+    Fail fast when ``reason`` needs the invalidations of one process, which
+    go through the default cache, to reach the others.
+    """
+    backend = settings.CACHES["default"]["BACKEND"]
+    if backend in PROCESS_LOCAL_CACHES:
+        raise ImproperlyConfigured(
+            f"{reason}, so CACHE_BACKEND must be shared by every process, "
+            f"such as the database cache (after createcachetable) or "
+            f"memcached, not {backend}."
+        )
+
+
+def version_key(namespace, key):
+    return f"{namespace}:version:{key}"
+
+
+def get_version(namespace, key):
+    # Versions start from the clock, so a version lost to eviction can never
+    # come back with a number that older cache entries were stored under.
+    return cache.get_or_set(version_key(namespace, key), time.time_ns, timeout=None)
+
+
+def bump_version(namespace, key):
+    """
+    Move ``key`` to a new version once the current transaction commits; a
+    reader before then would cache the old rows under the new version.
+    """
+
+    def bump():
+        try:
+            cache.incr(version_key(namespace, key))
+        except ValueError:
+            cache.set(version_key(namespace, key), time.time_ns(), timeout=None)
+
+    transaction.on_commit(bump)
+
+
+def drop_version(namespace, key):
+    """Forget the version of ``key`` once the current transaction commits."""
+    transaction.on_commit(lambda: cache.delete(version_key(namespace, key)))
+
+
+def etag_for(content):
+    return '"%s"' % hashlib.sha256(content).hexdigest()
+
+
+def cached_json_response(request, cache_key, render, timeout=None):
+    """
+    Serve ``render()`` as JSON from a pre-rendered cache entry.
+
+    The body is rendered once per cache key and stored with its strong ETag,
+    so repeat requests cost one cache lookup and clients holding the current
+    ETag get an empty 304.
+    """
+    entry = cache.get(cache_key)
+    if entry is None:
+        content = JSONRenderer().render(render())
+        entry = (etag_for(content), content)
+        cache.set(cache_key, entry, timeout)
+    etag, content = entry
+    if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+    if etag in if_none_match or "*" in if_none_match:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(content, content_type="application/json")
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    return response
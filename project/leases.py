@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+# Rows of a leased queue table carry ``status``, ``attempts``,
+# ``available_at``, ``locked_by``, ``locked_at`` and ``last_error``; pending
+# rows are taken by one worker at a time for ``lease`` seconds.
+
+
+def claim(model, worker_id, batch_size, running, lease):
+    """
+    Lock up to ``batch_size`` due rows of ``model`` for ``worker_id`` and move
+    them to the ``running`` status.
+
+    Rows are picked with SKIP LOCKED where the backend supports it; the
+    conditional UPDATE keeps claims exclusive on backends that do not.
+    Running rows whose lease expired are picked up again.
+    """
+    now = timezone.now()
+    ready = Q(status="pending", available_at__lte=now) | Q(
+        status=running, locked_at__lt=now - timedelta(seconds=lease)
+    )
+    with transaction.atomic():
+        queryset = model.objects.filter(ready).order_by("available_at")
+        if connection.features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+        ids = list(queryset.values_list("pk", flat=True)[:batch_size])
+        model.objects.filter(ready, pk__in=ids).update(
+            status=running,
+            locked_by=worker_id,
+            locked_at=now,
+            attempts=F("attempts") + 1,
+        )
+    return list(model.objects.filter(pk__in=ids, locked_by=worker_id))
+
+
+def reschedule(model, rows, errors, max_attempts, retry_delay):
+    """
+    Release failed ``rows`` with their error, keyed by pk in ``errors``: back
+    to pending with exponential backoff, or failed after ``max_attempts``.
+    """
+    now = timezone.now()
+    for row in rows:
+        if row.attempts >= max_attempts:
+            row.status = "failed"
+        else:
+            row.status = "pending"
+            row.available_at = now + timedelta(
+                seconds=retry_delay * 2 ** (row.attempts - 1)
+            )
+        row.locked_by = ""
+        row.locked_at = None
+        row.last_error = errors[row.pk]
+    model.objects.bulk_update(
+        rows, ["status", "available_at", "locked_by", "locked_at", "last_error"]
+    )
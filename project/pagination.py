@@ -0,0 +1,16 @@
+from rest_framework.pagination import CursorPagination
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    Keyset pagination on the primary key, so every page is an index range
+    scan no matter how deep the client has paged.
+    """
+
+    ordering = "id"
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
+class NewestFirstCursorPagination(IdCursorPagination):
+    ordering = "-timestamp"
@@ -1,3 +1,4 @@
+import tempfile
 from datetime import timedelta
 from pathlib import Path
 
@@ -42,12 +43,15 @@ INSTALLED_APPS = [
     "students.apps.StudentsConfig",
     "settings.apps.SettingsConfig",
     "notification.apps.NotificationConfig",
+    "grading.apps.GradingConfig",
+    "benchmarks.apps.BenchmarksConfig",
+    "profiling.apps.ProfilingConfig",
 ]
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
+        "user.authentication.StatelessJWTAuthentication",
         "rest_framework.authentication.TokenAuthentication",
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
@@ -57,6 +61,8 @@ REST_FRAMEWORK = {
         "rest_framework.renderers.BrowsableAPIRenderer",
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_PAGINATION_CLASS": "project.pagination.IdCursorPagination",
+    "PAGE_SIZE": env.int("API_PAGE_SIZE", default=50),
 }
 
 SIMPLE_JWT = {
@@ -91,6 +97,21 @@ JWT_AUTH = {
     "JWT_AUTH_COOKIE": None,
 }
 
+# ----------------------------------------------------------------------
+GRADING_MODEL_PATH = env.str("GRADING_MODEL_PATH", default="")
+GRADING_MODEL_VERSION = env.str("GRADING_MODEL_VERSION", default="1")
+GRADING_IMAGE_SIZE = env.int("GRADING_IMAGE_SIZE", default=224)
+GRADING_BATCH_SIZE = env.int("GRADING_BATCH_SIZE", default=32)
+GRADING_MAX_SCORE = env.int("GRADING_MAX_SCORE", default=100)
+GRADING_TORCH_THREADS = env.int("GRADING_TORCH_THREADS", default=0)
+GRADING_WORKER_PROCESSES = env.int("GRADING_WORKER_PROCESSES", default=2)
+GRADING_MAX_ATTEMPTS = env.int("GRADING_MAX_ATTEMPTS", default=5)
+GRADING_RETRY_DELAY = env.int("GRADING_RETRY_DELAY", default=30)
+GRADING_JOB_LEASE = env.int("GRADING_JOB_LEASE", default=600)
+GRADING_MICROBATCH_SIZE = env.int("GRADING_MICROBATCH_SIZE", default=16)
+GRADING_MICROBATCH_WAIT_MS = env.int("GRADING_MICROBATCH_WAIT_MS", default=25)
+GRADING_MICROBATCH_TIMEOUT = env.int("GRADING_MICROBATCH_TIMEOUT", default=30)
+
 # ----------------------------------------------------------------------
 SPECTACULAR_SETTINGS = {
     "TITLE": "Artech API",
@@ -105,6 +126,7 @@ SPECTACULAR_SETTINGS = {
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    "profiling.middleware.ProfilingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -142,6 +164,54 @@ DATABASES = {
 }
 
 
+# Cached versions and confirmations are invalidated through this cache, so
+# every process must share it. The default keeps it in the database (the
+# release step runs createcachetable); memcached works as well. The web,
+# stream and grading processes refuse to start on a process-local backend.
+CACHES = {
+    "default": {
+        "BACKEND": env.str(
+            "CACHE_BACKEND", default="django.core.cache.backends.db.DatabaseCache"
+        ),
+        "LOCATION": env.str("CACHE_LOCATION", default="artech_cache"),
+    }
+}
+
+# Tests run on a process-local cache, see project/testing.py.
+TEST_RUNNER = "project.testing.TestRunner"
+
+JWT_CLAIMS_CACHE_TIMEOUT = env.int("JWT_CLAIMS_CACHE_TIMEOUT", default=300)
+ANSWER_KEY_CACHE_TIMEOUT = env.int("ANSWER_KEY_CACHE_TIMEOUT", default=3600)
+EXAM_BUNDLE_CACHE_TIMEOUT = env.int("EXAM_BUNDLE_CACHE_TIMEOUT", default=3600)
+NOTIFICATION_STREAM_INTERVAL = env.float("NOTIFICATION_STREAM_INTERVAL", default=1.0)
+# Rows committed out of id order within this many seconds still reach clients.
+NOTIFICATION_STREAM_WINDOW = env.int("NOTIFICATION_STREAM_WINDOW", default=30)
+NOTIFICATION_STREAM_HEARTBEAT = env.int("NOTIFICATION_STREAM_HEARTBEAT", default=15)
+NOTIFICATION_LONGPOLL_TIMEOUT = env.int("NOTIFICATION_LONGPOLL_TIMEOUT", default=25)
+NOTIFICATION_FANOUT_CHUNK_SIZE = env.int("NOTIFICATION_FANOUT_CHUNK_SIZE", default=1000)
+CATALOGUE_CACHE_TIMEOUT = env.int("CATALOGUE_CACHE_TIMEOUT", default=86400)
+MCQ_FORM_SEED = env.str("MCQ_FORM_SEED", default="1")
+MCQ_FORM_CACHE_TIMEOUT = env.int("MCQ_FORM_CACHE_TIMEOUT", default=3600)
+
+# The endpoint benchmarks in benchmarks/tests.py only run with RUN_BENCHMARKS=1.
+RUN_BENCHMARKS = env.bool("RUN_BENCHMARKS", default=False)
+BENCHMARK_STUDENTS = env.int("BENCHMARK_STUDENTS", default=2000)
+BENCHMARK_ROUNDS = env.int("BENCHMARK_ROUNDS", default=20)
+BENCHMARK_BUDGETS = env.str(
+    "BENCHMARK_BUDGETS", default=str(BASE_DIR / "benchmarks" / "budgets.json")
+)
+BENCHMARK_LATENCY_FACTOR = env.float("BENCHMARK_LATENCY_FACTOR", default=1.0)
+BENCHMARK_UPDATE_BUDGETS = env.bool("BENCHMARK_UPDATE_BUDGETS", default=False)
+
+# Sampled request profiling, see profiling/middleware.py.
+PROFILING_ENABLED = env.bool("PROFILING_ENABLED", default=False)
+PROFILING_SAMPLE_RATE = env.float("PROFILING_SAMPLE_RATE", default=0.01)
+PROFILING_DIR = env.str(
+    "PROFILING_DIR", default=str(Path(tempfile.gettempdir()) / "artech-profiles")
+)
+PROFILING_FLUSH_INTERVAL = env.int("PROFILING_FLUSH_INTERVAL", default=60)
+PROFILING_MAX_ENTRIES = env.int("PROFILING_MAX_ENTRIES", default=50)
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -188,7 +258,18 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+# Emails are queued in the outbox and delivered by "manage.py send_outbox"
+# through OUTBOX_DELIVERY_BACKEND; use the console or filebased backend there
+# to try it locally.
+EMAIL_BACKEND = env.str("EMAIL_BACKEND", default="user.mail.OutboxBackend")
+OUTBOX_DELIVERY_BACKEND = env.str(
+    "OUTBOX_DELIVERY_BACKEND", default="django.core.mail.backends.smtp.EmailBackend"
+)
+EMAIL_FILE_PATH = env.str("EMAIL_FILE_PATH", default=str(BASE_DIR / "sent_emails"))
+OUTBOX_BATCH_SIZE = env.int("OUTBOX_BATCH_SIZE", default=50)
+OUTBOX_MAX_ATTEMPTS = env.int("OUTBOX_MAX_ATTEMPTS", default=5)
+OUTBOX_RETRY_DELAY = env.int("OUTBOX_RETRY_DELAY", default=60)
+OUTBOX_LEASE = env.int("OUTBOX_LEASE", default=300)
 EMAIL_HOST = "smtp.gmail.com"
 EMAIL_PORT = 587
 EMAIL_HOST_USER = env.str("EMAIL_HOST_USER")
@@ -0,0 +1,25 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Runs the tests on a process-local cache: the query counts they assert
+    are database queries, which the database cache would add to.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.local_cache = override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                    "LOCATION": "artech-tests",
+                }
+            }
+        )
+        self.local_cache.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.local_cache.disable()
+        super().teardown_test_environment(**kwargs)
@@ -16,6 +16,7 @@ urlpatterns = [
     path("api/v1/colleges/", include("colleges.urls")),
     path("api/v1/settings/", include("settings.urls")),
     path("api/v1/students/", include("students.urls")),
+    path("api/v1/profiling/", include("profiling.urls")),
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
     # API schema
     path(
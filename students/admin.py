@@ -4,6 +4,7 @@ from .models import (
     DigitalDrawingAnswer,
     HandDrawingAnswer,
     McqAnswer,
+    MediaBlob,
     PracticeDrawingAnswer,
     Student,
     StudentResults,
@@ -57,3 +58,8 @@ class ResultsAdmin(admin.ModelAdmin):
         "up_to_level",
     )
     list_filter = ("user",)
+
+
+@admin.register(MediaBlob)
+class MediaBlobAdmin(admin.ModelAdmin):
+    list_display = ("name", "size", "references")
@@ -0,0 +1,44 @@
+from user.transitions import set_status
+
+from .models import Student, StudentResults
+
+ADMISSION_MIN_SCORE = 150
+ADMISSION_MAX_SCORE = 400
+
+
+def is_up_to_level(total):
+    return ADMISSION_MIN_SCORE <= total < ADMISSION_MAX_SCORE
+
+
+def refresh_admission(student_ids):
+    """
+    Re-evaluate ``up_to_level`` for students whose results just changed.
+
+    One query reads the totals; writes only happen for students whose
+    admission actually flips.
+    """
+    rows = StudentResults.objects.filter(user_id__in=student_ids).values_list(
+        "user_id",
+        "user__user_id",
+        "user__up_to_level",
+        "mcq_result",
+        "hand_drawing_result",
+        "digital_art_result",
+        "trial_result",
+    )
+    promoted, demoted, promoted_users = [], [], []
+    for student_id, user_id, up_to_level, *scores in rows:
+        admitted = is_up_to_level(sum(score or 0 for score in scores))
+        if admitted and not up_to_level:
+            promoted.append(student_id)
+            promoted_users.append(user_id)
+        elif up_to_level and not admitted:
+            demoted.append(student_id)
+    for student_ids, up_to_level in ((promoted, True), (demoted, False)):
+        if student_ids:
+            Student.objects.filter(pk__in=student_ids).update(up_to_level=up_to_level)
+            StudentResults.objects.filter(user_id__in=student_ids).update(
+                up_to_level=up_to_level
+            )
+    if promoted_users:
+        set_status(promoted_users, "student")
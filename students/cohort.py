@@ -0,0 +1,317 @@
+import hashlib
+import io
+import random
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from PIL import Image, ImageDraw
+
+from colleges.models import College, CollegeDepartment
+from exams.models import (
+    DigitalDrawingExam,
+    HandDrawingExam,
+    MCQExam,
+    PracticeDrawingExam,
+)
+from grading.models import GradingJob
+
+from .admission import is_up_to_level
+from .models import (
+    DigitalDrawingAnswer,
+    HandDrawingAnswer,
+    McqAnswer,
+    MediaBlob,
+    PracticeDrawingAnswer,
+    Student,
+    StudentResults,
+)
+from .storage import content_storage
+
+User = get_user_model()
+
+DEFAULT_PASSWORD = "cohort-password"
+MAX_STUDENTS = 10**7
+MAX_SEED = 200
+OPTIONS = ("A", "B", "C")
+
+# (grading kind, answer model, exam field, result field, exam model)
+DRAWING_KINDS = (
+    ("hand", HandDrawingAnswer, "hand_draw", "hand_drawing_result", HandDrawingExam),
+    (
+        "digital",
+        DigitalDrawingAnswer,
+        "digital_draw",
+        "digital_art_result",
+        DigitalDrawingExam,
+    ),
+    (
+        "practice",
+        PracticeDrawingAnswer,
+        "practice_draw",
+        "trial_result",
+        PracticeDrawingExam,
+    ),
+)
+
+
+def cohort_email(seed, index):
+    return f"cohort{seed}-{index}@example.com"
+
+
+def generate_images(rng, count, size=64):
+    """Save ``count`` small random drawings; returns their (name, sha256)."""
+    images = []
+    for _ in range(count):
+        image = Image.new("RGB", (size, size), "white")
+        draw = ImageDraw.Draw(image)
+        for _ in range(rng.randint(3, 8)):
+            left, right = sorted(rng.randrange(size) for _ in range(2))
+            top, bottom = sorted(rng.randrange(size) for _ in range(2))
+            colour = tuple(rng.randrange(256) for _ in range(3))
+            draw.rectangle((left, top, right, bottom), outline=colour, width=2)
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        content = buffer.getvalue()
+        name = content_storage.save("cohort.png", ContentFile(content))
+        images.append((name, hashlib.sha256(content).hexdigest()))
+    return images
+
+
+def create_colleges(rng, seed, colleges, departments, questions, drawing_tasks):
+    """Create the colleges with their departments and exam banks."""
+    banks = {}
+    for index in range(colleges):
+        college = College.objects.create(
+            name=f"Cohort {seed} College {index}",
+            logo="college_logos/cohort.png",
+            payment_code=f"{seed}{index:05d}",
+        )
+        for number in range(departments):
+            department = CollegeDepartment.objects.create(
+                name=f"Cohort {seed} Department {index}.{number}",
+                subtitle="Generated",
+                image="department_images/cohort.png",
+            )
+            department.colleges.add(college)
+        MCQExam.objects.bulk_create(
+            [
+                MCQExam(
+                    question=f"Question {number}",
+                    option1=OPTIONS[0],
+                    option2=OPTIONS[1],
+                    option3=OPTIONS[2],
+                    answer=rng.choice(OPTIONS),
+                    college=college,
+                )
+                for number in range(questions)
+            ]
+        )
+        for _, _, _, _, exam_model in DRAWING_KINDS:
+            exam_model.objects.bulk_create(
+                [
+                    exam_model(
+                        question=f"Task {number}",
+                        task_description="Draw what you see.",
+                        college=college,
+                    )
+                    for number in range(drawing_tasks)
+                ]
+            )
+        banks[college.pk] = {
+            "mcq": list(
+                MCQExam.objects.filter(college=college)
+                .order_by("pk")
+                .values_list("pk", "answer")
+            ),
+            **{
+                kind: list(
+                    exam_model.objects.filter(college=college)
+                    .order_by("pk")
+                    .values_list("pk", flat=True)
+                )
+                for kind, _, _, _, exam_model in DRAWING_KINDS
+            },
+        }
+    return banks
+
+
+def create_students(rng, seed, first, count, banks, images, password, graded):
+    """
+    Insert one chunk of students with their users, answers and results.
+    Returns the number of rows created per model.
+    """
+    created = Counter()
+    uses = Counter()
+    college_ids = list(banks)
+    indexes = range(first, first + count)
+    User.objects.bulk_create(
+        [
+            User(
+                email=cohort_email(seed, index),
+                name=f"Cohort Student {index}",
+                password=password,
+                status="student_review",
+            )
+            for index in indexes
+        ]
+    )
+    user_ids = dict(
+        User.objects.filter(
+            email__in=[cohort_email(seed, index) for index in indexes]
+        ).values_list("email", "pk")
+    )
+    Student.objects.bulk_create(
+        [
+            Student(
+                user_id=user_ids[cohort_email(seed, index)],
+                full_name=f"Cohort Student {index}",
+                student_photo=f"student/cohort/{seed}/{index}.png",
+                national_id=f"{seed:04d}{index:010d}",
+                seat_number=seed * MAX_STUDENTS + index + 1,
+                total=round(rng.uniform(50, 100), 2),
+                division=rng.choice(Student.division_option)[0],
+                phone_number=f"01{seed:03d}{index:08d}",
+                college_id=rng.choice(college_ids),
+            )
+            for index in indexes
+        ]
+    )
+    students = list(
+        Student.objects.filter(user_id__in=user_ids.values())
+        .order_by("pk")
+        .values_list("pk", "user_id", "college_id")
+    )
+    student_ids = [student_id for student_id, _, _ in students]
+
+    now = timezone.now()
+    mcq_answers = []
+    drawing_answers = {kind: [] for kind, *_ in DRAWING_KINDS}
+    results = []
+    admitted_users = []
+    for student_id, user_id, college_id in students:
+        bank = banks[college_id]
+        totals = Counter()
+        ability = rng.random()
+        for question_id, correct_answer in bank["mcq"]:
+            correct = rng.random() < ability
+            answer = correct_answer
+            if not correct:
+                answer = rng.choice([o for o in OPTIONS if o != correct_answer])
+            mcq_answers.append(
+                McqAnswer(
+                    student_id=student_id,
+                    question_id=question_id,
+                    answer=answer,
+                    is_correct=correct,
+                    score=int(correct),
+                )
+            )
+            totals["mcq_result"] += int(correct)
+        for kind, model, exam_field, result_field, _ in DRAWING_KINDS:
+            for exam_id in bank[kind]:
+                name, content_hash = rng.choice(images)
+                uses[name] += 1
+                score = rng.randint(0, settings.GRADING_MAX_SCORE) if graded else 0
+                drawing_answers[kind].append(
+                    model(
+                        student_id=student_id,
+                        answer=name,
+                        score=score,
+                        graded_at=now if graded else None,
+                        content_hash=content_hash,
+                        **{f"{exam_field}_id": exam_id},
+                    )
+                )
+                totals[result_field] += score
+        up_to_level = is_up_to_level(sum(totals.values()))
+        results.append(
+            StudentResults(user_id=student_id, up_to_level=up_to_level, **totals)
+        )
+        if up_to_level:
+            admitted_users.append(user_id)
+
+    created["students"] += len(results)
+    McqAnswer.objects.bulk_create(mcq_answers, batch_size=2000)
+    created["mcq answers"] += len(mcq_answers)
+    for kind, model, *_ in DRAWING_KINDS:
+        model.objects.bulk_create(drawing_answers[kind], batch_size=2000)
+        created["drawing answers"] += len(drawing_answers[kind])
+        if not graded:
+            GradingJob.objects.bulk_create(
+                [
+                    GradingJob(kind=kind, answer_id=answer_id)
+                    for answer_id in model.objects.filter(
+                        student_id__in=student_ids
+                    ).values_list("pk", flat=True)
+                ],
+                batch_size=2000,
+            )
+    StudentResults.objects.bulk_create(results, batch_size=2000)
+    if admitted_users:
+        Student.objects.filter(user_id__in=admitted_users).update(up_to_level=True)
+        User.objects.filter(pk__in=admitted_users).update(status="student")
+    # Bulk inserts bypass the signals that count blob references, so the
+    # chunk's answers are counted in its own transaction.
+    for name, references in uses.items():
+        MediaBlob.objects.filter(name=name).update(
+            references=F("references") + references
+        )
+    return created
+
+
+def generate_cohort(
+    colleges,
+    students,
+    seed=0,
+    departments=3,
+    questions=20,
+    drawing_tasks=3,
+    images=8,
+    chunk_size=1000,
+    password=DEFAULT_PASSWORD,
+    graded=True,
+    progress=None,
+):
+    """
+    Create ``colleges`` colleges with departments and exam banks, and
+    ``students`` students who answered every question of their college.
+
+    The same seed always produces the same data; different seeds do not
+    collide, so several cohorts can share a database. Students are inserted
+    ``chunk_size`` at a time, one transaction per chunk, and all share a
+    single password hash. Drawing answers point at a small pool of generated
+    images. With ``graded=False`` they are left unscored and queued for
+    grading instead.
+    """
+    if not 0 <= seed < MAX_SEED:
+        raise ValueError(f"seed must be between 0 and {MAX_SEED - 1}")
+    if students > MAX_STUDENTS:
+        raise ValueError(f"at most {MAX_STUDENTS} students per cohort")
+    if colleges < 1:
+        raise ValueError("a cohort needs at least one college")
+    if User.objects.filter(email=cohort_email(seed, 0)).exists():
+        raise ValueError(f"a cohort with seed {seed} already exists")
+    rng = random.Random(seed)
+    created = Counter()
+    with transaction.atomic():
+        banks = create_colleges(
+            rng, seed, colleges, departments, questions, drawing_tasks
+        )
+        pool = generate_images(rng, images)
+    created["colleges"] = colleges
+    password = make_password(password)
+    for first in range(0, students, chunk_size):
+        count = min(chunk_size, students - first)
+        with transaction.atomic():
+            created += create_students(
+                rng, seed, first, count, banks, pool, password, graded
+            )
+        if progress:
+            progress(first + count, students)
+    return created
@@ -0,0 +1,30 @@
+from .models import Student
+
+
+def get_student(request):
+    """
+    Return the requesting user's Student (with its college), or None.
+
+    The row is read once per request and also cached as ``request.user.student``,
+    so permissions, viewsets and serializers all share it.
+    """
+    try:
+        return request._student
+    except AttributeError:
+        pass
+    user = request.user
+    student = None
+    user_field = Student._meta.get_field("user")
+    if not user.is_authenticated:
+        pass
+    elif user_field.remote_field.is_cached(user):
+        student = user_field.remote_field.get_cached_value(user)
+    else:
+        student = (
+            Student.objects.select_related("college").filter(user_id=user.pk).first()
+        )
+        user_field.remote_field.set_cached_value(user, student)
+        if student is not None:
+            user_field.set_cached_value(student, user)
+    request._student = student
+    return student
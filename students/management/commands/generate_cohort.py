@@ -0,0 +1,57 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from students.cohort import DEFAULT_PASSWORD, generate_cohort
+
+
+class Command(BaseCommand):
+    help = "Create a synthetic cohort of colleges, exams and answering students."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--colleges", type=int, default=10)
+        parser.add_argument("--students", type=int, default=1000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--departments", type=int, default=3)
+        parser.add_argument("--questions", type=int, default=20)
+        parser.add_argument("--drawing-tasks", type=int, default=3)
+        parser.add_argument(
+            "--images",
+            type=int,
+            default=8,
+            help="Number of generated images the drawing answers share.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--password", default=DEFAULT_PASSWORD)
+        parser.add_argument(
+            "--ungraded",
+            action="store_true",
+            help="Leave drawing answers unscored and queue them for grading.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+
+        def progress(done, total):
+            if options["verbosity"] > 1:
+                self.stdout.write(f"{done}/{total} students")
+
+        try:
+            created = generate_cohort(
+                options["colleges"],
+                options["students"],
+                seed=options["seed"],
+                departments=options["departments"],
+                questions=options["questions"],
+                drawing_tasks=options["drawing_tasks"],
+                images=options["images"],
+                chunk_size=options["chunk_size"],
+                password=options["password"],
+                graded=not options["ungraded"],
+                progress=progress,
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        summary = ", ".join(f"{count} {name}" for name, count in created.items())
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"Created {summary} in {elapsed:.1f}s."))
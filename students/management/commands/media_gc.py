@@ -0,0 +1,183 @@
+import os
+import shutil
+import time
+from collections import Counter
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import FileField
+
+from students.models import MediaBlob
+from students.storage import ContentAddressedStorage
+
+
+def file_fields():
+    for model in apps.get_models():
+        for field in model._meta.concrete_fields:
+            if isinstance(field, FileField):
+                yield model, field
+
+
+def referenced_files():
+    """Count how many rows reference each stored file name."""
+    references = Counter()
+    for model, field in file_fields():
+        names = (
+            model._default_manager.exclude(**{field.attname: ""})
+            .values_list(field.attname, flat=True)
+            .iterator(chunk_size=5000)
+        )
+        references.update(name for name in names if name)
+    return references
+
+
+def referenced_among(names):
+    """The names in ``names`` that some row references, one query per field."""
+    referenced = set()
+    for model, field in file_fields():
+        referenced.update(
+            model._default_manager.filter(**{f"{field.attname}__in": names})
+            .values_list(field.attname, flat=True)
+            .distinct()
+        )
+    return referenced
+
+
+def walk(root, skip=None):
+    """Yield every file below ``root`` as (relative name, path, stat)."""
+    directories = [root]
+    while directories:
+        with os.scandir(directories.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.path != skip:
+                        directories.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    name = os.path.relpath(entry.path, root).replace(os.sep, "/")
+                    yield name, entry.path, entry.stat(follow_symlinks=False)
+
+
+class Command(BaseCommand):
+    help = "Delete or archive media files that no database row references."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report what would be reclaimed.",
+        )
+        parser.add_argument(
+            "--archive",
+            metavar="DIR",
+            help="Move orphaned files below DIR instead of deleting them.",
+        )
+        parser.add_argument(
+            "--min-age",
+            type=int,
+            default=3600,
+            help="Ignore files modified less than this many seconds ago.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Orphans re-checked and reclaimed per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        root = os.path.abspath(settings.MEDIA_ROOT)
+        archive = options["archive"] and os.path.abspath(options["archive"])
+        cutoff = time.time() - options["min_age"]
+        # Counts read before the snapshot; see sync_blobs.
+        counts = dict(MediaBlob.objects.values_list("name", "references"))
+        references = referenced_files()
+
+        scanned = orphaned = reclaimed = 0
+        chunk = []
+
+        def reclaim_chunk():
+            nonlocal orphaned, reclaimed
+            done = chunk if options["dry_run"] else self.reclaim(chunk, cutoff, archive)
+            for name, _, size in done:
+                orphaned += 1
+                reclaimed += size
+                if options["verbosity"] > 1:
+                    self.stdout.write(name)
+            chunk.clear()
+
+        for name, path, stat in walk(root, skip=archive):
+            scanned += 1
+            if name in references or stat.st_mtime > cutoff:
+                continue
+            chunk.append((name, path, stat.st_size))
+            if len(chunk) >= options["chunk_size"]:
+                reclaim_chunk()
+        reclaim_chunk()
+
+        if not options["dry_run"]:
+            self.sync_blobs(counts, references)
+
+        verb = "Would reclaim" if options["dry_run"] else "Reclaimed"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Scanned {scanned} files. {verb} {reclaimed} bytes "
+                f"from {orphaned} unreferenced files."
+            )
+        )
+
+    def reclaim(self, orphans, cutoff, archive):
+        """
+        Remove a chunk of (name, path, size) orphans, except those a row
+        started using since the snapshot, and return the ones removed. Blobs
+        are re-checked with their rows locked, the lock an upload reusing a
+        blob takes as well.
+        """
+        names = [name for name, _, _ in orphans]
+        with transaction.atomic():
+            blobs = dict(
+                MediaBlob.objects.select_for_update()
+                .filter(
+                    name__in=[
+                        name
+                        for name in names
+                        if name.startswith(f"{ContentAddressedStorage.prefix}/")
+                    ]
+                )
+                .values_list("name", "references")
+            )
+            in_use = referenced_among(names)
+            removed = []
+            for name, path, size in orphans:
+                if blobs.get(name, 0) > 0 or name in in_use:
+                    continue
+                try:
+                    if os.stat(path).st_mtime > cutoff:
+                        continue
+                except FileNotFoundError:
+                    continue
+                if archive:
+                    target = os.path.join(archive, name)
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    shutil.move(path, target)
+                else:
+                    os.remove(path)
+                removed.append((name, path, size))
+            MediaBlob.objects.filter(
+                name__in=[name for name, _, _ in removed if name in blobs]
+            ).delete()
+        return removed
+
+    def sync_blobs(self, counts, references):
+        """
+        Reset blob counts to the references just observed, so drifted counts
+        stop protecting orphans on the next run. Each update only applies
+        while the count is still the one read before the snapshot, so
+        references counted meanwhile are not overwritten.
+        """
+        for name, count in counts.items():
+            if count != references[name]:
+                MediaBlob.objects.filter(name=name, references=count).update(
+                    references=references[name]
+                )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from students.admission import refresh_admission
+from students.models import Student, StudentResults
+
+
+class Command(BaseCommand):
+    help = "Recompute every StudentResults row from the stored answer scores."
+
+    def handle(self, *args, **options):
+        rebuilt = StudentResults.objects.rebuild()
+        refresh_admission(Student.objects.values("pk"))
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} student results."))
@@ -0,0 +1,28 @@
+# Generated by Django 3.2 on 2026-10-18 07:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0006_auto_20230616_1357'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='digitaldrawinganswer',
+            name='graded_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='handdrawinganswer',
+            name='graded_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='practicedrawinganswer',
+            name='graded_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
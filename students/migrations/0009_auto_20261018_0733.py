@@ -0,0 +1,46 @@
+# Generated by Django 3.2 on 2026-10-18 07:33
+
+from django.db import migrations, models
+import students.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0008_auto_20261018_0732'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('size', models.BigIntegerField()),
+                ('references', models.IntegerField(default=1)),
+            ],
+            options={
+                'verbose_name_plural': 'Media Blobs',
+            },
+        ),
+        migrations.AlterField(
+            model_name='digitaldrawinganswer',
+            name='answer',
+            field=models.ImageField(storage=students.storage.ContentAddressedStorage(), upload_to='digital_drawing_answers/%Y/%m/%d'),
+        ),
+        migrations.AlterField(
+            model_name='handdrawinganswer',
+            name='answer',
+            field=models.ImageField(storage=students.storage.ContentAddressedStorage(), upload_to='hand_drawing_answers/%Y/%m/%d'),
+        ),
+        migrations.AlterField(
+            model_name='practicedrawinganswer',
+            name='answer',
+            field=models.ImageField(storage=students.storage.ContentAddressedStorage(), upload_to='practice_drawing_answers/%Y/%m/%d'),
+        ),
+        migrations.AlterField(
+            model_name='student',
+            name='student_photo',
+            field=models.ImageField(storage=students.storage.ContentAddressedStorage(), unique=True, upload_to='student/%y/%m/%d/'),
+        ),
+    ]
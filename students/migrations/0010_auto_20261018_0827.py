@@ -0,0 +1,53 @@
+# Generated by Django 3.2 on 2026-10-18 08:27
+
+from collections import Counter
+
+from django.db import migrations, models
+import students.storage
+
+
+def recount_references(apps, schema_editor):
+    # Saves used to count references before their row existed; count the
+    # rows that actually reference each blob instead.
+    MediaBlob = apps.get_model("students", "MediaBlob")
+    references = Counter()
+    for model, field in (
+        ("Student", "student_photo"),
+        ("HandDrawingAnswer", "answer"),
+        ("DigitalDrawingAnswer", "answer"),
+        ("PracticeDrawingAnswer", "answer"),
+    ):
+        references.update(
+            apps.get_model("students", model)
+            .objects.filter(**{f"{field}__startswith": "blobs/"})
+            .values_list(field, flat=True)
+            .iterator()
+        )
+    for blob in MediaBlob.objects.iterator():
+        if blob.references != references[blob.name]:
+            MediaBlob.objects.filter(pk=blob.pk).update(
+                references=references[blob.name]
+            )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("students", "0009_auto_20261018_0733"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="mediablob",
+            name="references",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name="student",
+            name="student_photo",
+            field=models.ImageField(
+                storage=students.storage.ContentAddressedStorage(),
+                upload_to="student/%y/%m/%d/",
+            ),
+        ),
+        migrations.RunPython(recount_references, migrations.RunPython.noop),
+    ]
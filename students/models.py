@@ -1,6 +1,10 @@
+from collections import defaultdict
+
 from django.contrib.auth import get_user_model
 from django.core.validators import RegexValidator
 from django.db import models
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 
 from colleges.models import College
 from exams.models import (
@@ -10,16 +14,32 @@ from exams.models import (
     PracticeDrawingExam,
 )
 
+from .storage import BlobReferenceMixin, content_storage
+
 User = get_user_model()
 
 
-class Student(models.Model):
+class MediaBlob(models.Model):
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField()
+    references = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "Media Blobs"
+
+    def __str__(self):
+        return self.name
+
+
+class Student(BlobReferenceMixin, models.Model):
     division_option = (("1", "رياضة"), ("2", "علوم"), ("3", "ادبي"))
     user = models.OneToOneField(
         User, on_delete=models.CASCADE, related_name="student", null=False
     )
     full_name = models.CharField(max_length=100)
-    student_photo = models.ImageField(upload_to="student/%y/%m/%d/", unique=True)
+    student_photo = models.ImageField(
+        upload_to="student/%y/%m/%d/", storage=content_storage
+    )
     national_id = models.CharField(
         max_length=14,
         unique=True,
@@ -52,7 +72,54 @@ class Student(models.Model):
         )
 
 
-class McqAnswer(models.Model):
+class ScoreTrackingMixin:
+    """
+    Remembers the score stored in the database, so that result totals can
+    be moved by the difference instead of being recomputed.
+    """
+
+    _saved_score = 0
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_score = instance.__dict__.get("score", 0)
+        return instance
+
+    @classmethod
+    def locked_scores(cls, pks, *fields):
+        """
+        The stored score and ``fields`` of ``pks`` as dicts by pk, their rows
+        locked until commit.
+        """
+        return {
+            row["pk"]: row
+            for row in cls._default_manager.select_for_update()
+            .filter(pk__in=pks)
+            .values("pk", "score", *fields)
+        }
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        # The UPDATE only matches while the row still holds the score the
+        # difference is taken from; a concurrent save since moves that base
+        # to the stored score and the UPDATE is tried again.
+        while True:
+            guarded = base_qs.filter(score=self._saved_score)
+            if super()._do_update(
+                guarded, using, pk_val, values, update_fields, forced_update
+            ):
+                return True
+            stored = base_qs.filter(pk=pk_val).values_list("score", flat=True).first()
+            if stored is None:
+                return False
+            self._saved_score = stored
+
+    @property
+    def score_change(self):
+        return self.score - self._saved_score
+
+
+class McqAnswer(ScoreTrackingMixin, models.Model):
     student = models.ForeignKey(
         Student, on_delete=models.CASCADE, related_name="student_mcq"
     )
@@ -69,15 +136,19 @@ class McqAnswer(models.Model):
         return self.student.full_name
 
 
-class HandDrawingAnswer(models.Model):
+class HandDrawingAnswer(BlobReferenceMixin, ScoreTrackingMixin, models.Model):
     student = models.ForeignKey(
         Student, on_delete=models.CASCADE, related_name="hand_sketch_answer"
     )
     hand_draw = models.ForeignKey(
         HandDrawingExam, on_delete=models.CASCADE, related_name="hand_sketch"
     )
-    answer = models.ImageField(upload_to="hand_drawing_answers/%Y/%m/%d")
+    answer = models.ImageField(
+        upload_to="hand_drawing_answers/%Y/%m/%d", storage=content_storage
+    )
     score = models.IntegerField(default=0)
+    graded_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
 
     class Meta:
         verbose_name_plural = "Student Answer Hand Drawing"
@@ -87,15 +158,19 @@ class HandDrawingAnswer(models.Model):
         return f"{self.student.full_name} - {self.hand_draw.question}"
 
 
-class DigitalDrawingAnswer(models.Model):
+class DigitalDrawingAnswer(BlobReferenceMixin, ScoreTrackingMixin, models.Model):
     student = models.ForeignKey(
         Student, on_delete=models.CASCADE, related_name="digital_sketch_answer"
     )
     digital_draw = models.ForeignKey(
         DigitalDrawingExam, on_delete=models.CASCADE, related_name="digital_sketch"
     )
-    answer = models.ImageField(upload_to="digital_drawing_answers/%Y/%m/%d")
+    answer = models.ImageField(
+        upload_to="digital_drawing_answers/%Y/%m/%d", storage=content_storage
+    )
     score = models.IntegerField(default=0)
+    graded_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
 
     class Meta:
         verbose_name_plural = "Student Answer Digital Drawing"
@@ -105,15 +180,19 @@ class DigitalDrawingAnswer(models.Model):
         return self.student.full_name
 
 
-class PracticeDrawingAnswer(models.Model):
+class PracticeDrawingAnswer(BlobReferenceMixin, ScoreTrackingMixin, models.Model):
     student = models.ForeignKey(
         Student, on_delete=models.CASCADE, related_name="practice_sketch_answer"
     )
     practice_draw = models.ForeignKey(
         PracticeDrawingExam, on_delete=models.CASCADE, related_name="practice_sketch"
     )
-    answer = models.ImageField(upload_to="practice_drawing_answers/%Y/%m/%d")
+    answer = models.ImageField(
+        upload_to="practice_drawing_answers/%Y/%m/%d", storage=content_storage
+    )
     score = models.IntegerField(default=0)
+    graded_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
 
     class Meta:
         verbose_name_plural = "Student Answer Practice Drawing"
@@ -123,7 +202,85 @@ class PracticeDrawingAnswer(models.Model):
         return f"{self.student.full_name}"
 
 
+class StudentResultsManager(models.Manager):
+    def increment(self, student_id, create=True, **deltas):
+        """
+        Atomically add ``deltas`` to the result columns of one student with a
+        single UPDATE; the row is only created when it does not exist yet.
+        """
+        updates = {
+            field: Coalesce(F(field), 0) + delta
+            for field, delta in deltas.items()
+            if delta
+        }
+        if not updates or self.filter(user_id=student_id).update(**updates):
+            return
+        if create:
+            self.bulk_create([self.model(user_id=student_id)], ignore_conflicts=True)
+            self.filter(user_id=student_id).update(**updates)
+
+    def increment_many(self, field, deltas):
+        """
+        Apply ``{student_id: delta}`` to ``field`` with one UPDATE per
+        distinct delta.
+        """
+        by_delta = defaultdict(list)
+        for student_id, delta in deltas.items():
+            if delta:
+                by_delta[delta].append(student_id)
+        if not by_delta:
+            return
+        student_ids = {sid for ids in by_delta.values() for sid in ids}
+        existing = self.filter(user_id__in=student_ids).values_list(
+            "user_id", flat=True
+        )
+        self.bulk_create(
+            [self.model(user_id=sid) for sid in student_ids.difference(existing)],
+            ignore_conflicts=True,
+        )
+        for delta, ids in by_delta.items():
+            self.filter(user_id__in=ids).update(
+                **{field: Coalesce(F(field), 0) + delta}
+            )
+
+    def rebuild(self):
+        """Recompute every result row from the answer tables in one UPDATE."""
+        self.bulk_create(
+            [
+                self.model(user_id=student_id)
+                for student_id in Student.objects.filter(
+                    student_result__isnull=True
+                ).values_list("pk", flat=True)
+            ],
+            ignore_conflicts=True,
+        )
+
+        def total(model):
+            return Coalesce(
+                Subquery(
+                    model.objects.filter(student_id=OuterRef("user_id"))
+                    .values("student_id")
+                    .annotate(total=Sum("score"))
+                    .values("total")
+                ),
+                0,
+            )
+
+        return self.update(
+            mcq_result=total(McqAnswer),
+            hand_drawing_result=total(HandDrawingAnswer),
+            digital_art_result=total(DigitalDrawingAnswer),
+            trial_result=total(PracticeDrawingAnswer),
+        )
+
+
 class StudentResults(models.Model):
+    """
+    Per-student totals: each result column is the sum of the scores of that
+    student's answers of one kind, kept up to date by the answer signals and
+    the grading engine. ``manage.py rebuild_results`` recomputes them.
+    """
+
     user = models.OneToOneField(
         Student, on_delete=models.CASCADE, related_name="student_result"
     )
@@ -132,6 +289,7 @@ class StudentResults(models.Model):
     hand_drawing_result = models.IntegerField(null=True, blank=True, default=0)
     trial_result = models.IntegerField(null=True, blank=True, default=0)
     up_to_level = models.BooleanField(default=False)
+    objects = StudentResultsManager()
 
     def __str__(self):
         return self.user.full_name
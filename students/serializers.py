@@ -1,18 +1,18 @@
-import os
-import uuid
-
-from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import Sum
+from django.db import transaction
 from rest_framework import serializers
 
+from exams.answer_keys import get_answer_key
 from exams.models import (
     DigitalDrawingExam,
     HandDrawingExam,
     MCQExam,
     PracticeDrawingExam,
 )
+from grading.queue import enqueue
 
+from .admission import refresh_admission
+from .context import get_student
 from .models import (
     DigitalDrawingAnswer,
     HandDrawingAnswer,
@@ -47,10 +47,7 @@ class StudentSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         user = self.context["request"].user
-        try:
-            student = user.student
-        except Student.DoesNotExist:
-            student = None
+        student = get_student(self.context["request"])
         if student is not None:
             # update existing student object
             student.full_name = validated_data.get("full_name", student.full_name)
@@ -63,63 +60,9 @@ class StudentSerializer(serializers.ModelSerializer):
         else:
             # create new student object
             validated_data["user"] = user
-            national_id = validated_data.get("national_id")
-            student_photo = validated_data.get("student_photo")
-            if national_id and student_photo:
-                file_ext = student_photo.name.split(".")[-1]
-                filename = f"{national_id}.{file_ext}"
-                # update path if filename already exists
-                if os.path.exists(
-                    os.path.join(settings.MEDIA_ROOT, "students", filename)
-                ):
-                    filename = f"{national_id}_{uuid.uuid4().hex}.{file_ext}"
-                validated_data["student_photo"].name = filename
             return super().create(validated_data)
 
-    def update(self, instance, validated_data):
-        national_id = validated_data.get("national_id")
-        student_photo = validated_data.get("student_photo")
-        if national_id and student_photo:
-            file_ext = student_photo.name.split(".")[-1]
-            filename = f"{national_id}.{file_ext}"
-            # update path if filename already exists
-            if os.path.exists(os.path.join(settings.MEDIA_ROOT, "students", filename)):
-                filename = f"{national_id}_{uuid.uuid4().hex}.{file_ext}"
-            validated_data["student_photo"].name = filename
-        return super().update(instance, validated_data)
-
-    def update_up_to_level(self, student):
-        score_mcq = student.student_mcq.aggregate(Sum("score"))["score__sum"]
-        score_hand_sketch = student.hand_sketch_answer.aggregate(Sum("score"))[
-            "score__sum"
-        ]
-        score_digital_sketch = student.digital_sketch_answer.aggregate(Sum("score"))[
-            "score__sum"
-        ]
-        score_practice_sketch = student.practice_sketch_answer.aggregate(Sum("score"))[
-            "score__sum"
-        ]
-        score_sum = sum(
-            filter(
-                None,
-                [
-                    score_mcq,
-                    score_hand_sketch,
-                    score_digital_sketch,
-                    score_practice_sketch,
-                ],
-            )
-        )
-
-        score_sum = score_sum or 0
-        if score_sum >= 150 and score_sum < 400:
-            student.up_to_level = True
-        else:
-            student.up_to_level = False
-        student.save()
-
     def to_representation(self, instance):
-        self.update_up_to_level(instance)
         representation = super().to_representation(instance)
         representation["student_photo_name"] = instance.student_photo.name.split("/")[
             -1
@@ -137,10 +80,10 @@ class McqAnswerSerializer(serializers.ModelSerializer):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        user = self.context["request"].user
-        if hasattr(user, "student"):
+        student = get_student(self.context["request"])
+        if student is not None:
             self.fields["question"].queryset = MCQExam.objects.filter(
-                college=user.student.college
+                college_id=student.college_id
             )
         else:
             self.fields["question"].queryset = MCQExam.objects.none()
@@ -149,28 +92,86 @@ class McqAnswerSerializer(serializers.ModelSerializer):
         return obj.is_correct
 
     def create(self, validated_data):
-        validated_data["student"] = self.context["request"].user.student
+        validated_data["student"] = get_student(self.context["request"])
+        correct_answer = get_answer_key(validated_data["student"].college_id)[
+            validated_data["question"].pk
+        ]
         try:
             answer = McqAnswer.objects.get(
                 student=validated_data["student"], question=validated_data["question"]
             )
             prev_answer = answer.answer
             answer.answer = validated_data["answer"]
-            if answer.answer == answer.question.answer:
+            if answer.answer == correct_answer:
                 if prev_answer != answer.answer:
                     answer.score += 1
             else:
-                if prev_answer == answer.question.answer:
+                if prev_answer == correct_answer:
                     answer.score -= 1
         except McqAnswer.DoesNotExist:
             answer = McqAnswer.objects.create(**validated_data)
-            if answer.answer == answer.question.answer:
+            if answer.answer == correct_answer:
                 answer.score += 1
-        answer.is_correct = answer.answer == answer.question.answer
+        answer.is_correct = answer.answer == correct_answer
         answer.save()
         return answer
 
 
+class McqSheetAnswerSerializer(serializers.Serializer):
+    question = serializers.IntegerField()
+    answer = serializers.CharField(max_length=100)
+
+
+class McqAnswerSheetSerializer(serializers.Serializer):
+    answers = McqSheetAnswerSerializer(many=True, allow_empty=False)
+
+    def validate_answers(self, answers):
+        question_ids = [item["question"] for item in answers]
+        if len(set(question_ids)) != len(question_ids):
+            raise serializers.ValidationError("Each question can be answered once.")
+        student = get_student(self.context["request"])
+        self.answer_key = get_answer_key(student.college_id)
+        unknown = sorted(set(question_ids) - self.answer_key.keys())
+        if unknown:
+            raise serializers.ValidationError(f"Invalid questions: {unknown}")
+        return answers
+
+    def create(self, validated_data):
+        student = get_student(self.context["request"])
+        with transaction.atomic():
+            # Answers that do not exist yet cannot be locked, so concurrent
+            # sheets of the student (a client retry) queue on the student row
+            # and the later one sees the answers the first created.
+            Student.objects.select_for_update().filter(pk=student.pk).exists()
+            existing = {
+                answer.question_id: answer
+                for answer in McqAnswer.objects.select_for_update().filter(
+                    student=student,
+                    question_id__in=[
+                        item["question"] for item in validated_data["answers"]
+                    ],
+                )
+            }
+            created, updated, change = [], [], 0
+            for item in validated_data["answers"]:
+                answer = existing.get(item["question"])
+                if answer is None:
+                    answer = McqAnswer(student=student, question_id=item["question"])
+                    created.append(answer)
+                else:
+                    updated.append(answer)
+                answer.answer = item["answer"]
+                answer.is_correct = answer.answer == self.answer_key[item["question"]]
+                answer.score = int(answer.is_correct)
+                change += answer.score_change
+            McqAnswer.objects.bulk_update(updated, ["answer", "is_correct", "score"])
+            McqAnswer.objects.bulk_create(created)
+            if change:
+                StudentResults.objects.increment(student.pk, mcq_result=change)
+                refresh_admission([student.pk])
+        return updated + created
+
+
 class HandDrawingSerializer(serializers.ModelSerializer):
     hand_draw = serializers.PrimaryKeyRelatedField(
         queryset=HandDrawingExam.objects.none()
@@ -182,26 +183,27 @@ class HandDrawingSerializer(serializers.ModelSerializer):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        user = self.context["request"].user
-        if hasattr(user, "student"):
+        student = get_student(self.context["request"])
+        if student is not None:
             self.fields["hand_draw"].queryset = HandDrawingExam.objects.filter(
-                college=user.student.college
+                college_id=student.college_id
             )
         else:
             self.fields["hand_draw"].queryset = HandDrawingExam.objects.none()
 
     def create(self, validated_data):
-        validated_data["student"] = self.context["request"].user.student
+        validated_data["student"] = get_student(self.context["request"])
         try:
             answer = HandDrawingAnswer.objects.get(
                 student=validated_data["student"], hand_draw=validated_data["hand_draw"]
             )
             answer.answer = validated_data["answer"]
+            answer.graded_at = None
             answer.save()
-            return answer
-
         except HandDrawingAnswer.DoesNotExist:
-            return HandDrawingAnswer.objects.create(**validated_data)
+            answer = HandDrawingAnswer.objects.create(**validated_data)
+        enqueue(answer)
+        return answer
 
 
 class DigitalSerializer(serializers.ModelSerializer):
@@ -215,27 +217,28 @@ class DigitalSerializer(serializers.ModelSerializer):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        user = self.context["request"].user
-        if hasattr(user, "student"):
+        student = get_student(self.context["request"])
+        if student is not None:
             self.fields["digital_draw"].queryset = DigitalDrawingExam.objects.filter(
-                college=user.student.college
+                college_id=student.college_id
             )
         else:
             self.fields["digital_draw"].queryset = DigitalDrawingExam.objects.none()
 
     def create(self, validated_data):
-        validated_data["student"] = self.context["request"].user.student
+        validated_data["student"] = get_student(self.context["request"])
         try:
             answer = DigitalDrawingAnswer.objects.get(
                 student=validated_data["student"],
                 digital_draw=validated_data["digital_draw"],
             )
             answer.answer = validated_data["answer"]
+            answer.graded_at = None
             answer.save()
-            return answer
-
         except DigitalDrawingAnswer.DoesNotExist:
-            return DigitalDrawingAnswer.objects.create(**validated_data)
+            answer = DigitalDrawingAnswer.objects.create(**validated_data)
+        enqueue(answer)
+        return answer
 
 
 class PracticeSerializer(serializers.ModelSerializer):
@@ -249,27 +252,28 @@ class PracticeSerializer(serializers.ModelSerializer):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        user = self.context["request"].user
-        if hasattr(user, "student"):
+        student = get_student(self.context["request"])
+        if student is not None:
             self.fields["practice_draw"].queryset = PracticeDrawingExam.objects.filter(
-                college=user.student.college
+                college_id=student.college_id
             )
         else:
             self.fields["practice_draw"].queryset = PracticeDrawingExam.objects.none()
 
     def create(self, validated_data):
-        validated_data["student"] = self.context["request"].user.student
+        validated_data["student"] = get_student(self.context["request"])
         try:
             answer = PracticeDrawingAnswer.objects.get(
                 student=validated_data["student"],
                 practice_draw=validated_data["practice_draw"],
             )
             answer.answer = validated_data["answer"]
+            answer.graded_at = None
             answer.save()
-            return answer
-
         except PracticeDrawingAnswer.DoesNotExist:
-            return PracticeDrawingAnswer.objects.create(**validated_data)
+            answer = PracticeDrawingAnswer.objects.create(**validated_data)
+        enqueue(answer)
+        return answer
 
 
 class UserResultSerializer(serializers.ModelSerializer):
@@ -294,10 +298,10 @@ class StudentResultsSerializer(serializers.ModelSerializer):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        user = self.context["request"].user
-        if hasattr(user, "student"):
+        student = get_student(self.context["request"])
+        if student is not None:
             self.fields["user"].queryset = Student.objects.filter(
-                college=user.student.college
+                college_id=student.college_id
             )
         else:
             self.fields["user"].queryset = Student.objects.none()
@@ -1,8 +1,9 @@
 from django.contrib.auth import get_user_model
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
-from notifications.signals import notify
 
+from students.admission import refresh_admission
+from students.files import file_sha256
 from students.models import (
     DigitalDrawingAnswer,
     HandDrawingAnswer,
@@ -11,69 +12,147 @@ from students.models import (
     Student,
     StudentResults,
 )
+from students.storage import blob_fields, change_references
+from user.transitions import notify_once, set_status, state_transition, status_changed
 
 User = get_user_model()
 
 
-@receiver(post_save, sender=McqAnswer, dispatch_uid="mcq_result")
-def mcq_result(sender, instance, created, **kwargs):
-    student_result, _ = StudentResults.objects.get_or_create(user=instance.student)
-    student_result.mcq_result += instance.score
-    student_result.save()
+@receiver(pre_save, sender=HandDrawingAnswer, dispatch_uid="hand_drawing_hash")
+@receiver(pre_save, sender=DigitalDrawingAnswer, dispatch_uid="digital_drawing_hash")
+@receiver(pre_save, sender=PracticeDrawingAnswer, dispatch_uid="practice_drawing_hash")
+def answer_content_hash(sender, instance, **kwargs):
+    # Only freshly uploaded files need hashing; stored ones keep their hash.
+    if instance.answer and not instance.answer._committed:
+        instance.content_hash = file_sha256(instance.answer)
 
 
-@receiver(post_save, sender=HandDrawingAnswer, dispatch_uid="hand_drawing_result")
-def hand_drawing_result(sender, instance, created, **kwargs):
-    student_result, _ = StudentResults.objects.get_or_create(user=instance.student)
-    student_result.hand_drawing_result = instance.score
-    student_result.save()
+RESULT_FIELDS = {
+    McqAnswer: "mcq_result",
+    HandDrawingAnswer: "hand_drawing_result",
+    DigitalDrawingAnswer: "digital_art_result",
+    PracticeDrawingAnswer: "trial_result",
+}
 
 
+@receiver(post_save, sender=McqAnswer, dispatch_uid="mcq_result")
+@receiver(post_save, sender=HandDrawingAnswer, dispatch_uid="hand_drawing_result")
 @receiver(post_save, sender=DigitalDrawingAnswer, dispatch_uid="digital_drawing_result")
-def digital_drawing_result(sender, instance, created, **kwargs):
-    student_result, _ = StudentResults.objects.get_or_create(user=instance.student)
-    student_result.digital_art_result = instance.score
-    student_result.save()
+@receiver(
+    post_save, sender=PracticeDrawingAnswer, dispatch_uid="practice_drawing_result"
+)
+def answer_result(sender, instance, created, **kwargs):
+    StudentResults.objects.increment(
+        instance.student_id, **{RESULT_FIELDS[sender]: instance.score_change}
+    )
+    if instance.score_change:
+        refresh_admission([instance.student_id])
+    instance._saved_score = instance.score
 
 
+@receiver(post_delete, sender=McqAnswer, dispatch_uid="mcq_result_delete")
 @receiver(
-    post_save, sender=PracticeDrawingAnswer, dispatch_uid="practice_drawing_result"
+    post_delete, sender=HandDrawingAnswer, dispatch_uid="hand_drawing_result_delete"
+)
+@receiver(
+    post_delete,
+    sender=DigitalDrawingAnswer,
+    dispatch_uid="digital_drawing_result_delete",
+)
+@receiver(
+    post_delete,
+    sender=PracticeDrawingAnswer,
+    dispatch_uid="practice_drawing_result_delete",
+)
+def answer_result_delete(sender, instance, **kwargs):
+    # Never create a row here: the student itself may be being deleted.
+    StudentResults.objects.increment(
+        instance.student_id,
+        create=False,
+        **{RESULT_FIELDS[sender]: -instance._saved_score},
+    )
+    if instance._saved_score:
+        refresh_admission([instance.student_id])
+
+
+@receiver(post_save, sender=Student, dispatch_uid="student_blobs")
+@receiver(post_save, sender=HandDrawingAnswer, dispatch_uid="hand_drawing_blobs")
+@receiver(post_save, sender=DigitalDrawingAnswer, dispatch_uid="digital_drawing_blobs")
+@receiver(
+    post_save, sender=PracticeDrawingAnswer, dispatch_uid="practice_drawing_blobs"
 )
-def practice_drawing_result(sender, instance, created, **kwargs):
-    student_result, _ = StudentResults.objects.get_or_create(user=instance.student)
-    student_result.trial_result = instance.score
-    student_result.save()
+def blob_references(sender, instance, update_fields, **kwargs):
+    saved = instance._saved_blobs
+    current = instance.blob_names()
+    if update_fields is not None:
+        current = {
+            field.attname: current[field.attname]
+            if field.name in update_fields
+            else saved.get(field.attname, "")
+            for field in blob_fields(sender)
+        }
+    changed = [key for key, name in current.items() if name != saved.get(key, "")]
+    change_references(
+        added=[current[key] for key in changed],
+        removed=[saved.get(key, "") for key in changed],
+    )
+    instance._saved_blobs = current
+
+
+@receiver(post_delete, sender=Student, dispatch_uid="student_blobs_delete")
+@receiver(
+    post_delete, sender=HandDrawingAnswer, dispatch_uid="hand_drawing_blobs_delete"
+)
+@receiver(
+    post_delete,
+    sender=DigitalDrawingAnswer,
+    dispatch_uid="digital_drawing_blobs_delete",
+)
+@receiver(
+    post_delete,
+    sender=PracticeDrawingAnswer,
+    dispatch_uid="practice_drawing_blobs_delete",
+)
+def blob_references_delete(sender, instance, **kwargs):
+    # Cascades and queryset deletes load the rows, so they come through here.
+    change_references(removed=instance._saved_blobs.values())
+
+
+def sync_cached_user(student, status):
+    # Statuses are written with UPDATE; keep an already loaded user in step.
+    if Student._meta.get_field("user").is_cached(student):
+        student.user.status = student.user._loaded_status = status
 
 
 @receiver(post_save, sender=Student, dispatch_uid="student_status")
 def student_status(sender, instance, created, **kwargs):
     if created:
-        instance.user.status = "student_review"
-        instance.user.save()
-        notify.send(
-            instance.user,
-            recipient=instance.user,
-            verb=f"تم التسجيل بنجاح في كلية {instance.college}",
-            description="يمكنك الآن تأدية الاختبارات الخاصة بالقبول في الكلية",
-        )
+        with state_transition():
+            set_status([instance.user_id], "student_review")
+            sync_cached_user(instance, "student_review")
+            notify_once(
+                instance.user_id,
+                f"تم التسجيل بنجاح في كلية {instance.college}",
+                "يمكنك الآن تأدية الاختبارات الخاصة بالقبول في الكلية",
+            )
 
 
 @receiver(post_save, sender=Student, dispatch_uid="update_up_to_level")
 def update_up_to_level(sender, instance, created, **kwargs):
-    student_result, _ = StudentResults.objects.get_or_create(user=instance)
-    student_result.up_to_level = instance.up_to_level
-    student_result.save()
-    if instance.up_to_level == True:
-        instance.user.status = "student"
-        instance.user.save()
+    StudentResults.objects.update_or_create(
+        user=instance, defaults={"up_to_level": instance.up_to_level}
+    )
+    user_field = Student._meta.get_field("user")
+    if instance.up_to_level and not (
+        user_field.is_cached(instance) and instance.user.status == "student"
+    ):
+        set_status([instance.user_id], "student")
+        sync_cached_user(instance, "student")
 
 
 @receiver(post_save, sender=User, dispatch_uid="user_approval")
-def check_user_approval(sender, instance, created, **kwargs):
-    if instance.status == "student":
-        notify.send(
-            instance,
-            recipient=instance,
-            verb="تهانينا تم قبولك في الكلية",
-            description="تهانينا تم قبولك في الكلية و نتمنى لك التوفيق",
-        )
+def user_status_notification(sender, instance, created, **kwargs):
+    previous = instance._loaded_status
+    if (created or previous is not None) and instance.status != previous:
+        status_changed(instance.pk, instance.status)
+        instance._loaded_status = instance.status
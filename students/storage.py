@@ -0,0 +1,142 @@
+import os
+import tempfile
+from collections import Counter, defaultdict
+
+from django.apps import apps
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F, FileField
+from django.utils.deconstruct import deconstructible
+
+from .files import file_sha256
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores each file once under the SHA-256 of its content, so identical
+    uploads share a single blob and names never collide. Every blob has a
+    MediaBlob row; the rows referencing it are counted there by the model
+    signals once they commit, see ``change_references``.
+    """
+
+    prefix = "blobs"
+
+    def blob_name(self, digest, name):
+        extension = os.path.splitext(name)[1].lower()
+        return f"{self.prefix}/{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        name = self.blob_name(file_sha256(content), name)
+        MediaBlob = apps.get_model("students", "MediaBlob")
+        # The row lock keeps media_gc from removing the blob while it is
+        # reused; the touch makes it recent again for later collections.
+        with transaction.atomic():
+            if MediaBlob.objects.select_for_update().filter(
+                name=name
+            ).exists() and self.touch(name):
+                return name
+        self._save(name, content)
+        # Another upload of the same bytes may have registered the blob first.
+        MediaBlob.objects.bulk_create(
+            [MediaBlob(name=name, size=content.size)], ignore_conflicts=True
+        )
+        return name
+
+    def touch(self, name):
+        try:
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def _save(self, name, content):
+        # Write to a temporary file and move it into place, so a concurrent
+        # write of the same blob is harmless and no existence probe is needed.
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                for chunk in content.chunks():
+                    temp_file.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(temp_path, self.file_permissions_mode)
+            os.replace(temp_path, full_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        return name
+
+    def delete(self, name):
+        if not name.startswith(f"{self.prefix}/"):
+            return super().delete(name)
+        # Blobs still referenced by other rows are kept.
+        MediaBlob = apps.get_model("students", "MediaBlob")
+        deleted, _ = MediaBlob.objects.filter(name=name, references__lte=0).delete()
+        if deleted:
+            super().delete(name)
+
+
+content_storage = ContentAddressedStorage()
+
+
+def blob_fields(model):
+    return [
+        field
+        for field in model._meta.concrete_fields
+        if isinstance(field, FileField)
+        and isinstance(field.storage, ContentAddressedStorage)
+    ]
+
+
+class BlobReferenceMixin:
+    """
+    Remembers the blob names stored in the database, so that the signals can
+    count references for the names a save adds and removes.
+    """
+
+    _saved_blobs = {}
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_blobs = instance.blob_names()
+        return instance
+
+    def blob_names(self):
+        return {
+            field.attname: getattr(self, field.attname).name or ""
+            for field in blob_fields(type(self))
+        }
+
+
+def change_references(added=(), removed=()):
+    """
+    Count the blob names in ``added`` once more and those in ``removed`` once
+    less when the current transaction commits, so a rolled back save never
+    moves a count. Blobs reaching zero are left to media_gc.
+    """
+    changes = Counter(name for name in added if name)
+    changes.subtract(name for name in removed if name)
+    by_delta = defaultdict(list)
+    for name, delta in changes.items():
+        if delta and name.startswith(f"{ContentAddressedStorage.prefix}/"):
+            by_delta[delta].append(name)
+    if not by_delta:
+        return
+
+    def apply():
+        MediaBlob = apps.get_model("students", "MediaBlob")
+        for delta, names in by_delta.items():
+            MediaBlob.objects.filter(name__in=names).update(
+                references=F("references") + delta
+            )
+
+    transaction.on_commit(apply)
@@ -1,24 +1,49 @@
+import hashlib
 import os
+import shutil
+import tempfile
+from collections import Counter
+from io import StringIO
+from unittest import mock
 
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.files.base import ContentFile
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import TestCase
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from notifications.models import Notification
+from rest_framework.test import APIClient, APIRequestFactory
 
 from colleges.models import College
+from exams.answer_keys import get_answer_key
 from exams.models import (
     DigitalDrawingExam,
     HandDrawingExam,
     MCQExam,
     PracticeDrawingExam,
 )
+from exams.papers import build_mcq_form
+from grading.models import GradingJob
+from user.transitions import set_status
 
+from .cohort import DRAWING_KINDS, generate_cohort
+from .context import get_student
+from .management.commands import media_gc
 from .models import (
     DigitalDrawingAnswer,
     HandDrawingAnswer,
     McqAnswer,
+    MediaBlob,
     PracticeDrawingAnswer,
     Student,
+    StudentResults,
 )
+from .storage import ContentAddressedStorage, content_storage
 
 User = get_user_model()
 
@@ -214,11 +239,11 @@ class DigitalDrawingAnswerModelTest(TestCase):
 
     def test_digital_drawing_answer_answer(self):
         generated_name = os.path.basename(self.digital_drawing_answer.answer.name)
-        expected_name = os.path.basename(self.image.name)
+        expected_name = hashlib.sha256(b"file_content").hexdigest() + ".jpg"
         self.assertEqual(
             generated_name,
             expected_name,
-            "The names of the image files should be equal",
+            "Answer images should be stored under their content hash",
         )
 
     def test_digital_drawing_answer_score(self):
@@ -267,3 +292,738 @@ class PracticeDrawingAnswerTest(TestCase):
 
     def test_practice_drawing_answer_score(self):
         self.assertEqual(self.answer.score, 50)
+
+
+class ContentAddressedStorageTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.storage = ContentAddressedStorage(location=self.media_root)
+
+    def test_identical_content_shares_one_blob(self):
+        first = self.storage.save("a/answer.PNG", ContentFile(b"drawing"))
+        second = self.storage.save("b/answer_copy.png", ContentFile(b"drawing"))
+
+        digest = hashlib.sha256(b"drawing").hexdigest()
+        self.assertEqual(first, second)
+        self.assertEqual(first, f"blobs/{digest[:2]}/{digest[2:4]}/{digest}.png")
+        self.assertEqual(MediaBlob.objects.get(name=first).references, 0)
+        self.assertEqual(
+            os.listdir(os.path.dirname(self.storage.path(first))), [f"{digest}.png"]
+        )
+
+    def test_only_unreferenced_blobs_are_deleted(self):
+        name = self.storage.save("answer.png", ContentFile(b"drawing"))
+        MediaBlob.objects.update(references=1)
+
+        self.storage.delete(name)
+        self.assertTrue(self.storage.exists(name))
+        MediaBlob.objects.update(references=0)
+        self.storage.delete(name)
+
+        self.assertFalse(self.storage.exists(name))
+        self.assertFalse(MediaBlob.objects.exists())
+
+    def test_blob_written_without_row_is_overwritten(self):
+        name = self.storage.save("answer.png", ContentFile(b"drawing"))
+        MediaBlob.objects.all().delete()
+
+        self.assertEqual(self.storage.save("answer.png", ContentFile(b"drawing")), name)
+        self.assertEqual(MediaBlob.objects.get().references, 0)
+
+
+class BlobReferenceTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_settings = override_settings(MEDIA_ROOT=media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        self.college = College.objects.create(name="Test College", payment_code="1")
+        self.exam = HandDrawingExam.objects.create(
+            question="Draw", task_description="Draw", college=self.college
+        )
+
+    def create_student(self, index, photo=b"photo"):
+        user = User.objects.create_user(
+            email=f"blob{index}@example.com", name="Test User", password="testpass"
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            return Student.objects.create(
+                user=user,
+                full_name=f"Student {index}",
+                student_photo=SimpleUploadedFile("photo.png", photo),
+                national_id=f"{index:014d}",
+                seat_number=index,
+                total=80,
+                division="1",
+                phone_number=f"0100{index}",
+                college=self.college,
+            )
+
+    def references(self):
+        return dict(MediaBlob.objects.values_list("name", "references"))
+
+    def test_students_can_share_a_photo(self):
+        first = self.create_student(1)
+        second = self.create_student(2)
+
+        self.assertEqual(first.student_photo.name, second.student_photo.name)
+        self.assertEqual(self.references(), {first.student_photo.name: 2})
+
+    def test_replaced_and_deleted_files_are_released(self):
+        student = self.create_student(1)
+        with self.captureOnCommitCallbacks(execute=True):
+            answer = HandDrawingAnswer.objects.create(
+                student=student,
+                hand_draw=self.exam,
+                answer=SimpleUploadedFile("first.png", b"first"),
+            )
+        first = answer.answer.name
+        answer = HandDrawingAnswer.objects.get(pk=answer.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            answer.answer = SimpleUploadedFile("second.png", b"second")
+            answer.save()
+        second = answer.answer.name
+        self.assertEqual(self.references()[first], 0)
+        self.assertEqual(self.references()[second], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Student.objects.filter(pk=student.pk).delete()
+
+        self.assertEqual(set(self.references().values()), {0})
+
+    def test_failed_save_counts_nothing(self):
+        self.create_student(1)
+        with self.assertRaises(IntegrityError):
+            # The seat number is taken.
+            with transaction.atomic(), self.captureOnCommitCallbacks(execute=True):
+                Student.objects.create(
+                    user=User.objects.create_user(
+                        email="taken@example.com", name="Test User", password="x"
+                    ),
+                    full_name="Student",
+                    student_photo=SimpleUploadedFile("photo.png", b"photo"),
+                    national_id="99999999999999",
+                    seat_number=1,
+                    total=80,
+                    division="1",
+                    phone_number="0199",
+                    college=self.college,
+                )
+
+        self.assertEqual(list(self.references().values()), [1])
+
+
+class MediaGarbageCollectorTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=self.media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        college = College.objects.create(name="Test College", payment_code="1")
+        user = User.objects.create_user(
+            email="gc@example.com", name="Test User", password="testpass"
+        )
+        student = Student.objects.create(
+            user=user,
+            full_name="Test Student",
+            national_id="12345678901234",
+            seat_number=1,
+            total=80.0,
+            division="1",
+            phone_number="123456789",
+            college=college,
+        )
+        exam = HandDrawingExam.objects.create(
+            question="Draw", task_description="Draw", college=college
+        )
+        self.answer = HandDrawingAnswer.objects.create(
+            student=student,
+            hand_draw=exam,
+            answer=SimpleUploadedFile("first.png", b"first"),
+        )
+        self.replaced = self.answer.answer.name
+        self.answer.answer = SimpleUploadedFile("second.png", b"second")
+        self.answer.save()
+
+    def run_gc(self, *args):
+        out = StringIO()
+        call_command("media_gc", "--min-age", "0", *args, stdout=out)
+        return out.getvalue()
+
+    def test_dry_run_only_reports(self):
+        output = self.run_gc("--dry-run")
+
+        self.assertIn("Would reclaim 5 bytes from 1 unreferenced files", output)
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, self.replaced)))
+
+    def test_replaced_answer_is_deleted(self):
+        output = self.run_gc()
+
+        self.assertIn("Reclaimed 5 bytes", output)
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, self.replaced)))
+        self.assertTrue(self.answer.answer.storage.exists(self.answer.answer.name))
+        self.assertEqual(
+            list(MediaBlob.objects.values_list("name", flat=True)),
+            [self.answer.answer.name],
+        )
+
+    def test_archive_moves_orphans(self):
+        archive = os.path.join(self.media_root, "archive")
+
+        self.run_gc("--archive", archive)
+
+        self.assertTrue(os.path.exists(os.path.join(archive, self.replaced)))
+
+    def test_recent_files_are_kept(self):
+        out = StringIO()
+        call_command("media_gc", stdout=out)
+        self.assertIn("Reclaimed 0 bytes", out.getvalue())
+
+    def test_reused_blob_is_touched_and_kept(self):
+        path = os.path.join(self.media_root, self.replaced)
+        os.utime(path, (0, 0))
+
+        content_storage.save("again.png", ContentFile(b"first"))
+
+        self.assertGreater(os.stat(path).st_mtime, 0)
+        out = StringIO()
+        call_command("media_gc", stdout=out)
+        self.assertIn("Reclaimed 0 bytes", out.getvalue())
+
+    def test_files_referenced_after_the_snapshot_are_kept(self):
+        name = self.answer.answer.name
+        with mock.patch(
+            "students.management.commands.media_gc.referenced_files",
+            return_value=Counter(),
+        ):
+            output = self.run_gc()
+
+        self.assertIn("Reclaimed 5 bytes", output)
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, name)))
+        self.assertTrue(MediaBlob.objects.filter(name=name).exists())
+
+    def test_orphans_are_rechecked_per_chunk(self):
+        for index in range(6):
+            content_storage.save(f"orphan{index}.png", ContentFile(b"orphan%d" % index))
+
+        with CaptureQueriesContext(connection) as chunked:
+            output = self.run_gc("--chunk-size", "10")
+        self.assertIn("from 7 unreferenced files", output)
+        for index in range(6):
+            content_storage.save(f"orphan{index}.png", ContentFile(b"orphan%d" % index))
+        with CaptureQueriesContext(connection) as per_file:
+            self.run_gc("--chunk-size", "1")
+        self.assertGreater(len(per_file), len(chunked) + 6)
+
+    def test_counts_changed_during_the_run_are_kept(self):
+        name = self.answer.answer.name
+        MediaBlob.objects.filter(name=name).update(references=5)
+        original = media_gc.referenced_files
+
+        def referenced_files():
+            # An upload counted while the snapshot is being taken.
+            MediaBlob.objects.filter(name=name).update(references=F("references") + 1)
+            return original()
+
+        with mock.patch.object(media_gc, "referenced_files", referenced_files):
+            self.run_gc()
+        self.assertEqual(MediaBlob.objects.get(name=name).references, 6)
+
+        self.run_gc()
+        self.assertEqual(MediaBlob.objects.get(name=name).references, 1)
+
+
+class StudentResultsMaintenanceTest(TestCase):
+    def setUp(self):
+        self.college = College.objects.create(name="Test College", payment_code="1")
+        user = User.objects.create_user(
+            email="results@example.com", name="Test User", password="testpass"
+        )
+        self.student = Student.objects.create(
+            user=user,
+            full_name="Test Student",
+            national_id="12345678901234",
+            seat_number=1,
+            total=80.0,
+            division="1",
+            phone_number="123456789",
+            college=self.college,
+        )
+        self.exam = MCQExam.objects.create(
+            question="2+2?", option1="4", answer="4", college=self.college
+        )
+
+    def results(self):
+        return StudentResults.objects.get(user=self.student)
+
+    def test_resaving_an_answer_does_not_double_count(self):
+        answer = McqAnswer.objects.create(
+            student=self.student, question=self.exam, answer="4", score=1
+        )
+        answer.save()
+        answer = McqAnswer.objects.get(pk=answer.pk)
+        answer.save()
+
+        self.assertEqual(self.results().mcq_result, 1)
+
+    def test_score_changes_apply_the_difference(self):
+        answer = McqAnswer.objects.create(
+            student=self.student, question=self.exam, answer="4", score=1
+        )
+        answer = McqAnswer.objects.get(pk=answer.pk)
+        answer.score = 0
+
+        # The answer UPDATE, guarded by the loaded score, the results UPDATE
+        # and the admission refresh.
+        with self.assertNumQueries(3):
+            answer.save()
+
+        self.assertEqual(self.results().mcq_result, 0)
+
+    def test_stale_copies_apply_their_change_once(self):
+        answer = McqAnswer.objects.create(
+            student=self.student, question=self.exam, answer="4", score=1
+        )
+        first = McqAnswer.objects.get(pk=answer.pk)
+        second = McqAnswer.objects.get(pk=answer.pk)
+        first.score = second.score = 0
+
+        first.save()
+        second.save()
+
+        self.assertEqual(self.results().mcq_result, 0)
+
+    def test_deleting_an_answer_removes_its_score(self):
+        answer = McqAnswer.objects.create(
+            student=self.student, question=self.exam, answer="4", score=1
+        )
+        McqAnswer.objects.get(pk=answer.pk).delete()
+        self.assertEqual(self.results().mcq_result, 0)
+
+    def test_missing_row_is_created(self):
+        StudentResults.objects.all().delete()
+        StudentResults.objects.increment(self.student.pk, trial_result=7)
+        self.assertEqual(self.results().trial_result, 7)
+
+    def test_increment_many_groups_by_delta(self):
+        StudentResults.objects.all().delete()
+        StudentResults.objects.increment_many(
+            "hand_drawing_result", {self.student.pk: 4}
+        )
+        StudentResults.objects.increment_many(
+            "hand_drawing_result", {self.student.pk: 3}
+        )
+        self.assertEqual(self.results().hand_drawing_result, 7)
+
+    def test_rebuild_recomputes_from_answers(self):
+        McqAnswer.objects.create(
+            student=self.student, question=self.exam, answer="4", score=1
+        )
+        StudentResults.objects.update(mcq_result=40, trial_result=9)
+
+        call_command("rebuild_results", stdout=StringIO())
+
+        self.assertEqual(
+            (self.results().mcq_result, self.results().trial_result), (1, 0)
+        )
+
+
+class AdmissionStatusTest(TestCase):
+    def setUp(self):
+        self.college = College.objects.create(name="Test College", payment_code="1")
+        self.user = User.objects.create_user(
+            email="admission@example.com", name="Test User", password="testpass"
+        )
+        self.student = Student.objects.create(
+            user=self.user,
+            full_name="Test Student",
+            student_photo="student/admission.jpg",
+            national_id="12345678901234",
+            seat_number=1,
+            total=80.0,
+            division="1",
+            phone_number="123456789",
+            college=self.college,
+        )
+        self.exam = PracticeDrawingExam.objects.create(
+            question="Draw", task_description="Draw", college=self.college
+        )
+
+    def test_reaching_the_threshold_admits_the_student(self):
+        PracticeDrawingAnswer.objects.create(
+            student=self.student, practice_draw=self.exam, answer="a.png", score=150
+        )
+
+        self.student.refresh_from_db()
+        self.user.refresh_from_db()
+        self.assertTrue(self.student.up_to_level)
+        self.assertTrue(StudentResults.objects.get(user=self.student).up_to_level)
+        self.assertEqual(self.user.status, "student")
+
+    def test_dropping_below_the_threshold_revokes_admission(self):
+        answer = PracticeDrawingAnswer.objects.create(
+            student=self.student, practice_draw=self.exam, answer="a.png", score=150
+        )
+        answer.score = 20
+        answer.save()
+
+        self.student.refresh_from_db()
+        self.assertFalse(self.student.up_to_level)
+
+    def test_serializing_students_does_not_write(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        with self.assertNumQueries(1):
+            response = client.get("/api/v1/students/list/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["results"][0]["student_photo_name"], "admission.jpg"
+        )
+
+
+class StatusTransitionTest(TestCase):
+    approval = "تهانينا تم قبولك في الكلية"
+
+    def setUp(self):
+        self.college = College.objects.create(name="Test College", payment_code="1")
+        self.user = User.objects.create_user(
+            email="transition@example.com", name="Test User", password="testpass"
+        )
+        self.exam = PracticeDrawingExam.objects.create(
+            question="Draw", task_description="Draw", college=self.college
+        )
+
+    def create_student(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Student.objects.create(
+                user=self.user,
+                full_name="Test Student",
+                student_photo="student/transition.jpg",
+                national_id="12345678901234",
+                seat_number=1,
+                total=80.0,
+                division="1",
+                phone_number="123456789",
+                college=self.college,
+            )
+
+    def test_registration_sets_status_and_notifies_once(self):
+        student = self.create_student()
+
+        self.assertEqual(student.user.status, "student_review")
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.status, "student_review")
+        self.assertEqual(
+            Notification.objects.filter(
+                recipient=self.user, verb__startswith="تم التسجيل"
+            ).count(),
+            1,
+        )
+
+    def test_admission_notifies_once(self):
+        student = self.create_student()
+        with self.captureOnCommitCallbacks(execute=True):
+            PracticeDrawingAnswer.objects.create(
+                student=student, practice_draw=self.exam, answer="a.png", score=150
+            )
+        user = User.objects.get(pk=self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+            student.save()
+
+        self.assertEqual(user.status, "student")
+        self.assertEqual(
+            Notification.objects.filter(recipient=user, verb=self.approval).count(), 1
+        )
+
+    def test_status_saved_directly_notifies(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.status = "student"
+            self.user.save()
+            self.user.save()
+
+        self.assertEqual(
+            Notification.objects.filter(
+                recipient=self.user, verb=self.approval
+            ).count(),
+            1,
+        )
+
+    def test_unchanged_status_is_not_written(self):
+        student = self.create_student()
+
+        with self.assertNumQueries(0):
+            set_status([], "student")
+        # The locking read inside its savepoint.
+        with self.assertNumQueries(3):
+            self.assertEqual(set_status([student.user_id], "student_review"), [])
+
+
+class McqSheetTestCase(TestCase):
+    """A student of a college with 60 questions; shared setUp, no tests."""
+
+    def setUp(self):
+        self.college = College.objects.create(name="Test College", payment_code="1")
+        self.user = User.objects.create_user(
+            email="sheet@example.com", name="Test User", password="testpass"
+        )
+        self.student = Student.objects.create(
+            user=self.user,
+            full_name="Test Student",
+            student_photo="student/sheet.jpg",
+            national_id="12345678901234",
+            seat_number=1,
+            total=80.0,
+            division="1",
+            phone_number="123456789",
+            college=self.college,
+        )
+        self.questions = [
+            MCQExam.objects.create(
+                question=f"Question {index}",
+                option1="a",
+                option2="b",
+                answer="a",
+                college=self.college,
+            )
+            for index in range(60)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def submit(self, answers):
+        return self.client.post(
+            "/api/v1/students/mcq/bulk/",
+            {
+                "answers": [
+                    {"question": question.pk, "answer": answer}
+                    for question, answer in answers
+                ]
+            },
+            format="json",
+        )
+
+
+class McqBulkSubmissionTest(McqSheetTestCase):
+    def test_whole_sheet_is_one_request_with_few_queries(self):
+        sheet = [(question, "a") for question in self.questions[:40]]
+        sheet += [(question, "b") for question in self.questions[40:]]
+
+        get_answer_key(self.college.pk)
+        with self.assertNumQueries(7):
+            response = self.submit(sheet)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(McqAnswer.objects.filter(student=self.student).count(), 60)
+        self.assertEqual(McqAnswer.objects.filter(is_correct=True).count(), 40)
+        self.assertEqual(StudentResults.objects.get(user=self.student).mcq_result, 40)
+
+    def test_resubmission_updates_answers_and_results(self):
+        self.submit([(question, "a") for question in self.questions[:10]])
+        response = self.submit(
+            [(question, "b") for question in self.questions[:4]]
+            + [(self.questions[10], "a")]
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(McqAnswer.objects.count(), 11)
+        self.assertEqual(StudentResults.objects.get(user=self.student).mcq_result, 7)
+
+    def test_questions_of_other_colleges_are_rejected(self):
+        other = College.objects.create(name="Other College", payment_code="2")
+        foreign = MCQExam.objects.create(
+            question="Foreign", option1="a", answer="a", college=other
+        )
+
+        response = self.submit([(self.questions[0], "a"), (foreign, "a")])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(McqAnswer.objects.exists())
+
+    def test_duplicate_questions_are_rejected(self):
+        response = self.submit([(self.questions[0], "a"), (self.questions[0], "b")])
+        self.assertEqual(response.status_code, 400)
+
+    def test_answers_are_cursor_paginated(self):
+        self.submit([(question, "a") for question in self.questions])
+
+        seen, url = [], "/api/v1/students/mcq/?page_size=25"
+        while url:
+            page = self.client.get(url).json()
+            self.assertLessEqual(len(page["results"]), 25)
+            seen += [answer["question"] for answer in page["results"]]
+            url = page["next"]
+
+        self.assertEqual(seen, sorted(seen))
+        self.assertEqual(len(seen), 60)
+
+
+class StudentContextTest(McqSheetTestCase):
+    def test_student_is_loaded_once_per_request(self):
+        request = APIRequestFactory().get("/")
+        request.user = User.objects.get(pk=self.user.pk)
+
+        with self.assertNumQueries(1):
+            student = get_student(request)
+            self.assertEqual(get_student(request), student)
+            self.assertEqual(request.user.student, student)
+            self.assertEqual(student.college.name, "Test College")
+
+    def test_anonymous_request_has_no_student(self):
+        request = APIRequestFactory().get("/")
+        request.user = AnonymousUser()
+        with self.assertNumQueries(0):
+            self.assertIsNone(get_student(request))
+
+    def test_answer_submission_reads_the_student_once(self):
+        self.client.force_authenticate(User.objects.get(pk=self.user.pk))
+        get_answer_key(self.college.pk)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                "/api/v1/students/mcq/",
+                {"question": self.questions[0].pk, "answer": "a"},
+            )
+
+        self.assertEqual(response.status_code, 201)
+        student_reads = [
+            query
+            for query in queries.captured_queries
+            if query["sql"].startswith('SELECT "students_student"')
+        ]
+        self.assertEqual(len(student_reads), 1)
+
+
+class McqFormTest(McqSheetTestCase):
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+
+    def test_form_hides_answers_and_is_shuffled(self):
+        response = self.client.get("/api/v1/students/mcq/form/")
+
+        self.assertEqual(response.status_code, 200)
+        form = response.json()
+        self.assertNotIn("answer", form[0])
+        self.assertEqual(
+            sorted(item["id"] for item in form),
+            [question.pk for question in self.questions],
+        )
+        self.assertNotEqual(
+            [item["id"] for item in form], [question.pk for question in self.questions]
+        )
+
+    def test_form_is_deterministic_per_student(self):
+        college = self.college.pk
+        self.assertEqual(build_mcq_form(college, 1), build_mcq_form(college, 1))
+        self.assertNotEqual(build_mcq_form(college, 1), build_mcq_form(college, 2))
+
+    def test_form_is_cached(self):
+        first = self.client.get("/api/v1/students/mcq/form/")
+        with self.assertNumQueries(0):
+            second = self.client.get(
+                "/api/v1/students/mcq/form/", HTTP_IF_NONE_MATCH=first["ETag"]
+            )
+        self.assertEqual(second.status_code, 304)
+
+    def test_form_rebuilt_on_question_change(self):
+        self.client.get("/api/v1/students/mcq/form/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.questions[0].delete()
+        form = self.client.get("/api/v1/students/mcq/form/").json()
+        self.assertEqual(len(form), 59)
+
+
+class CohortGeneratorTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=self.media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def generate(self, *args):
+        out = StringIO()
+        call_command(
+            "generate_cohort",
+            "--colleges=2",
+            "--students=25",
+            "--questions=5",
+            "--chunk-size=10",
+            "--images=3",
+            *args,
+            stdout=out,
+        )
+        return out.getvalue()
+
+    def snapshot(self):
+        return list(
+            McqAnswer.objects.order_by(
+                "student__seat_number", "question__question"
+            ).values_list(
+                "student__user__email", "question__question", "answer", "score"
+            )
+        ) + list(
+            HandDrawingAnswer.objects.order_by(
+                "student__seat_number", "hand_draw_id"
+            ).values_list("student__user__email", "answer", "score")
+        )
+
+    def test_cohort_is_created(self):
+        output = self.generate("--seed=3")
+
+        self.assertIn("2 colleges, 25 students, 125 mcq answers, 225 drawing", output)
+        self.assertEqual(College.objects.count(), 2)
+        self.assertEqual(Student.objects.count(), 25)
+        self.assertEqual(StudentResults.objects.count(), 25)
+        self.assertTrue(
+            self.client.login(email="cohort3-0@example.com", password="cohort-password")
+        )
+        totals = list(StudentResults.objects.order_by("pk").values_list())
+        StudentResults.objects.rebuild()
+        self.assertEqual(
+            list(StudentResults.objects.order_by("pk").values_list()), totals
+        )
+        self.assertEqual(
+            sum(MediaBlob.objects.values_list("references", flat=True)), 225
+        )
+        self.assertTrue(
+            all(
+                content_storage.exists(name)
+                for name in MediaBlob.objects.values_list("name", flat=True)
+            )
+        )
+
+    def test_interrupted_run_counts_the_committed_answers(self):
+        def interrupt(done, total):
+            raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            generate_cohort(1, 25, questions=1, chunk_size=10, progress=interrupt)
+
+        self.assertEqual(Student.objects.count(), 10)
+        self.assertEqual(
+            sum(MediaBlob.objects.values_list("references", flat=True)),
+            sum(model.objects.count() for _, model, *_ in DRAWING_KINDS),
+        )
+
+    def test_same_seed_gives_same_cohort(self):
+        with transaction.atomic():
+            self.generate("--seed=5")
+            first = self.snapshot()
+            transaction.set_rollback(True)
+        self.generate("--seed=5")
+        self.assertEqual(self.snapshot(), first)
+        with self.assertRaisesMessage(CommandError, "seed 5 already exists"):
+            self.generate("--seed=5")
+
+    def test_ungraded_answers_are_queued(self):
+        self.generate("--ungraded")
+
+        self.assertEqual(GradingJob.objects.filter(status="pending").count(), 225)
+        self.assertFalse(HandDrawingAnswer.objects.exclude(graded_at=None).exists())
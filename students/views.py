@@ -1,3 +1,17 @@
+from concurrent.futures import TimeoutError as BatchTimeout
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from exams.papers import build_mcq_form, form_cache_key
+from grading.batcher import grade_now
+from project.caching import cached_json_response
+from user.premission import IsStudent
+
+from .context import get_student
 from .models import (
     DigitalDrawingAnswer,
     HandDrawingAnswer,
@@ -11,11 +25,28 @@ from .serializers import (
     DigitalSerializer,
     HandDrawingSerializer,
     McqAnswerSerializer,
+    McqAnswerSheetSerializer,
     PracticeSerializer,
     StudentResultsSerializer,
     StudentSerializer,
 )
-from user.premission import IsStudent
+
+
+class GradeOnDemandMixin:
+    @action(detail=True, methods=["post"])
+    def grade(self, request, pk=None):
+        answer = self.get_object()
+        if answer.graded_at is None and settings.GRADING_MODEL_PATH:
+            try:
+                grade_now(answer)
+            except BatchTimeout:
+                # The answer stays queued for the grading worker.
+                return Response(
+                    {"detail": "Grading is busy, try again later."},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    headers={"Retry-After": str(settings.GRADING_MICROBATCH_TIMEOUT)},
+                )
+        return Response({"score": answer.score, "graded": answer.graded_at is not None})
 
 
 class StudentViewSet(CreateRetrieveUpdate):
@@ -34,10 +65,15 @@ class McqAnswerViewSet(CreateRetrieveUpdate):
     serializer_class = McqAnswerSerializer
 
     def get_queryset(self):
-        try:
-            return McqAnswer.objects.filter(student=self.request.user.student.id)
-        except:
-            return None
+        student = get_student(self.request)
+        if student is None:
+            return McqAnswer.objects.none()
+        return McqAnswer.objects.filter(student=student)
+
+    def get_serializer_class(self):
+        if self.action == "bulk":
+            return McqAnswerSheetSerializer
+        return super().get_serializer_class()
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -45,23 +81,41 @@ class McqAnswerViewSet(CreateRetrieveUpdate):
         return context
 
     def get_permissions(self):
-        if self.action == "create":
+        if self.action in ("create", "bulk", "form"):
             permission_classes = [IsStudent]
         else:
             permission_classes = []
         return [permission() for permission in permission_classes]
 
-
-class HandDrawingAnswerViewSet(CreateRetrieveUpdate):
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        answers = serializer.save()
+        data = McqAnswerSerializer(
+            answers, many=True, context=self.get_serializer_context()
+        ).data
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["get"])
+    def form(self, request):
+        student = get_student(request)
+        return cached_json_response(
+            request,
+            form_cache_key(student.college_id, student.pk),
+            lambda: build_mcq_form(student.college_id, student.pk),
+            settings.MCQ_FORM_CACHE_TIMEOUT,
+        )
+
+
+class HandDrawingAnswerViewSet(GradeOnDemandMixin, CreateRetrieveUpdate):
     serializer_class = HandDrawingSerializer
 
     def get_queryset(self):
-        try:
-            return HandDrawingAnswer.objects.filter(
-                student=self.request.user.student.id
-            )
-        except:
-            return None
+        student = get_student(self.request)
+        if student is None:
+            return HandDrawingAnswer.objects.none()
+        return HandDrawingAnswer.objects.filter(student=student)
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -71,21 +125,21 @@ class HandDrawingAnswerViewSet(CreateRetrieveUpdate):
     def get_permissions(self):
         if self.action == "create":
             permission_classes = [IsStudent]
+        elif self.action == "grade":
+            permission_classes = [IsAuthenticated]
         else:
             permission_classes = []
         return [permission() for permission in permission_classes]
 
 
-class DigitalDrawingAnswerViewSet(CreateRetrieveUpdate):
+class DigitalDrawingAnswerViewSet(GradeOnDemandMixin, CreateRetrieveUpdate):
     serializer_class = DigitalSerializer
 
     def get_queryset(self):
-        try:
-            return DigitalDrawingAnswer.objects.filter(
-                student=self.request.user.student.id
-            )
-        except:
-            return None
+        student = get_student(self.request)
+        if student is None:
+            return DigitalDrawingAnswer.objects.none()
+        return DigitalDrawingAnswer.objects.filter(student=student)
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -95,21 +149,21 @@ class DigitalDrawingAnswerViewSet(CreateRetrieveUpdate):
     def get_permissions(self):
         if self.action == "create":
             permission_classes = [IsStudent]
+        elif self.action == "grade":
+            permission_classes = [IsAuthenticated]
         else:
             permission_classes = []
         return [permission() for permission in permission_classes]
 
 
-class PracticeDrawingAnswerViewSet(CreateRetrieveUpdate):
+class PracticeDrawingAnswerViewSet(GradeOnDemandMixin, CreateRetrieveUpdate):
     serializer_class = PracticeSerializer
 
     def get_queryset(self):
-        try:
-            return PracticeDrawingAnswer.objects.filter(
-                student=self.request.user.student.id
-            )
-        except:
-            return None
+        student = get_student(self.request)
+        if student is None:
+            return PracticeDrawingAnswer.objects.none()
+        return PracticeDrawingAnswer.objects.filter(student=student)
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -119,6 +173,8 @@ class PracticeDrawingAnswerViewSet(CreateRetrieveUpdate):
     def get_permissions(self):
         if self.action == "create":
             permission_classes = [IsStudent]
+        elif self.action == "grade":
+            permission_classes = [IsAuthenticated]
         else:
             permission_classes = []
         return [permission() for permission in permission_classes]
@@ -128,11 +184,10 @@ class StudentResultsViewSet(RetrieveUpdate):
     serializer_class = StudentResultsSerializer
 
     def get_queryset(self):
-        try:
-            student_id = Student.objects.get(user_id=self.request.user.id).id
-            return StudentResults.objects.filter(user_id=student_id)
-        except:
-            return None
+        student = get_student(self.request)
+        if student is None:
+            return StudentResults.objects.none()
+        return StudentResults.objects.filter(user=student)
 
     def get_permissions(self):
         if self.action == "create":
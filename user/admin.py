@@ -1,8 +1,14 @@
 from django.contrib import admin
 
-from .models import UserAccount
+from .models import OutboxEmail, UserAccount
 
 
 @admin.register(UserAccount)
 class UserAccountAdmin(admin.ModelAdmin):
     list_display = ("name", "email", "is_active", "is_staff", "is_superuser")
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ("subject", "status", "attempts", "created_at", "sent_at")
+    list_filter = ("status",)
@@ -0,0 +1,70 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+CLAIM_FIELDS = ["status", "is_staff", "is_superuser", "is_active"]
+
+
+def claims_cache_key(user_id):
+    return f"user-claims:{user_id}"
+
+
+def claims_version(claims):
+    payload = ":".join(str(claims[field]) for field in CLAIM_FIELDS)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def user_claims(user):
+    claims = {field: getattr(user, field) for field in CLAIM_FIELDS}
+    claims["claims_version"] = claims_version(claims)
+    return claims
+
+
+def remember_claims(user_id, version):
+    cache.set(claims_cache_key(user_id), version, settings.JWT_CLAIMS_CACHE_TIMEOUT)
+
+
+def invalidate_claims(user_ids):
+    keys = [claims_cache_key(user_id) for user_id in user_ids]
+    cache.delete_many(keys)
+    # A lookup made before the change commits could confirm the old claims
+    # again, so drop them once more after commit.
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that builds ``request.user`` from the token's claims
+    while the cache confirms they are current, so no user row is read.
+
+    Tokens whose claims are unknown to the cache or out of date fall back to
+    the usual database lookup; a lookup that finds the claims still valid
+    re-confirms them for the following requests.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        version = validated_token.get("claims_version")
+        if version and cache.get(claims_cache_key(user_id)) == version:
+            User = get_user_model()
+            values = {field: validated_token[field] for field in CLAIM_FIELDS}
+            values["id"] = user_id
+            # from_db expects the loaded values in concrete field order.
+            names = [
+                field.attname
+                for field in User._meta.concrete_fields
+                if field.attname in values
+            ]
+            return User.from_db("default", names, [values[name] for name in names])
+        user = super().get_user(validated_token)
+        unchanged = all(
+            validated_token.get(field) == getattr(user, field) for field in CLAIM_FIELDS
+        )
+        if version and unchanged and user_claims(user)["claims_version"] == version:
+            remember_claims(user.pk, version)
+        return user
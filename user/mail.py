@@ -0,0 +1,116 @@
+import logging
+import os
+import socket
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.utils import timezone
+
+from project import leases
+
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxBackend(BaseEmailBackend):
+    """
+    Email backend that only stores messages in the outbox table; the
+    ``send_outbox`` worker delivers them through OUTBOX_DELIVERY_BACKEND.
+    """
+
+    def send_messages(self, email_messages):
+        rows = []
+        for message in email_messages:
+            if message.attachments:
+                raise ValueError("The email outbox does not store attachments.")
+            rows.append(
+                OutboxEmail(
+                    subject=message.subject,
+                    body=message.body,
+                    from_email=message.from_email,
+                    to=list(message.to),
+                    cc=list(message.cc),
+                    bcc=list(message.bcc),
+                    reply_to=list(message.reply_to),
+                    headers=dict(message.extra_headers),
+                    alternatives=[
+                        list(alternative)
+                        for alternative in getattr(message, "alternatives", [])
+                    ],
+                )
+            )
+        OutboxEmail.objects.bulk_create(rows)
+        return len(rows)
+
+
+def as_message(email, connection):
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email,
+        to=email.to,
+        cc=email.cc,
+        bcc=email.bcc,
+        reply_to=email.reply_to,
+        headers=email.headers,
+        connection=connection,
+    )
+    for content, mimetype in email.alternatives:
+        message.attach_alternative(content, mimetype)
+    return message
+
+
+def claim(worker_id, batch_size):
+    """Lock up to ``batch_size`` emails that are due for ``worker_id``."""
+    return leases.claim(
+        OutboxEmail, worker_id, batch_size, "sending", settings.OUTBOX_LEASE
+    )
+
+
+def deliver(emails):
+    """
+    Send a claimed batch over one delivery connection. Returns the number of
+    emails sent; failures are retried with exponential backoff.
+    """
+    sent, failed = [], {}
+    try:
+        with get_connection(settings.OUTBOX_DELIVERY_BACKEND) as mail_connection:
+            for email in emails:
+                try:
+                    as_message(email, mail_connection).send()
+                    sent.append(email.pk)
+                except Exception as exc:
+                    logger.warning("Sending outbox email %s failed: %r", email.pk, exc)
+                    failed[email.pk] = repr(exc)
+    except Exception as exc:
+        # The connection itself could not be opened or closed cleanly.
+        logger.exception("Outbox delivery connection failed")
+        failed.update({email.pk: repr(exc) for email in emails if email.pk not in sent})
+    OutboxEmail.objects.filter(pk__in=sent).update(
+        status="sent", sent_at=timezone.now(), locked_by="", locked_at=None
+    )
+    reschedule([email for email in emails if email.pk in failed], failed)
+    return len(sent)
+
+
+def reschedule(emails, errors):
+    leases.reschedule(
+        OutboxEmail,
+        emails,
+        errors,
+        settings.OUTBOX_MAX_ATTEMPTS,
+        settings.OUTBOX_RETRY_DELAY,
+    )
+
+
+def run_mailer(stop, batch_size, poll_interval):
+    """Deliver outbox emails until ``stop`` (a threading.Event) is set."""
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    while not stop.is_set():
+        emails = claim(worker_id, batch_size)
+        if not emails:
+            stop.wait(poll_interval)
+            continue
+        deliver(emails)
@@ -0,0 +1,39 @@
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from user.mail import claim, deliver, run_mailer
+
+
+class Command(BaseCommand):
+    help = "Deliver queued emails from the outbox."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.OUTBOX_BATCH_SIZE
+        )
+        parser.add_argument("--poll-interval", type=float, default=5.0)
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Deliver the emails that are due now and exit.",
+        )
+
+    def handle(self, *args, **options):
+        if options["once"]:
+            sent = 0
+            while True:
+                emails = claim("send_outbox", options["batch_size"])
+                if not emails:
+                    break
+                sent += deliver(emails)
+            self.stdout.write(self.style.SUCCESS(f"Sent {sent} emails."))
+            return
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+        signal.signal(signal.SIGINT, lambda signum, frame: stop.set())
+        self.stdout.write("Outbox mailer started.")
+        run_mailer(stop, options["batch_size"], options["poll_interval"])
+        self.stdout.write(self.style.SUCCESS("Outbox mailer stopped."))
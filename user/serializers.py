@@ -3,6 +3,8 @@ from rest_framework import serializers
 from rest_framework_simplejwt.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
+from .authentication import remember_claims, user_claims
+
 User = get_user_model()
 
 
@@ -14,6 +16,14 @@ class UserCreateSerializer(serializers.ModelSerializer):
 
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        claims = user_claims(user)
+        token.payload.update(claims)
+        remember_claims(user.pk, claims["claims_version"])
+        return token
+
     def validate(self, attrs):
         user = User.objects.filter(email=attrs["email"]).first()
         if user and not user.is_active:
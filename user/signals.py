@@ -0,0 +1,15 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from user.authentication import invalidate_claims
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User, dispatch_uid="user_claims")
+@receiver(post_delete, sender=User, dispatch_uid="user_claims_delete")
+def user_claims(sender, instance, update_fields=None, **kwargs):
+    # Logins only touch last_login, which no token claim depends on.
+    if update_fields is None or set(update_fields) - {"last_login"}:
+        invalidate_claims([instance.pk])
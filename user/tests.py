@@ -1,5 +1,22 @@
+from io import StringIO
+from unittest import mock
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory
+
+from colleges.models import College
+
+from .authentication import StatelessJWTAuthentication
+from .mail import claim, deliver
+from .models import OutboxEmail
+from .transitions import set_status
 
 
 class UserManagerTestCase(TestCase):
@@ -52,3 +69,128 @@ class UserAccountTestCase(TestCase):
             email="test@example.com", name="Test User", password="testpassword"
         )
         self.assertEqual(str(user), "test@example.com")
+
+
+class FlakyBackend(locmem.EmailBackend):
+    failures = 0
+
+    def send_messages(self, messages):
+        if FlakyBackend.failures:
+            FlakyBackend.failures -= 1
+            raise ConnectionError("mail server unavailable")
+        return super().send_messages(messages)
+
+
+@override_settings(
+    EMAIL_BACKEND="user.mail.OutboxBackend",
+    OUTBOX_DELIVERY_BACKEND="user.tests.FlakyBackend",
+    OUTBOX_MAX_ATTEMPTS=2,
+)
+class EmailOutboxTestCase(TestCase):
+    def queue(self, count=1):
+        for index in range(count):
+            message = EmailMultiAlternatives(
+                f"Subject {index}", "Body", "from@example.com", ["to@example.com"]
+            )
+            message.attach_alternative("<p>Body</p>", "text/html")
+            message.send()
+
+    def test_send_mail_only_queues(self):
+        self.queue()
+        self.assertEqual(mail.outbox, [])
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.to, ["to@example.com"])
+        self.assertEqual(email.alternatives, [["<p>Body</p>", "text/html"]])
+
+    def test_batch_is_delivered_over_one_connection(self):
+        self.queue(3)
+        with mock.patch.object(FlakyBackend, "open", autospec=True) as opened:
+            out = StringIO()
+            call_command("send_outbox", "--once", stdout=out)
+        self.assertEqual(opened.call_count, 1)
+        self.assertIn("Sent 3 emails.", out.getvalue())
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(mail.outbox[0].alternatives, [("<p>Body</p>", "text/html")])
+        self.assertFalse(OutboxEmail.objects.exclude(status="sent").exists())
+
+    def test_failures_are_retried_then_given_up(self):
+        self.queue()
+        FlakyBackend.failures = 2
+        with self.assertLogs("user.mail", "WARNING"):
+            self.assertEqual(deliver(claim("test", 10)), 0)
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.status, "pending")
+        self.assertGreater(email.available_at, timezone.now())
+        self.assertEqual(claim("test", 10), [])
+
+        OutboxEmail.objects.update(available_at=timezone.now())
+        with self.assertLogs("user.mail", "WARNING"):
+            deliver(claim("test", 10))
+        email.refresh_from_db()
+        self.assertEqual(email.status, "failed")
+        self.assertIn("mail server unavailable", email.last_error)
+
+    def test_registration_email_is_queued(self):
+        response = APIClient().post(
+            "/user/users/",
+            {
+                "email": "new@example.com",
+                "name": "New User",
+                "password": "S3cure-pass!",
+                "re_password": "S3cure-pass!",
+            },
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(
+            list(OutboxEmail.objects.values_list("to", flat=True)),
+            [["new@example.com"]],
+        )
+
+
+class StatelessJWTAuthenticationTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.college = College.objects.create(name="Test College", payment_code="1")
+        self.user = get_user_model().objects.create_user(
+            email="claims@example.com", name="Test User", password="testpass"
+        )
+        self.client = APIClient()
+        self.url = f"/api/v1/colleges/{self.college.pk}/exam-bundle/"
+
+    def login(self):
+        response = self.client.post(
+            "/user/login/", {"email": "claims@example.com", "password": "testpass"}
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"JWT {response.json()['access']}")
+
+    def test_confirmed_token_needs_no_queries(self):
+        self.login()
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_claims_carry_status(self):
+        self.login()
+        request = APIRequestFactory().get(
+            "/", HTTP_AUTHORIZATION=self.client._credentials["HTTP_AUTHORIZATION"]
+        )
+        user, _ = StatelessJWTAuthentication().authenticate(request)
+        self.assertEqual((user.pk, user.status), (self.user.pk, "user"))
+
+    def test_status_change_falls_back_to_database(self):
+        self.login()
+        set_status([self.user.pk], "student_review")
+        request = APIRequestFactory().get(
+            "/", HTTP_AUTHORIZATION=self.client._credentials["HTTP_AUTHORIZATION"]
+        )
+        with self.assertNumQueries(1):
+            user, _ = StatelessJWTAuthentication().authenticate(request)
+        self.assertEqual(user.status, "student_review")
+
+    def test_deactivated_user_is_rejected(self):
+        self.login()
+        self.client.get(self.url)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
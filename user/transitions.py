@@ -0,0 +1,101 @@
+import threading
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from .authentication import invalidate_claims
+
+STATUS_NOTIFICATIONS = {
+    "student": (
+        "تهانينا تم قبولك في الكلية",
+        "تهانينا تم قبولك في الكلية و نتمنى لك التوفيق",
+    ),
+}
+
+_local = threading.local()
+
+
+class TransitionBatch:
+    """
+    Side effects collected while a transition runs: each (user, verb)
+    notification is kept once and all of them are inserted together after
+    the surrounding transaction commits.
+    """
+
+    def __init__(self):
+        self.notifications = {}
+
+    def notify(self, user_id, verb, description="", level="info"):
+        self.notifications.setdefault(
+            (user_id, verb), {"description": description, "level": level}
+        )
+
+    def flush(self):
+        from notification.fanout import create_notifications, user_notification
+
+        if self.notifications:
+            create_notifications(
+                [
+                    user_notification(user_id, verb, **fields)
+                    for (user_id, verb), fields in self.notifications.items()
+                ]
+            )
+        self.notifications = {}
+
+
+@contextmanager
+def state_transition():
+    """
+    Run a block atomically, sharing one batch with any transitions nested
+    inside it. The outermost block schedules the batch for on_commit.
+    """
+    batch = getattr(_local, "batch", None)
+    if batch is not None:
+        yield batch
+        return
+    batch = _local.batch = TransitionBatch()
+    try:
+        with transaction.atomic():
+            yield batch
+            transaction.on_commit(batch.flush)
+    finally:
+        _local.batch = None
+
+
+def notify_once(user_id, verb, description="", level="info"):
+    with state_transition() as batch:
+        batch.notify(user_id, verb, description, level)
+
+
+def status_changed(user_id, status):
+    """Queue the notification that goes with entering ``status``, if any."""
+    message = STATUS_NOTIFICATIONS.get(status)
+    if message:
+        notify_once(user_id, *message, level="success")
+
+
+def set_status(user_ids, status):
+    """
+    Move users to ``status``, skipping users already there, and notify only
+    those that changed. The rows are locked before they are compared, so two
+    concurrent transitions to the same status notify each user once. Returns
+    the changed user ids.
+    """
+    if not user_ids:
+        return []
+    User = get_user_model()
+    with state_transition():
+        changed = list(
+            User.objects.select_for_update()
+            .filter(pk__in=user_ids)
+            .exclude(status=status)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        if changed:
+            User.objects.filter(pk__in=changed).update(status=status)
+            invalidate_claims(changed)
+            for user_id in changed:
+                status_changed(user_id, status)
+    return changed